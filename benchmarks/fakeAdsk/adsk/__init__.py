@@ -0,0 +1,21 @@
+# Headless stand-in for Fusion 360's adsk package, for benchmarks only.
+#
+# It models just enough of adsk.core / adsk.fusion for spawnBodyCopies to run: sketches,
+# profiles, construction lines, bodies, features and the timeline. Geometry is simplified
+# (bodies are tracked by their bounding box and volume), the point is to count work:
+# every attribute read or method call made from outside this package is counted per
+# calling function, and every feature and B-Rep operation is tallied in adsk.stats.
+#
+# Never put this directory on sys.path inside Fusion.
+
+from ._api import stats
+
+from . import core, fusion
+
+autoTerminate = True
+
+def doEvents():
+    stats.doEvents += 1
+
+def terminate():
+    pass
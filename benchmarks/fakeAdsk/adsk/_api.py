@@ -0,0 +1,113 @@
+# Call counting shared by the fake adsk modules.
+
+import sys
+from collections import Counter
+
+class Stats:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = Counter()
+        self.features = Counter()
+        self.brepOps = Counter()
+        self.doEvents = 0
+        self.paletteWrites = 0
+        self.stage = None
+        self._tokens = 0
+
+    def newToken(self, kind):
+        self._tokens += 1
+        return f"{kind}:{self._tokens}"
+
+    def countCall(self, owner, name, frame):
+        stage = self.stage
+        if stage is None:
+            while frame is not None and frame.f_code.co_name.startswith('<'):
+                frame = frame.f_back
+            stage = frame.f_code.co_name if frame is not None else '?'
+        self.calls[(stage, f"{owner}.{name}")] += 1
+
+    def report(self):
+        byStage = {}
+        for (stage, name), count in self.calls.items():
+            entry = byStage.setdefault(stage, {'total': 0, 'calls': {}})
+            entry['total'] += count
+            entry['calls'][name] = count
+        return {
+            'apiCalls': sum(self.calls.values()),
+            'apiCallsByStage': dict(sorted(byStage.items(), key=lambda kv: -kv[1]['total'])),
+            'featuresCreated': dict(self.features),
+            'timelineFeatures': sum(self.features.values()),
+            'brepOps': dict(self.brepOps),
+            'paletteWrites': self.paletteWrites,
+            'doEvents': self.doEvents,
+        }
+
+stats = Stats()
+
+def _isExternal(frame):
+    return not frame.f_globals.get('__name__', '').startswith('adsk')
+
+class _ApiMeta(type):
+
+    def __getattribute__(cls, name):
+        if name[0] != '_':
+            frame = sys._getframe(1)
+            if _isExternal(frame):
+                stats.countCall(type.__getattribute__(cls, '__name__'), name, frame)
+        return type.__getattribute__(cls, name)
+
+# Base of every fake API class: public attribute access from outside adsk is counted
+class ApiObject(metaclass=_ApiMeta):
+
+    def __getattribute__(self, name):
+        if name[0] != '_':
+            frame = sys._getframe(1)
+            if _isExternal(frame):
+                stats.countCall(type(self).__name__, name, frame)
+        return object.__getattribute__(self, name)
+
+    @classmethod
+    def cast(cls, obj):
+        return obj if isinstance(obj, cls) else None
+
+    @classmethod
+    def classType(cls):
+        return f"adsk::{cls.__module__.split('.')[-1]}::{cls.__name__}"
+
+    @property
+    def objectType(self):
+        return type(self).classType()
+
+    @property
+    def isValid(self):
+        return not getattr(self, '_deleted', False)
+
+# Collection returned by most API properties
+class ApiCollection(ApiObject):
+
+    def __init__(self, items=None):
+        self._items = list(items or [])
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def item(self, index):
+        return self._items[index] if 0 <= index < len(self._items) else None
+
+    # Iterating a real collection fetches every item across the API boundary
+    def __iter__(self):
+        frame = sys._getframe(1)
+        if _isExternal(frame):
+            for _ in self._items:
+                stats.countCall(type(self).__name__, 'item', frame)
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
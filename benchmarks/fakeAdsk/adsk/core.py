@@ -0,0 +1,810 @@
+# Fake adsk.core: vector math, collections, value inputs, the application and its UI.
+
+import math, uuid
+
+from ._api import ApiObject, ApiCollection, stats
+
+class Curve3DTypes:
+    Line3DCurveType = 0
+    Arc3DCurveType = 1
+    Circle3DCurveType = 2
+    Ellipse3DCurveType = 3
+    EllipticalArc3DCurveType = 4
+    InfiniteLine3DCurveType = 5
+    NurbsCurve3DCurveType = 6
+
+class SurfaceTypes:
+    PlaneSurfaceType = 0
+    CylinderSurfaceType = 1
+    ConeSurfaceType = 2
+    SphereSurfaceType = 3
+    TorusSurfaceType = 4
+    EllipticalCylinderSurfaceType = 5
+    EllipticalConeSurfaceType = 6
+    NurbsSurfaceType = 7
+
+class DropDownStyles:
+    CheckBoxDropDownStyle = 0
+    LabeledIconDropDownStyle = 1
+    TextListDropDownStyle = 2
+
+class ValueTypes:
+    ObjectValueType = 0
+    RealValueType = 1
+    StringValueType = 2
+
+# Geometry
+
+class Vector3D(ApiObject):
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    @classmethod
+    def create(cls, x=0.0, y=0.0, z=0.0):
+        return cls(x, y, z)
+
+    @property
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def copy(self):
+        return Vector3D(self.x, self.y, self.z)
+
+    def asArray(self):
+        return (self.x, self.y, self.z)
+
+    def getData(self):
+        return True, self.x, self.y, self.z
+
+    def asPoint(self):
+        return Point3D(self.x, self.y, self.z)
+
+    def normalize(self):
+        length = self.length
+        if length == 0:
+            return False
+        self.x, self.y, self.z = self.x / length, self.y / length, self.z / length
+        return True
+
+    def scaleBy(self, scale):
+        self.x, self.y, self.z = self.x * scale, self.y * scale, self.z * scale
+        return True
+
+    def add(self, vector):
+        self.x, self.y, self.z = self.x + vector.x, self.y + vector.y, self.z + vector.z
+        return True
+
+    def dotProduct(self, vector):
+        return self.x * vector.x + self.y * vector.y + self.z * vector.z
+
+    def crossProduct(self, vector):
+        return Vector3D(self.y * vector.z - self.z * vector.y,
+                        self.z * vector.x - self.x * vector.z,
+                        self.x * vector.y - self.y * vector.x)
+
+    def angleTo(self, vector):
+        lengths = self.length * vector.length
+        if lengths == 0:
+            return 0.0
+        return math.acos(max(-1.0, min(1.0, self.dotProduct(vector) / lengths)))
+
+    def isEqualTo(self, vector):
+        return abs(self.x - vector.x) < 1e-10 and abs(self.y - vector.y) < 1e-10 and abs(self.z - vector.z) < 1e-10
+
+    def transformBy(self, matrix):
+        m = matrix._m
+        x, y, z = self.x, self.y, self.z
+        self.x = m[0] * x + m[1] * y + m[2] * z
+        self.y = m[4] * x + m[5] * y + m[6] * z
+        self.z = m[8] * x + m[9] * y + m[10] * z
+        return True
+
+class Point3D(ApiObject):
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    @classmethod
+    def create(cls, x=0.0, y=0.0, z=0.0):
+        return cls(x, y, z)
+
+    def copy(self):
+        return Point3D(self.x, self.y, self.z)
+
+    def asArray(self):
+        return (self.x, self.y, self.z)
+
+    def getData(self):
+        return True, self.x, self.y, self.z
+
+    def asVector(self):
+        return Vector3D(self.x, self.y, self.z)
+
+    def vectorTo(self, point):
+        return Vector3D(point.x - self.x, point.y - self.y, point.z - self.z)
+
+    def distanceTo(self, point):
+        return math.sqrt((point.x - self.x) ** 2 + (point.y - self.y) ** 2 + (point.z - self.z) ** 2)
+
+    def translateBy(self, vector):
+        self.x, self.y, self.z = self.x + vector.x, self.y + vector.y, self.z + vector.z
+        return True
+
+    def isEqualTo(self, point):
+        return self.distanceTo(point) < 1e-10
+
+    def transformBy(self, matrix):
+        self.x, self.y, self.z = matrix._apply(self.x, self.y, self.z)
+        return True
+
+def _multiply(a, b):
+    return [sum(a[r * 4 + k] * b[k * 4 + c] for k in range(4)) for r in range(4) for c in range(4)]
+
+# Row-major 4x4, translation in the last column
+class Matrix3D(ApiObject):
+
+    def __init__(self, values=None):
+        self._m = list(values) if values else [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+    @classmethod
+    def create(cls):
+        return cls()
+
+    def _apply(self, x, y, z):
+        m = self._m
+        return (m[0] * x + m[1] * y + m[2] * z + m[3],
+                m[4] * x + m[5] * y + m[6] * z + m[7],
+                m[8] * x + m[9] * y + m[10] * z + m[11])
+
+    def copy(self):
+        return Matrix3D(self._m)
+
+    def asArray(self):
+        return tuple(self._m)
+
+    def setWithArray(self, values):
+        if len(values) != 16:
+            return False
+        self._m = [float(v) for v in values]
+        return True
+
+    def setToIdentity(self):
+        self._m = Matrix3D()._m
+        return True
+
+    def isEqualTo(self, matrix):
+        return all(abs(a - b) < 1e-10 for a, b in zip(self._m, matrix._m))
+
+    @property
+    def translation(self):
+        return Vector3D(self._m[3], self._m[7], self._m[11])
+
+    @translation.setter
+    def translation(self, vector):
+        self._m[3], self._m[7], self._m[11] = vector.x, vector.y, vector.z
+
+    # Rotation by angle (radians) about the axis through origin
+    def setToRotation(self, angle, axis, origin):
+        length = axis.length
+        ux, uy, uz = axis.x / length, axis.y / length, axis.z / length
+        c, s = math.cos(angle), math.sin(angle)
+        t = 1 - c
+        r = [t * ux * ux + c, t * ux * uy - s * uz, t * ux * uz + s * uy,
+             t * ux * uy + s * uz, t * uy * uy + c, t * uy * uz - s * ux,
+             t * ux * uz - s * uy, t * uy * uz + s * ux, t * uz * uz + c]
+        ox, oy, oz = origin.x, origin.y, origin.z
+        tx = ox - (r[0] * ox + r[1] * oy + r[2] * oz)
+        ty = oy - (r[3] * ox + r[4] * oy + r[5] * oz)
+        tz = oz - (r[6] * ox + r[7] * oy + r[8] * oz)
+        self._m = [r[0], r[1], r[2], tx, r[3], r[4], r[5], ty, r[6], r[7], r[8], tz, 0.0, 0.0, 0.0, 1.0]
+        return True
+
+    # This matrix becomes matrix * this, so it is applied after the current transform
+    def transformBy(self, matrix):
+        self._m = _multiply(matrix._m, self._m)
+        return True
+
+    # Rigid transforms only, which is all the API hands out for sketches and occurrences
+    def invert(self):
+        m = self._m
+        r = [m[0], m[4], m[8], m[1], m[5], m[9], m[2], m[6], m[10]]
+        tx, ty, tz = m[3], m[7], m[11]
+        self._m = [r[0], r[1], r[2], -(r[0] * tx + r[1] * ty + r[2] * tz),
+                   r[3], r[4], r[5], -(r[3] * tx + r[4] * ty + r[5] * tz),
+                   r[6], r[7], r[8], -(r[6] * tx + r[7] * ty + r[8] * tz),
+                   0.0, 0.0, 0.0, 1.0]
+        return True
+
+class Plane(ApiObject):
+
+    surfaceType = SurfaceTypes.PlaneSurfaceType
+
+    def __init__(self, origin, normal):
+        self.origin = origin
+        self.normal = normal
+
+    @classmethod
+    def create(cls, origin, normal):
+        return cls(origin.copy(), normal.copy())
+
+class Curve3D(ApiObject):
+
+    def transformBy(self, matrix):
+        for point in self._points():
+            point.transformBy(matrix)
+        return True
+
+class Line3D(Curve3D):
+
+    curveType = Curve3DTypes.Line3DCurveType
+
+    def __init__(self, startPoint, endPoint):
+        self.startPoint = startPoint
+        self.endPoint = endPoint
+
+    @classmethod
+    def create(cls, startPoint, endPoint):
+        return cls(startPoint.copy(), endPoint.copy())
+
+    def _points(self):
+        return (self.startPoint, self.endPoint)
+
+    def copy(self):
+        return Line3D(self.startPoint.copy(), self.endPoint.copy())
+
+    def getData(self):
+        return True, self.startPoint.copy(), self.endPoint.copy()
+
+class Circle3D(Curve3D):
+
+    curveType = Curve3DTypes.Circle3DCurveType
+
+    def __init__(self, center, normal, radius):
+        self.center = center
+        self.normal = normal
+        self.radius = float(radius)
+
+    @classmethod
+    def createByCenter(cls, center, normal, radius):
+        return cls(center.copy(), normal.copy(), radius)
+
+    def _points(self):
+        return (self.center,)
+
+    def getData(self):
+        return True, self.center.copy(), self.normal.copy(), self.radius
+
+class Arc3D(Curve3D):
+
+    curveType = Curve3DTypes.Arc3DCurveType
+
+    def __init__(self, center, normal, referenceVector, radius, startAngle, endAngle):
+        self.center = center
+        self.normal = normal
+        self.referenceVector = referenceVector
+        self.radius = float(radius)
+        self.startAngle = float(startAngle)
+        self.endAngle = float(endAngle)
+
+    @classmethod
+    def createByCenter(cls, center, normal, referenceVector, radius, startAngle, endAngle):
+        return cls(center.copy(), normal.copy(), referenceVector.copy(), radius, startAngle, endAngle)
+
+    def _points(self):
+        return (self.center,)
+
+    def getData(self):
+        return (True, self.center.copy(), self.normal.copy(), self.referenceVector.copy(),
+                self.radius, self.startAngle, self.endAngle)
+
+class NurbsCurve3D(Curve3D):
+
+    curveType = Curve3DTypes.NurbsCurve3DCurveType
+
+    def __init__(self, controlPoints, degree, knots, isRational, weights, isPeriodic):
+        self.controlPoints = controlPoints
+        self.degree = degree
+        self.knots = list(knots)
+        self.isRational = isRational
+        self.weights = list(weights)
+        self.isPeriodic = isPeriodic
+
+    @classmethod
+    def createNonRational(cls, controlPoints, degree, knots, isPeriodic):
+        return cls([p.copy() for p in controlPoints], degree, knots, False, [], isPeriodic)
+
+    @classmethod
+    def createRational(cls, controlPoints, degree, knots, weights, isPeriodic):
+        return cls([p.copy() for p in controlPoints], degree, knots, True, weights, isPeriodic)
+
+    def _points(self):
+        return self.controlPoints
+
+    @property
+    def asNurbsCurve(self):
+        return self
+
+    def getData(self):
+        return (True, [p.copy() for p in self.controlPoints], self.degree, list(self.knots),
+                self.isRational, list(self.weights), self.isPeriodic)
+
+class BoundingBox3D(ApiObject):
+
+    def __init__(self, minPoint, maxPoint):
+        self.minPoint = minPoint
+        self.maxPoint = maxPoint
+
+    @classmethod
+    def create(cls, minPoint, maxPoint):
+        return cls(minPoint.copy(), maxPoint.copy())
+
+    def contains(self, point):
+        return (self.minPoint.x <= point.x <= self.maxPoint.x and self.minPoint.y <= point.y <= self.maxPoint.y
+                and self.minPoint.z <= point.z <= self.maxPoint.z)
+
+class OrientedBoundingBox3D(ApiObject):
+
+    def __init__(self, centerPoint, lengthDirection, widthDirection, length, width, height):
+        self.centerPoint = centerPoint
+        self.lengthDirection = lengthDirection
+        self.widthDirection = widthDirection
+        self.length = length
+        self.width = width
+        self.height = height
+
+# Collections & values
+
+class ObjectCollection(ApiCollection):
+
+    @classmethod
+    def create(cls):
+        return cls()
+
+    def add(self, item):
+        self._items.append(item)
+        return True
+
+    def removeByIndex(self, index):
+        del self._items[index]
+        return True
+
+    def removeByItem(self, item):
+        self._items.remove(item)
+        return True
+
+    def find(self, item, startIndex=0):
+        try:
+            return self._items.index(item, startIndex)
+        except ValueError:
+            return -1
+
+    def contains(self, item):
+        return item in self._items
+
+    def clear(self):
+        self._items.clear()
+        return True
+
+_UNIT_SCALES = {'cm': 1.0, 'mm': 0.1, 'm': 100.0, 'in': 2.54, 'ft': 30.48,
+                'deg': math.pi / 180, 'rad': 1.0, '': 1.0}
+
+# Evaluates "<number> [unit]" into internal units (cm, radians)
+def evaluateExpression(expression, defaultUnits='cm'):
+    text = expression.strip()
+    number = text.rstrip('abcdefghijklmnopqrstuvwxyz ')
+    unit = text[len(number):].strip() or defaultUnits
+    return float(number) * _UNIT_SCALES[unit]
+
+class ValueInput(ApiObject):
+
+    def __init__(self, value, expression):
+        self.realValue = value
+        self.stringValue = expression
+        self.valueType = ValueTypes.StringValueType if expression is not None else ValueTypes.RealValueType
+
+    @classmethod
+    def createByReal(cls, value):
+        return cls(float(value), None)
+
+    @classmethod
+    def createByString(cls, expression):
+        return cls(None, expression)
+
+    def _evaluate(self, defaultUnits='cm'):
+        if self.stringValue is None:
+            return self.realValue
+        return evaluateExpression(self.stringValue, defaultUnits)
+
+# Application, UI & events
+
+class Event(ApiObject):
+
+    def __init__(self):
+        self._handlers = []
+
+    def add(self, handler):
+        self._handlers.append(handler)
+        return True
+
+    def remove(self, handler):
+        self._handlers.remove(handler)
+        return True
+
+    def _fire(self, args):
+        for handler in list(self._handlers):
+            handler.notify(args)
+
+class EventHandler:
+    def notify(self, args):
+        pass
+
+class CommandCreatedEventHandler(EventHandler):
+    pass
+
+class CommandEventHandler(EventHandler):
+    pass
+
+class InputChangedEventHandler(EventHandler):
+    pass
+
+class DocumentEventHandler(EventHandler):
+    pass
+
+class EventArgs(ApiObject):
+    pass
+
+class CommandEventArgs(EventArgs):
+
+    def __init__(self, command):
+        self.command = command
+        self.executeFailed = False
+        self.isValidResult = False
+
+class Document(ApiObject):
+
+    def __init__(self, name='Untitled'):
+        self.name = name
+        self.creationId = uuid.uuid4().hex
+
+class DocumentEventArgs(EventArgs):
+
+    def __init__(self, document=None):
+        self.document = document
+
+class CommandCreatedEventArgs(EventArgs):
+
+    def __init__(self, command):
+        self.command = command
+
+class Selection(ApiObject):
+
+    def __init__(self, entity):
+        self.entity = entity
+
+class CommandInput(ApiObject):
+
+    def __init__(self, inputId, name):
+        self.id = inputId
+        self.name = name
+        self.tooltip = ''
+        self.isVisible = True
+        self.isEnabled = True
+
+class SelectionCommandInput(CommandInput):
+
+    def __init__(self, inputId, name):
+        super().__init__(inputId, name)
+        self._selections = []
+        self._filters = []
+
+    def addSelectionFilter(self, filter):
+        self._filters.append(filter)
+        return True
+
+    def setSelectionLimits(self, minimum, maximum=0):
+        return True
+
+    @property
+    def selectionCount(self):
+        return len(self._selections)
+
+    def selection(self, index):
+        return Selection(self._selections[index])
+
+    def addSelection(self, entity):
+        self._selections.append(entity)
+        return True
+
+    def clearSelection(self):
+        self._selections.clear()
+        return True
+
+class ValueCommandInput(CommandInput):
+
+    def __init__(self, inputId, name, initialValue, units):
+        super().__init__(inputId, name)
+        self._units = units
+        self.value = initialValue._evaluate(units)
+
+    @property
+    def expression(self):
+        if self._units == 'deg':
+            return f"{math.degrees(self.value):.12g} deg"
+        return f"{self.value:.12g} {self._units}"
+
+    @expression.setter
+    def expression(self, expression):
+        self.value = evaluateExpression(expression, self._units)
+
+class ListItem(ApiObject):
+
+    def __init__(self, owner, name, isSelected):
+        self._owner = owner
+        self.name = name
+        self._isSelected = isSelected
+
+    @property
+    def isSelected(self):
+        return self._isSelected
+
+    @isSelected.setter
+    def isSelected(self, value):
+        if value:
+            for item in self._owner._items:
+                item._isSelected = False
+        self._isSelected = value
+
+class ListItems(ApiCollection):
+
+    def add(self, name, isSelected, icon='', beforeIndex=-1):
+        item = ListItem(self, name, isSelected)
+        self._items.append(item)
+        return item
+
+class DropDownCommandInput(CommandInput):
+
+    def __init__(self, inputId, name, style):
+        super().__init__(inputId, name)
+        self.dropDownStyle = style
+        self.listItems = ListItems()
+
+    @property
+    def selectedItem(self):
+        for item in self.listItems._items:
+            if item._isSelected:
+                return item
+        return None
+
+class BoolValueCommandInput(CommandInput):
+
+    def __init__(self, inputId, name, isCheckBox, initialValue):
+        super().__init__(inputId, name)
+        self.isCheckBox = isCheckBox
+        self.value = initialValue
+
+class IntegerSpinnerCommandInput(CommandInput):
+
+    def __init__(self, inputId, name, minimum, maximum, spinStep, initialValue):
+        super().__init__(inputId, name)
+        self.minimumValue = minimum
+        self.maximumValue = maximum
+        self.spinStep = spinStep
+        self.value = initialValue
+
+class StringValueCommandInput(CommandInput):
+
+    def __init__(self, inputId, name, initialValue):
+        super().__init__(inputId, name)
+        self.value = initialValue
+
+class CommandInputs(ApiCollection):
+
+    def _add(self, commandInput):
+        self._items.append(commandInput)
+        return commandInput
+
+    def itemById(self, inputId):
+        for commandInput in self._items:
+            if commandInput.id == inputId:
+                return commandInput
+        return None
+
+    def addSelectionInput(self, inputId, name, commandPrompt):
+        return self._add(SelectionCommandInput(inputId, name))
+
+    def addDistanceValueCommandInput(self, inputId, name, initialValue):
+        return self._add(ValueCommandInput(inputId, name, initialValue, 'cm'))
+
+    def addAngleValueCommandInput(self, inputId, name, initialValue):
+        return self._add(ValueCommandInput(inputId, name, initialValue, 'deg'))
+
+    def addValueInput(self, inputId, name, unitType, initialValue):
+        return self._add(ValueCommandInput(inputId, name, initialValue, unitType or 'cm'))
+
+    def addDropDownCommandInput(self, inputId, name, dropDownStyle):
+        return self._add(DropDownCommandInput(inputId, name, dropDownStyle))
+
+    def addBoolValueInput(self, inputId, name, isCheckBox, resourceFolder='', initialValue=False):
+        return self._add(BoolValueCommandInput(inputId, name, isCheckBox, initialValue))
+
+    def addIntegerSpinnerCommandInput(self, inputId, name, minimum, maximum, spinStep, initialValue):
+        return self._add(IntegerSpinnerCommandInput(inputId, name, minimum, maximum, spinStep, initialValue))
+
+    def addStringValueInput(self, inputId, name, initialValue=''):
+        return self._add(StringValueCommandInput(inputId, name, initialValue))
+
+class Command(ApiObject):
+
+    def __init__(self, definition):
+        self.parentCommandDefinition = definition
+        self.commandInputs = CommandInputs()
+        self.execute = Event()
+        self.executePreview = Event()
+        self.destroy = Event()
+        self.inputChanged = Event()
+        self.validateInputs = Event()
+        self.isOKButtonVisible = True
+
+class CommandDefinition(ApiObject):
+
+    def __init__(self, definitions, definitionId, name, tooltip):
+        self._definitions = definitions
+        self.id = definitionId
+        self.name = name
+        self.tooltip = tooltip
+        self.commandCreated = Event()
+
+    def deleteMe(self):
+        self._definitions._items.remove(self)
+        return True
+
+    # Stands in for the user clicking the button: creates the command and fires commandCreated
+    def _createCommand(self):
+        command = Command(self)
+        self.commandCreated._fire(CommandCreatedEventArgs(command))
+        return command
+
+class CommandDefinitions(ApiCollection):
+
+    def addButtonDefinition(self, definitionId, name, tooltip, resourceFolder=''):
+        definition = CommandDefinition(self, definitionId, name, tooltip)
+        self._items.append(definition)
+        return definition
+
+    def itemById(self, definitionId):
+        for definition in self._items:
+            if definition.id == definitionId:
+                return definition
+        return None
+
+class ToolbarControl(ApiObject):
+
+    def __init__(self, controls, control):
+        self._controls = controls
+        self.id = control.id
+
+    def deleteMe(self):
+        self._controls._items.remove(self)
+        return True
+
+class ToolbarControls(ApiCollection):
+
+    def addCommand(self, commandDefinition, positionId='', isBefore=False):
+        control = ToolbarControl(self, commandDefinition)
+        self._items.append(control)
+        return control
+
+    def itemById(self, controlId):
+        for control in self._items:
+            if control.id == controlId:
+                return control
+        return None
+
+class ToolbarPanel(ApiObject):
+
+    def __init__(self, panelId):
+        self.id = panelId
+        self.controls = ToolbarControls()
+
+class _ItemsById(ApiCollection):
+
+    def __init__(self, factory):
+        super().__init__()
+        self._factory = factory
+        self._byId = {}
+
+    def itemById(self, itemId):
+        if itemId not in self._byId:
+            self._byId[itemId] = self._factory(itemId)
+            self._items.append(self._byId[itemId])
+        return self._byId[itemId]
+
+class Workspace(ApiObject):
+
+    def __init__(self, workspaceId):
+        self.id = workspaceId
+        self.toolbarPanels = _ItemsById(ToolbarPanel)
+
+class TextCommandPalette(ApiObject):
+
+    def __init__(self, paletteId):
+        self.id = paletteId
+        self.isVisible = True
+        self._lines = []
+
+    def writeText(self, text):
+        stats.paletteWrites += 1
+        self._lines.append(text)
+        return True
+
+class ProgressDialog(ApiObject):
+
+    def __init__(self):
+        self.isShowing = False
+        self.wasCancelled = False
+        self.progressValue = 0
+        self.message = ''
+        self.title = ''
+        self.cancelButtonText = 'Cancel'
+        self.isBackgroundTranslucent = False
+        self.isCancelButtonShown = True
+        self.minimumValue = 0
+        self.maximumValue = 100
+
+    def show(self, title, message, minimumValue, maximumValue, delay=0):
+        self.title, self.message = title, message
+        self.minimumValue, self.maximumValue = minimumValue, maximumValue
+        self.isShowing = True
+        return True
+
+    def hide(self):
+        self.isShowing = False
+        return True
+
+class UserInterface(ApiObject):
+
+    def __init__(self):
+        self.commandDefinitions = CommandDefinitions()
+        self.workspaces = _ItemsById(Workspace)
+        self.palettes = _ItemsById(TextCommandPalette)
+        self._messages = []
+
+    def messageBox(self, text, title='', buttons=0, icon=0):
+        self._messages.append(text)
+        return 0
+
+    def createProgressDialog(self):
+        return ProgressDialog()
+
+class MeasureManager(ApiObject):
+
+    # Axis aligned only: the directions are assumed to be the sketch X / Y axes
+    def getOrientedBoundingBox(self, geometry, lengthDirection, widthDirection):
+        box = geometry.boundingBox
+        minP, maxP = box.minPoint, box.maxPoint
+        center = Point3D((minP.x + maxP.x) / 2, (minP.y + maxP.y) / 2, (minP.z + maxP.z) / 2)
+        return OrientedBoundingBox3D(center, lengthDirection.copy(), widthDirection.copy(),
+                                     maxP.y - minP.y, maxP.x - minP.x, maxP.z - minP.z)
+
+class Application(ApiObject):
+
+    _instance = None
+
+    def __init__(self):
+        self.activeProduct = None
+        self.userInterface = UserInterface()
+        self.measureManager = MeasureManager()
+        self.version = '2.0.0'
+        self.documentClosed = Event()
+
+    @classmethod
+    def get(cls):
+        if cls._instance is None:
+            cls._instance = Application()
+        return cls._instance
+
+    # Fake only: drops the application, its UI and its document
+    @classmethod
+    def _reset(cls):
+        cls._instance = None
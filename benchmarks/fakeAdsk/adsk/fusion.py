@@ -0,0 +1,1485 @@
+# Fake adsk.fusion: design, components, sketches, bodies, features, timeline and TemporaryBRepManager.
+#
+# Bodies are modelled by their world bounding box, volume and face / edge counts. Booleans
+# intersect the boxes and keep the smaller volume, chamfers leave the volume alone. Bodies
+# built from a BRepBodyDefinition are checked for closed, consistently oriented loops and
+# get their exact volume, so direct-build geometry errors still show up headless.
+
+import json, math, weakref
+
+from ._api import ApiObject, ApiCollection, stats
+from . import core
+
+class FeatureOperations:
+    JoinFeatureOperation = 0
+    CutFeatureOperation = 1
+    IntersectFeatureOperation = 2
+    NewBodyFeatureOperation = 3
+    NewComponentFeatureOperation = 4
+
+class BooleanTypes:
+    DifferenceBooleanType = 0
+    IntersectionBooleanType = 1
+    UnionBooleanType = 2
+
+class JointKeyPointTypes:
+    StartKeyPoint = 0
+    MiddleKeyPoint = 1
+    EndKeyPoint = 2
+    CenterKeyPoint = 3
+
+class JointDirections:
+    XAxisJointDirection = 0
+    YAxisJointDirection = 1
+    ZAxisJointDirection = 2
+
+class PointContainment:
+    PointInsidePointContainment = 0
+    PointOnPointContainment = 1
+    PointOutsidePointContainment = 2
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+# Live entities by entityToken, for Design.findEntityByToken
+_entities = weakref.WeakValueDictionary()
+
+class _Entity(ApiObject):
+
+    _tokenKind = 'entity'
+
+    @property
+    def entityToken(self):
+        token = self.__dict__.get('_token')
+        if token is None:
+            token = self._token = stats.newToken(self._tokenKind)
+            _entities[token] = self
+        return token
+
+    def _invalidate(self):
+        self._deleted = True
+
+# Attributes
+
+class Attribute(ApiObject):
+
+    def __init__(self, owner, groupName, name, value):
+        self._owner = owner
+        self.groupName = groupName
+        self.name = name
+        self.value = value
+
+    @property
+    def parent(self):
+        return self._owner._parent
+
+    def deleteMe(self):
+        self._owner._byKey.pop((self.groupName, self.name), None)
+        return True
+
+class Attributes(ApiObject):
+
+    def __init__(self, parent):
+        self._parent = parent
+        self._byKey = {}
+
+    def add(self, groupName, name, value):
+        attribute = Attribute(self, groupName, name, value)
+        self._byKey[(groupName, name)] = attribute
+        return attribute
+
+    def itemByName(self, groupName, name):
+        return self._byKey.get((groupName, name))
+
+    @property
+    def count(self):
+        return len(self._byKey)
+
+    def item(self, index):
+        values = list(self._byKey.values())
+        return values[index] if 0 <= index < len(values) else None
+
+    def __iter__(self):
+        return iter(list(self._byKey.values()))
+
+# Bodies
+
+class BRepEdge(_Entity):
+
+    _tokenKind = 'edge'
+
+    def __init__(self, body):
+        self.body = body
+        self.attributes = Attributes(self)
+
+class BRepEdges(ApiCollection):
+    pass
+
+class SurfaceEvaluator(ApiObject):
+
+    def __init__(self, face):
+        self._face = face
+
+    def getNormalAtPoint(self, point):
+        return True, core.Vector3D(*self._face._normal)
+
+# Meshes are the body's bounding box, 12 triangles
+class TriangleMesh(ApiObject):
+
+    _boxTriangles = [0, 2, 1, 0, 3, 2, 4, 5, 6, 4, 6, 7, 0, 1, 5, 0, 5, 4,
+                     1, 2, 6, 1, 6, 5, 2, 3, 7, 2, 7, 6, 3, 0, 4, 3, 4, 7]
+
+    def __init__(self, box):
+        x0, y0, z0, x1, y1, z1 = box
+        corners = [(x0, y0, z0), (x1, y0, z0), (x1, y1, z0), (x0, y1, z0),
+                   (x0, y0, z1), (x1, y0, z1), (x1, y1, z1), (x0, y1, z1)]
+        self.nodeCoordinatesAsDouble = [c for corner in corners for c in corner]
+        self.nodeIndices = list(self._boxTriangles)
+        self.nodeCount = 8
+        self.triangleCount = 12
+
+class MeshCalculator(ApiObject):
+
+    def __init__(self, body):
+        self._body = body
+        self.surfaceTolerance = 0.01
+
+    def setQuality(self, quality):
+        pass
+
+    def calculate(self):
+        stats.brepOps['calculateMesh'] += 1
+        return TriangleMesh(self._body._box)
+
+class MeshManager(ApiObject):
+
+    def __init__(self, body):
+        self._body = body
+
+    def createMeshCalculator(self):
+        return MeshCalculator(self._body)
+
+class BRepFace(_Entity):
+
+    _tokenKind = 'face'
+
+    def __init__(self, body, normal, point, edgeCount):
+        self.body = body
+        self._normal = normal
+        self._point = point
+        self._edgeCount = edgeCount
+        self._edges = None
+        self.attributes = Attributes(self)
+
+    @property
+    def geometry(self):
+        return core.Plane(core.Point3D(*self._point), core.Vector3D(*self._normal))
+
+    @property
+    def evaluator(self):
+        return SurfaceEvaluator(self)
+
+    @property
+    def pointOnFace(self):
+        return core.Point3D(*self._point)
+
+    @property
+    def edges(self):
+        if self._edges is None:
+            self._edges = BRepEdges([BRepEdge(self.body) for _ in range(self._edgeCount)])
+        return self._edges
+
+class BRepFaces(ApiCollection):
+    pass
+
+def _boxCorners(box):
+    x0, y0, z0, x1, y1, z1 = box
+    return [(x, y, z) for x in (x0, x1) for y in (y0, y1) for z in (z0, z1)]
+
+def _boxOf(points):
+    xs, ys, zs = zip(*points)
+    return [min(xs), min(ys), min(zs), max(xs), max(ys), max(zs)]
+
+class BRepBody(_Entity):
+
+    _tokenKind = 'body'
+
+    # box is [minX, minY, minZ, maxX, maxY, maxZ] in world space
+    def __init__(self, box, volume, faceCount, edgeCount, component=None, name='Body'):
+        self._box = list(box)
+        self._volume = volume
+        self._faceCount = faceCount
+        self._edgeCount = edgeCount
+        self._component = component
+        self._faces = None
+        self.name = name
+        self.isSelectable = True
+        self.isVisible = True
+        self.attributes = Attributes(self)
+
+        # Fake only: bodies later features made from this one, recomputed with it
+        self._derived = []
+
+    def _clone(self, component=None):
+        body = BRepBody(self._box, self._volume, self._faceCount, self._edgeCount, component, self.name)
+        for attribute in self.attributes:
+            body.attributes.add(attribute.groupName, attribute.name, attribute.value)
+        return body
+
+    # As a parametric recompute would, the change reaches every body copied or moved from this one
+    def _setGeometry(self, other):
+        self._box = list(other._box)
+        self._volume = other._volume
+        self._faceCount = other._faceCount
+        self._edgeCount = other._edgeCount
+        self._faces = None
+        for derived in self._derived:
+            derived._setGeometry(other)
+
+    def _transform(self, matrix):
+        self._box = _boxOf([matrix._apply(*p) for p in _boxCorners(self._box)])
+        self._faces = None
+
+    @property
+    def parentComponent(self):
+        return self._component
+
+    @property
+    def isTemporary(self):
+        return self._component is None
+
+    @property
+    def isSolid(self):
+        return self._faceCount > 0
+
+    @property
+    def meshManager(self):
+        return MeshManager(self)
+
+    @property
+    def boundingBox(self):
+        x0, y0, z0, x1, y1, z1 = self._box
+        return core.BoundingBox3D(core.Point3D(x0, y0, z0), core.Point3D(x1, y1, z1))
+
+    @property
+    def volume(self):
+        return self._volume
+
+    @property
+    def area(self):
+        x0, y0, z0, x1, y1, z1 = self._box
+        dx, dy, dz = x1 - x0, y1 - y0, z1 - z0
+        return 2 * (dx * dy + dy * dz + dz * dx) if self._faceCount else 0.0
+
+    # Bottom, top, then the side faces
+    @property
+    def faces(self):
+        if self._faces is None:
+            faces = []
+            if self._faceCount:
+                x0, y0, z0, x1, y1, z1 = self._box
+                cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+                sides = max(self._faceCount - 2, 1)
+                faces.append(BRepFace(self, (0.0, 0.0, -1.0), (cx, cy, z0), sides))
+                faces.append(BRepFace(self, (0.0, 0.0, 1.0), (cx, cy, z1), sides))
+                for i in range(self._faceCount - 2):
+                    a = 2 * math.pi * i / sides
+                    faces.append(BRepFace(self, (math.cos(a), math.sin(a), 0.0), (cx, cy, (z0 + z1) / 2), 4))
+            self._faces = BRepFaces(faces)
+        return self._faces
+
+    @property
+    def edges(self):
+        return BRepEdges([BRepEdge(self) for _ in range(self._edgeCount)])
+
+    def pointContainment(self, point):
+        x0, y0, z0, x1, y1, z1 = self._box
+        if x0 < point.x < x1 and y0 < point.y < y1 and z0 < point.z < z1:
+            return PointContainment.PointInsidePointContainment
+        return PointContainment.PointOutsidePointContainment
+
+    # Moves the body into a new child component of its component, under a new occurrence
+    def createComponent(self):
+        owner = self._component
+        design = owner._design
+        component = design._newComponent()
+        owner.occurrences._addOccurrence(component, core.Matrix3D())
+        owner.bRepBodies._items.remove(self)
+        component.bRepBodies._items.append(self)
+        self._component = component
+        return self
+
+    def copyToComponent(self, target):
+        body = self._clone(target._componentForBodies())
+        body._component.bRepBodies._items.append(body)
+        return body
+
+    def deleteMe(self):
+        if self._component is not None and self in self._component.bRepBodies._items:
+            self._component.bRepBodies._items.remove(self)
+        self._invalidate()
+        return True
+
+class BRepBodies(ApiCollection):
+
+    def __init__(self, component=None, items=None):
+        super().__init__(items)
+        self._component = component
+
+    def itemByName(self, name):
+        for body in self._items:
+            if body.name == name:
+                return body
+        return None
+
+    # Commits a temporary body into a Base Feature, which must be in edit mode
+    def add(self, body, baseFeature=None):
+        if baseFeature is None or not baseFeature._isEditing:
+            raise RuntimeError("3 : bodies can only be added to a base feature that is being edited")
+        newBody = body._clone(self._component)
+        self._items.append(newBody)
+        baseFeature._bodies._items.append(newBody)
+        stats.brepOps['commitBody'] += 1
+        return newBody
+
+# Sketches & profiles
+
+class SketchPoint(_Entity):
+
+    _tokenKind = 'sketchPoint'
+
+    def __init__(self, sketch, point):
+        self._sketch = sketch
+        self._point = point
+
+    @property
+    def geometry(self):
+        return self._point.copy()
+
+    @property
+    def worldGeometry(self):
+        point = self._point.copy()
+        point.transformBy(self._sketch._transform)
+        return point
+
+    def move(self, translation):
+        self._point = core.Point3D.create(self._point.x + translation.x, self._point.y + translation.y,
+                                          self._point.z + translation.z)
+        self._sketch._changed()
+        return True
+
+def _sketchPoint(sketch, point):
+    return point if isinstance(point, SketchPoint) else SketchPoint(sketch, point.copy())
+
+class SketchLine(_Entity):
+
+    _tokenKind = 'sketchLine'
+
+    # Either end can be a Point3D or an existing SketchPoint, which the line then shares
+    def __init__(self, sketch, startPoint, endPoint):
+        self._sketch = sketch
+        self.startSketchPoint = _sketchPoint(sketch, startPoint)
+        self.endSketchPoint = _sketchPoint(sketch, endPoint)
+        self.isConstruction = False
+        self.isFixed = False
+
+    @property
+    def parentSketch(self):
+        return self._sketch
+
+    @property
+    def geometry(self):
+        return core.Line3D(self.startSketchPoint._point.copy(), self.endSketchPoint._point.copy())
+
+    @property
+    def worldGeometry(self):
+        return core.Line3D(self.startSketchPoint.worldGeometry, self.endSketchPoint.worldGeometry)
+
+    @property
+    def length(self):
+        return self.startSketchPoint._point.distanceTo(self.endSketchPoint._point)
+
+    def deleteMe(self):
+        self._sketch.sketchCurves.sketchLines._items.remove(self)
+        self._invalidate()
+        return True
+
+class SketchLines(ApiCollection):
+
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def addByTwoPoints(self, startPoint, endPoint):
+        line = SketchLine(self._sketch, startPoint, endPoint)
+        self._items.append(line)
+        self._sketch._changed()
+        return line
+
+class SketchCurves(ApiObject):
+
+    def __init__(self, sketch):
+        self.sketchLines = SketchLines(sketch)
+
+    @property
+    def count(self):
+        return self.sketchLines.count
+
+class ProfileCurve(ApiObject):
+
+    def __init__(self, geometry):
+        self._geometry = geometry
+
+    @property
+    def geometry(self):
+        return self._geometry.copy()
+
+    @property
+    def geometryType(self):
+        return self._geometry.curveType
+
+class ProfileCurves(ApiCollection):
+    pass
+
+class ProfileLoop(ApiObject):
+
+    def __init__(self, isOuter, profileCurves):
+        self.isOuter = isOuter
+        self.profileCurves = profileCurves
+
+class ProfileLoops(ApiCollection):
+    pass
+
+def _polygonArea(points):
+    return sum(points[i - 1][0] * points[i][1] - points[i][0] * points[i - 1][1] for i in range(len(points))) / 2
+
+class AreaProperties(ApiObject):
+
+    def __init__(self, area):
+        self.area = area
+
+class Profile(_Entity):
+
+    _tokenKind = 'profile'
+
+    # loops are [(isOuter, [(x, y)])] polygons in sketch space
+    def __init__(self, sketch, loops):
+        self._sketch = sketch
+        self._loops = loops
+        curveLoops = []
+        for isOuter, points in loops:
+            curves = [core.Line3D(core.Point3D(*points[i - 1], 0.0), core.Point3D(*points[i], 0.0)) for i in range(len(points))]
+            curveLoops.append(ProfileLoop(isOuter, ProfileCurves([ProfileCurve(c) for c in curves])))
+        self.profileLoops = ProfileLoops(curveLoops)
+        self._area = sum(abs(_polygonArea(p)) * (1 if isOuter else -1) for isOuter, p in loops)
+        self._edgeCount = sum(len(p) for _, p in loops)
+
+    @property
+    def parentSketch(self):
+        return self._sketch
+
+    @property
+    def boundingBox(self):
+        points = [self._sketch._transform._apply(x, y, 0.0) for _, loop in self._loops for x, y in loop]
+        x0, y0, z0, x1, y1, z1 = _boxOf(points)
+        return core.BoundingBox3D(core.Point3D(x0, y0, z0), core.Point3D(x1, y1, z1))
+
+    def areaProperties(self, accuracy=0):
+        return AreaProperties(self._area)
+
+class Profiles(ApiCollection):
+
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    # Fake only: Fusion finds profiles from closed curves, here they are handed in directly
+    def _add(self, loops):
+        profile = Profile(self._sketch, loops)
+        self._items.append(profile)
+        return profile
+
+class Sketch(_Entity):
+
+    _tokenKind = 'sketch'
+
+    def __init__(self, component, name):
+        self._component = component
+        self.name = name
+        self._transform = core.Matrix3D()
+        self.sketchCurves = SketchCurves(self)
+        self.profiles = Profiles(self)
+        self._isComputeDeferred = False
+        self.isVisible = True
+        self.attributes = Attributes(self)
+
+    # Profiles are recomputed after every edit unless compute is deferred, and once when it is turned back on
+    def _changed(self):
+        if not self._isComputeDeferred:
+            stats.brepOps['sketchRecompute'] += 1
+
+    @property
+    def isComputeDeferred(self):
+        return self._isComputeDeferred
+
+    @isComputeDeferred.setter
+    def isComputeDeferred(self, value):
+        wasDeferred, self._isComputeDeferred = self._isComputeDeferred, value
+        if wasDeferred and not value:
+            self._changed()
+
+    # Fake only: places the sketch plane
+    def _setTransform(self, matrix):
+        self._transform = matrix.copy()
+
+    @property
+    def parentComponent(self):
+        return self._component
+
+    # Sketches are only ever used in the root context here
+    @property
+    def assemblyContext(self):
+        return None
+
+    @property
+    def transform(self):
+        return self._transform.copy()
+
+    @property
+    def origin(self):
+        return core.Point3D(*self._transform._apply(0.0, 0.0, 0.0))
+
+    @property
+    def xDirection(self):
+        m = self._transform._m
+        return core.Vector3D(m[0], m[4], m[8])
+
+    @property
+    def yDirection(self):
+        m = self._transform._m
+        return core.Vector3D(m[1], m[5], m[9])
+
+    def modelToSketchSpace(self, point):
+        inverse = self._transform.copy()
+        inverse.invert()
+        return core.Point3D(*inverse._apply(point.x, point.y, point.z))
+
+    def sketchToModelSpace(self, point):
+        return core.Point3D(*self._transform._apply(point.x, point.y, point.z))
+
+    def deleteMe(self):
+        self._component.sketches._items.remove(self)
+        self._invalidate()
+        return True
+
+class Sketches(ApiCollection):
+
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self, planarEntity, occurrenceForCreation=None):
+        sketch = Sketch(self._component, f"Sketch{len(self._items) + 1}")
+        self._items.append(sketch)
+        self._component._design._addTimelineObject(sketch, 'Sketch')
+        return sketch
+
+    def itemByName(self, name):
+        for sketch in self._items:
+            if sketch.name == name:
+                return sketch
+        return None
+
+class ConstructionPlane(_Entity):
+
+    _tokenKind = 'constructionPlane'
+
+    def __init__(self, component, normal):
+        self._component = component
+        self.geometry = core.Plane(core.Point3D(), core.Vector3D(*normal))
+
+# Features & timeline
+
+class TimelineObject(ApiObject):
+
+    def __init__(self, timeline, entity):
+        self._timeline = timeline
+        self.entity = entity
+        self.isSuppressed = False
+
+    @property
+    def index(self):
+        return self._timeline._items.index(self)
+
+class Timeline(ApiCollection):
+
+    def __init__(self):
+        super().__init__()
+        self.markerPosition = 0
+
+class Feature(_Entity):
+
+    _tokenKind = 'feature'
+
+    def __init__(self, component, bodies=()):
+        self._component = component
+        self._bodies = BRepBodies(component, bodies)
+        self.name = type(self).__name__
+        self.timelineObject = None
+        self.attributes = Attributes(self)
+
+    @property
+    def parentComponent(self):
+        return self._component
+
+    @property
+    def bodies(self):
+        return self._bodies
+
+    # Takes its timeline entry with it, and its bodies as if it had made them all
+    def deleteMe(self):
+        if self.timelineObject is not None and self.timelineObject in self.timelineObject._timeline._items:
+            self.timelineObject._timeline._items.remove(self.timelineObject)
+        for body in list(self._bodies):
+            body.deleteMe()
+        self._invalidate()
+        return True
+
+class _FeatureCollection(ApiCollection):
+
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def _addFeature(self, feature):
+        self._items.append(feature)
+        self._component._design._addTimelineObject(feature, type(feature).__name__)
+        return feature
+
+    def itemByName(self, name):
+        for feature in self._items:
+            if feature.name == name:
+                return feature
+        return None
+
+def _bodiesOf(entities):
+    if isinstance(entities, BRepBody):
+        return [entities]
+    return list(entities)
+
+class ExtrudeFeature(Feature):
+
+    @property
+    def startFaces(self):
+        return BRepFaces([body.faces.item(0) for body in self._bodies])
+
+    @property
+    def endFaces(self):
+        return BRepFaces([body.faces.item(1) for body in self._bodies])
+
+class ExtrudeFeatures(_FeatureCollection):
+
+    # Blind extrude along the sketch normal
+    def addSimple(self, profile, distance, operation):
+        height = distance._evaluate('cm')
+        transform = profile._sketch._transform
+        points = []
+        for _, loop in profile._loops:
+            for x, y in loop:
+                points.append(transform._apply(x, y, 0.0))
+                points.append(transform._apply(x, y, height))
+        body = BRepBody(_boxOf(points), profile._area * abs(height),
+                        profile._edgeCount + 2, profile._edgeCount * 3, self._component)
+        self._component.bRepBodies._items.append(body)
+        return self._addFeature(ExtrudeFeature(self._component, [body]))
+
+class ChamferEdgeSets(ApiObject):
+
+    def __init__(self):
+        self._sets = []
+
+    def addDistanceAndAngleChamferEdgeSet(self, edges, distance, angle, isFlipped, isTangentChain):
+        self._sets.append(list(edges))
+        return True
+
+    def addEqualDistanceChamferEdgeSet(self, edges, distance, isTangentChain):
+        self._sets.append(list(edges))
+        return True
+
+class ChamferFeatureInput(ApiObject):
+
+    def __init__(self):
+        self.chamferEdgeSets = ChamferEdgeSets()
+
+class ChamferFeature(Feature):
+    pass
+
+class ChamferFeatures(_FeatureCollection):
+
+    def createInput2(self):
+        return ChamferFeatureInput()
+
+    def add(self, input):
+        bodies = []
+        for edges in input.chamferEdgeSets._sets:
+            for edge in edges:
+                if edge.body not in bodies:
+                    bodies.append(edge.body)
+        return self._addFeature(ChamferFeature(self._component, bodies))
+
+def _intersectInto(target, tool):
+    box = [max(target._box[i], tool._box[i]) for i in range(3)] + [min(target._box[i], tool._box[i]) for i in range(3, 6)]
+    if any(box[i] >= box[i + 3] for i in range(3)):
+        target._box, target._volume, target._faceCount, target._edgeCount = [0.0] * 6, 0.0, 0, 0
+    else:
+        target._box = box
+        target._volume = min(target._volume, tool._volume)
+    target._faces = None
+
+class CombineFeatureInput(ApiObject):
+
+    def __init__(self, targetBody, toolBodies):
+        self.targetBody = targetBody
+        self.toolBodies = toolBodies
+        self.operation = FeatureOperations.JoinFeatureOperation
+        self.isKeepToolBodies = False
+        self.isNewComponent = False
+
+class CombineFeature(Feature):
+    pass
+
+class CombineFeatures(_FeatureCollection):
+
+    def createInput(self, targetBody, toolBodies):
+        return CombineFeatureInput(targetBody, toolBodies)
+
+    def add(self, input):
+        target = input.targetBody
+        for tool in _bodiesOf(input.toolBodies):
+            if input.operation == FeatureOperations.IntersectFeatureOperation:
+                _intersectInto(target, tool)
+            elif input.operation == FeatureOperations.JoinFeatureOperation:
+                target._box = _boxOf(_boxCorners(target._box) + _boxCorners(tool._box))
+                target._volume += tool._volume
+            if not input.isKeepToolBodies:
+                tool.deleteMe()
+        return self._addFeature(CombineFeature(target._component, [target]))
+
+class CopyPasteBody(Feature):
+    pass
+
+class CopyPasteBodies(_FeatureCollection):
+
+    def add(self, sourceBodies):
+        copies = []
+        for body in _bodiesOf(sourceBodies):
+            copy = body._clone(self._component)
+            self._component.bRepBodies._items.append(copy)
+            body._derived.append(copy)
+            copies.append(copy)
+        return self._addFeature(CopyPasteBody(self._component, copies))
+
+class CutPasteBody(Feature):
+    pass
+
+class CutPasteBodies(_FeatureCollection):
+
+    def add(self, sourceBodies):
+        moved = []
+        for body in _bodiesOf(sourceBodies):
+            copy = body._clone(self._component)
+            self._component.bRepBodies._items.append(copy)
+            body._derived.append(copy)
+            moved.append(copy)
+            body.deleteMe()
+        return self._addFeature(CutPasteBody(self._component, moved))
+
+class MoveFeatureInput(ApiObject):
+
+    def __init__(self, inputEntities, transform):
+        self.inputEntities = inputEntities
+        self.transform = transform.copy()
+
+class MoveFeature(Feature):
+    pass
+
+class MoveFeatures(_FeatureCollection):
+
+    def createInput(self, inputEntities, transform):
+        return MoveFeatureInput(inputEntities, transform)
+
+    def add(self, input):
+        bodies = _bodiesOf(input.inputEntities)
+        for body in bodies:
+            body._transform(input.transform)
+        return self._addFeature(MoveFeature(self._component, bodies))
+
+class BaseFeature(Feature):
+
+    def __init__(self, component):
+        super().__init__(component)
+        self._isEditing = False
+
+    def startEdit(self):
+        self._isEditing = True
+        return True
+
+    def finishEdit(self):
+        self._isEditing = False
+        return True
+
+    def updateBody(self, body, newBody):
+        if not self._isEditing:
+            return False
+        body._setGeometry(newBody)
+        stats.brepOps['commitBody'] += 1
+        return True
+
+class BaseFeatures(_FeatureCollection):
+
+    def add(self):
+        return self._addFeature(BaseFeature(self._component))
+
+class CustomFeatureDependency(ApiObject):
+
+    def __init__(self, dependencyId, entity):
+        self.id = dependencyId
+        self.entity = entity
+
+class CustomFeatureParameter(ApiObject):
+
+    def __init__(self, parameterId, name, value, units, isVisible):
+        self.id = parameterId
+        self.name = name
+        self.unit = units
+        self.isVisible = isVisible
+        self.value = value._evaluate(units if units == 'deg' else 'cm')
+
+    @property
+    def expression(self):
+        if self.unit == 'deg':
+            return f"{math.degrees(self.value):.12g} deg"
+        return f"{self.value:.12g} {self.unit}"
+
+    @expression.setter
+    def expression(self, expression):
+        self.value = core.evaluateExpression(expression, self.unit)
+
+class _ItemsByIdCollection(ApiCollection):
+
+    def itemById(self, itemId):
+        for item in self._items:
+            if item.id == itemId:
+                return item
+        return None
+
+class CustomFeatureInput(ApiObject):
+
+    def __init__(self, definition):
+        self._definition = definition
+        self._startFeature = None
+        self._endFeature = None
+        self._dependencies = []
+        self._parameters = []
+
+    def setStartAndEndFeatures(self, startFeature, endFeature):
+        self._startFeature = startFeature
+        self._endFeature = endFeature
+        return True
+
+    def addDependency(self, dependencyId, entity):
+        self._dependencies.append(CustomFeatureDependency(dependencyId, entity))
+        return True
+
+    def addCustomParameter(self, parameterId, name, value, units, isVisible):
+        self._parameters.append(CustomFeatureParameter(parameterId, name, value, units, isVisible))
+        return True
+
+class CustomFeature(Feature):
+
+    def __init__(self, component, input, features):
+        super().__init__(component)
+        self.definition = input._definition
+        self.dependencies = _ItemsByIdCollection(input._dependencies)
+        self.parameters = _ItemsByIdCollection(input._parameters)
+        self._features = features
+
+    @property
+    def features(self):
+        return ApiCollection(self._features)
+
+class CustomFeatures(_FeatureCollection):
+
+    def createInput(self, definition):
+        return CustomFeatureInput(definition)
+
+    # The features from start to end are grouped under the custom feature's timeline entry
+    def add(self, input):
+        timeline = self._component._design.timeline
+        start, end = input._startFeature.timelineObject.index, input._endFeature.timelineObject.index
+        grouped = timeline._items[start:end + 1]
+        del timeline._items[start:end + 1]
+        feature = CustomFeature(self._component, input, [t.entity for t in grouped])
+        self._items.append(feature)
+        stats.features['CustomFeature'] += 1
+        feature.timelineObject = TimelineObject(timeline, feature)
+        timeline._items.insert(start, feature.timelineObject)
+        return feature
+
+class CustomFeatureDefinition(ApiObject):
+
+    def __init__(self, definitionId, name, resourceFolder):
+        self.id = definitionId
+        self.name = name
+        self.editCommandId = ''
+        self.customFeatureCompute = core.Event()
+
+    @classmethod
+    def create(cls, definitionId, name, resourceFolder):
+        return cls(definitionId, name, resourceFolder)
+
+class CustomFeatureEventHandler(core.EventHandler):
+    pass
+
+class StatusMessage(ApiObject):
+
+    def __init__(self, messageType, messageId, message):
+        self.type = messageType
+        self.messageId = messageId
+        self.message = message
+
+class StatusMessageTypes:
+    ErrorStatusMessageType = 0
+    WarningStatusMessageType = 1
+    InformationStatusMessageType = 2
+
+class StatusMessages(ApiCollection):
+
+    def addError(self, messageId, message):
+        self._items.append(StatusMessage(StatusMessageTypes.ErrorStatusMessageType, messageId, message))
+        return True
+
+    def addWarning(self, messageId, message):
+        self._items.append(StatusMessage(StatusMessageTypes.WarningStatusMessageType, messageId, message))
+        return True
+
+class FeatureComputeStatus(ApiObject):
+
+    def __init__(self):
+        self.statusMessages = StatusMessages()
+
+class CustomFeatureEventArgs(core.EventArgs):
+
+    def __init__(self, customFeature):
+        self.customFeature = customFeature
+        self.computeStatus = FeatureComputeStatus()
+
+class Features(ApiObject):
+
+    def __init__(self, component):
+        self.extrudeFeatures = ExtrudeFeatures(component)
+        self.chamferFeatures = ChamferFeatures(component)
+        self.combineFeatures = CombineFeatures(component)
+        self.copyPasteBodies = CopyPasteBodies(component)
+        self.cutPasteBodies = CutPasteBodies(component)
+        self.moveFeatures = MoveFeatures(component)
+        self.baseFeatures = BaseFeatures(component)
+        self.customFeatures = CustomFeatures(component)
+
+# Joints
+
+class JointGeometry(ApiObject):
+
+    def __init__(self, entity, keyPointType):
+        self.entity = entity
+        self.keyPointType = keyPointType
+
+    @classmethod
+    def createByProfile(cls, profile, curve, keyPointType):
+        return cls(profile, keyPointType)
+
+    @classmethod
+    def createByPlanarFace(cls, face, edge, keyPointType):
+        if face is None:
+            raise RuntimeError("3 : invalid argument face")
+        return cls(face, keyPointType)
+
+class JointInput(ApiObject):
+
+    def __init__(self, geometryOrOriginOne, geometryOrOriginTwo):
+        self.geometryOrOriginOne = geometryOrOriginOne
+        self.geometryOrOriginTwo = geometryOrOriginTwo
+        self.isFlipped = False
+        self._motion = None
+
+    def setAsPlanarJointMotion(self, normalDirection, primarySlideDirectionGeometry=None):
+        self._motion = ('planar', normalDirection)
+        return True
+
+    def setAsRigidJointMotion(self):
+        self._motion = ('rigid',)
+        return True
+
+class Joint(_Entity):
+
+    _tokenKind = 'joint'
+
+    def __init__(self, input):
+        self.geometryOrOriginOne = input.geometryOrOriginOne
+        self.geometryOrOriginTwo = input.geometryOrOriginTwo
+        self.timelineObject = None
+
+class Joints(ApiCollection):
+
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, geometryOrOriginOne, geometryOrOriginTwo):
+        return JointInput(geometryOrOriginOne, geometryOrOriginTwo)
+
+    def add(self, input):
+        joint = Joint(input)
+        self._items.append(joint)
+        self._component._design._addTimelineObject(joint, 'Joint')
+        return joint
+
+class AsBuiltJointInput(ApiObject):
+
+    def __init__(self, occurrenceOne, occurrenceTwo, geometry):
+        self.occurrenceOne = occurrenceOne
+        self.occurrenceTwo = occurrenceTwo
+        self.geometry = geometry
+        self._motion = None
+
+    def setAsPlanarJointMotion(self, normalDirection, primarySlideDirectionGeometry=None):
+        self._motion = ('planar', normalDirection)
+        return True
+
+    def setAsRigidJointMotion(self):
+        self._motion = ('rigid',)
+        return True
+
+# Unlike a Joint, nothing moves: both occurrences stay where they are
+class AsBuiltJoint(_Entity):
+
+    _tokenKind = 'asBuiltJoint'
+
+    def __init__(self, input):
+        self.occurrenceOne = input.occurrenceOne
+        self.occurrenceTwo = input.occurrenceTwo
+        self.geometry = input.geometry
+        self.timelineObject = None
+
+class AsBuiltJoints(ApiCollection):
+
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, occurrenceOne, occurrenceTwo, geometry):
+        if occurrenceOne is None:
+            raise RuntimeError("3 : invalid argument occurrenceOne")
+        return AsBuiltJointInput(occurrenceOne, occurrenceTwo, geometry)
+
+    def add(self, input):
+        joint = AsBuiltJoint(input)
+        self._items.append(joint)
+        self._component._design._addTimelineObject(joint, 'AsBuiltJoint')
+        return joint
+
+# Components & occurrences
+
+class Occurrence(_Entity):
+
+    _tokenKind = 'occurrence'
+
+    def __init__(self, owner, component, transform):
+        self._owner = owner
+        self.component = component
+        self._transform = transform.copy()
+        self.isGroundToParent = False
+
+    @property
+    def name(self):
+        return f"{self.component.name}:1"
+
+    @property
+    def sourceComponent(self):
+        return self._owner
+
+    @property
+    def transform2(self):
+        return self._transform.copy()
+
+    @transform2.setter
+    def transform2(self, matrix):
+        self._transform = matrix.copy()
+        self._owner._design.snapshots._pending = True
+
+    transform = transform2
+
+    @property
+    def childOccurrences(self):
+        return OccurrenceList(self.component.occurrences._items)
+
+    @property
+    def bRepBodies(self):
+        return BRepBodies(self.component, self.component.bRepBodies._items)
+
+    # The fake has no proxies, an occurrence stands for itself in every context
+    def createForAssemblyContext(self, occurrence):
+        return self
+
+    def deleteMe(self):
+        self._owner.occurrences._items.remove(self)
+        self._invalidate()
+        return True
+
+class OccurrenceList(ApiCollection):
+
+    def itemByName(self, name):
+        for occurrence in self._items:
+            if occurrence.name == name:
+                return occurrence
+        return None
+
+class Occurrences(OccurrenceList):
+
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def _addOccurrence(self, component, transform):
+        occurrence = Occurrence(self._component, component, transform)
+        self._items.append(occurrence)
+        self._component._design._addTimelineObject(occurrence, 'Occurrence')
+        return occurrence
+
+    def addNewComponent(self, transform):
+        return self._addOccurrence(self._component._design._newComponent(), transform)
+
+    def addExistingComponent(self, component, transform):
+        return self._addOccurrence(component, transform)
+
+class Component(_Entity):
+
+    _tokenKind = 'component'
+
+    def __init__(self, design, name):
+        self._design = design
+        self.name = name
+        self.features = Features(self)
+        self.bRepBodies = BRepBodies(self)
+        self.occurrences = Occurrences(self)
+        self.sketches = Sketches(self)
+        self.joints = Joints(self)
+        self.asBuiltJoints = AsBuiltJoints(self)
+        self.customGraphicsGroups = CustomGraphicsGroups()
+        self.attributes = Attributes(self)
+        self.xYConstructionPlane = ConstructionPlane(self, (0.0, 0.0, 1.0))
+        self.xZConstructionPlane = ConstructionPlane(self, (0.0, 1.0, 0.0))
+        self.yZConstructionPlane = ConstructionPlane(self, (1.0, 0.0, 0.0))
+
+    @property
+    def parentDesign(self):
+        return self._design
+
+    def occurrencesByComponent(self, component):
+        return OccurrenceList([occurrence for occurrence in self.occurrences._items if occurrence.component is component])
+
+    def _componentForBodies(self):
+        return self
+
+class Components(ApiCollection):
+
+    def itemByName(self, name):
+        for component in self._items:
+            if component.name == name:
+                return component
+        return None
+
+class Snapshots(ApiCollection):
+
+    def __init__(self, design):
+        super().__init__()
+        self._design = design
+        self._pending = False
+
+    @property
+    def hasPendingSnapshot(self):
+        return self._pending
+
+    def add(self):
+        self._pending = False
+        snapshot = Snapshot()
+        self._items.append(snapshot)
+        self._design._addTimelineObject(snapshot, 'Snapshot')
+        return snapshot
+
+class Snapshot(ApiObject):
+    pass
+
+class UnitsManager(ApiObject):
+
+    defaultLengthUnits = 'cm'
+
+    def evaluateExpression(self, expression, units='cm'):
+        return core.evaluateExpression(expression, units)
+
+class Design(ApiObject):
+
+    def __init__(self):
+        self.designType = DesignTypes.ParametricDesignType
+        self.timeline = Timeline()
+        self.snapshots = Snapshots(self)
+        self.unitsManager = UnitsManager()
+        self.allComponents = Components()
+        self._componentCount = 0
+        self.rootComponent = self._newComponent('Root')
+        self.attributes = Attributes(self)
+        self.parentDocument = core.Document()
+
+    def _newComponent(self, name=None):
+        self._componentCount += 1
+        component = Component(self, name or f"Component{self._componentCount}")
+        self.allComponents._items.append(component)
+        return component
+
+    def _addTimelineObject(self, entity, kind):
+        stats.features[kind] += 1
+        timelineObject = TimelineObject(self.timeline, entity)
+        if hasattr(entity, 'timelineObject'):
+            entity.timelineObject = timelineObject
+        self.timeline._items.append(timelineObject)
+        self.timeline.markerPosition = len(self.timeline._items)
+        return timelineObject
+
+    def findEntityByToken(self, entityToken):
+        entity = _entities.get(entityToken)
+        return [entity] if entity is not None and entity.isValid else []
+
+# Custom graphics
+
+class CustomGraphicsCoordinates(ApiObject):
+
+    def __init__(self, coordinates):
+        self.coordinates = list(coordinates)
+
+    @classmethod
+    def create(cls, coordinates):
+        return cls(coordinates)
+
+    @property
+    def coordinateCount(self):
+        return len(self.coordinates) // 3
+
+class CustomGraphicsEntity(ApiObject):
+
+    def __init__(self, group):
+        self._group = group
+        self.transform = core.Matrix3D()
+        self.isVisible = True
+
+    def deleteMe(self):
+        self._group._items.remove(self)
+        self._deleted = True
+        return True
+
+class CustomGraphicsLines(CustomGraphicsEntity):
+    pass
+
+class CustomGraphicsMesh(CustomGraphicsEntity):
+    pass
+
+class CustomGraphicsGroup(ApiCollection):
+
+    def __init__(self, groups):
+        super().__init__()
+        self._groups = groups
+
+    def addLines(self, coordinates, indexList, isLineStrip, lineStripLengths=None):
+        return self._add(CustomGraphicsLines(self))
+
+    def addMesh(self, coordinates, coordinateIndexList, normalVectors, normalIndexList):
+        return self._add(CustomGraphicsMesh(self))
+
+    def _add(self, entity):
+        self._items.append(entity)
+        return entity
+
+    def deleteMe(self):
+        self._groups._items.remove(self)
+        self._deleted = True
+        return True
+
+class CustomGraphicsGroups(ApiCollection):
+
+    def add(self):
+        group = CustomGraphicsGroup(self)
+        self._items.append(group)
+        return group
+
+# TemporaryBRepManager & B-Rep definitions
+
+class BRepVertexDefinition(ApiObject):
+
+    def __init__(self, position):
+        self.position = position.copy()
+
+class BRepEdgeDefinition(ApiObject):
+
+    def __init__(self, startVertex, endVertex, curve):
+        self.startVertex = startVertex
+        self.endVertex = endVertex
+        self.curve = curve
+
+class BRepCoEdgeDefinition(ApiObject):
+
+    def __init__(self, edgeDefinition, isOpposedToEdge):
+        self.bRepEdgeDefinition = edgeDefinition
+        self.isOpposedToEdge = isOpposedToEdge
+
+class _DefinitionList(ApiCollection):
+
+    def __init__(self, factory):
+        super().__init__()
+        self._factory = factory
+
+    def add(self, *args):
+        item = self._factory(*args)
+        self._items.append(item)
+        return item
+
+class BRepLoopDefinition(ApiObject):
+
+    def __init__(self):
+        self.bRepCoEdgeDefinitions = _DefinitionList(BRepCoEdgeDefinition)
+
+class BRepFaceDefinition(ApiObject):
+
+    def __init__(self, surface, isParamReversed):
+        self.surface = surface
+        self.isParamReversed = isParamReversed
+        self.loopDefinitions = _DefinitionList(BRepLoopDefinition)
+
+class BRepShellDefinition(ApiObject):
+
+    def __init__(self):
+        self.faceDefinitions = _DefinitionList(BRepFaceDefinition)
+
+class BRepLumpDefinition(ApiObject):
+
+    def __init__(self):
+        self.shellDefinitions = _DefinitionList(BRepShellDefinition)
+
+class BRepBodyDefinition(ApiObject):
+
+    def __init__(self):
+        self.lumpDefinitions = _DefinitionList(BRepLumpDefinition)
+        self.outcomeInfo = []
+        self.doFullHealing = True
+
+    @classmethod
+    def create(cls):
+        return cls()
+
+    def createVertexDefinition(self, position):
+        return BRepVertexDefinition(position)
+
+    def createEdgeDefinitionByCurve(self, startVertex, endVertex, modelSpaceCurve):
+        return BRepEdgeDefinition(startVertex, endVertex, modelSpaceCurve)
+
+    # Returns None, with the reason in outcomeInfo, when the loops do not close or the
+    # shell is not consistently oriented with outward facing faces
+    def createBody(self):
+        stats.brepOps['createBody'] += 1
+        uses = {}
+        volume = 0.0
+        faceCount = 0
+        points = []
+        for lump in self.lumpDefinitions:
+            for shell in lump.shellDefinitions:
+                for face in shell.faceDefinitions:
+                    faceCount += 1
+                    for loop in face.loopDefinitions:
+                        chain = []
+                        for coEdge in loop.bRepCoEdgeDefinitions:
+                            edge = coEdge.bRepEdgeDefinition
+                            start, end = edge.startVertex, edge.endVertex
+                            if coEdge.isOpposedToEdge:
+                                start, end = end, start
+                            if chain and chain[-1][1] is not start:
+                                self.outcomeInfo.append("Loop is not connected")
+                                return None
+                            chain.append((start, end))
+                            uses.setdefault(id(edge), []).append(coEdge.isOpposedToEdge)
+                        if not chain or chain[-1][1] is not chain[0][0]:
+                            self.outcomeInfo.append("Loop is not closed")
+                            return None
+                        p0 = chain[0][0].position
+                        for a, b in chain[1:-1]:
+                            p1, p2 = a.position, b.position
+                            volume += (p0.x * (p1.y * p2.z - p1.z * p2.y) - p0.y * (p1.x * p2.z - p1.z * p2.x)
+                                       + p0.z * (p1.x * p2.y - p1.y * p2.x)) / 6
+                        points.extend(v.position.asArray() for v, _ in chain)
+
+        if any(sorted(u) != [False, True] for u in uses.values()):
+            self.outcomeInfo.append("Every edge must be used once in each direction")
+            return None
+        if volume <= 0:
+            self.outcomeInfo.append("Faces are not oriented outwards")
+            return None
+        return BRepBody(_boxOf(points), volume, faceCount, len(uses))
+
+class TemporaryBRepManager(ApiObject):
+
+    _instance = None
+
+    @classmethod
+    def get(cls):
+        if cls._instance is None:
+            cls._instance = TemporaryBRepManager()
+        return cls._instance
+
+    def copy(self, body):
+        stats.brepOps['copy'] += 1
+        return body._clone()
+
+    def transform(self, body, transform):
+        stats.brepOps['transform'] += 1
+        body._transform(transform)
+        return True
+
+    def booleanOperation(self, targetBody, toolBody, booleanType):
+        stats.brepOps['booleanOperation'] += 1
+        if booleanType == BooleanTypes.IntersectionBooleanType:
+            _intersectInto(targetBody, toolBody)
+        elif booleanType == BooleanTypes.UnionBooleanType:
+            targetBody._box = _boxOf(_boxCorners(targetBody._box) + _boxCorners(toolBody._box))
+            targetBody._volume += toolBody._volume
+        targetBody._faces = None
+        return True
+
+    def createWireFromCurves(self, curves, allowSelfIntersections=False):
+        stats.brepOps['createWireFromCurves'] += 1
+        points = []
+        for curve in curves:
+            points.extend(p.asArray() for p in curve._points())
+        return BRepBody(_boxOf(points), 0.0, 0, len(curves)), []
+
+    # Writes the fake body data, whatever the extension asks for
+    def exportToFile(self, bodies, filename):
+        stats.brepOps['exportToFile'] += 1
+        data = [{'box': b._box, 'volume': b._volume, 'faces': b._faceCount, 'edges': b._edgeCount}
+                for b in _bodiesOf(bodies)]
+        with open(filename, 'w') as f:
+            json.dump(data, f)
+        return True
+
+    def createFromFile(self, filename):
+        stats.brepOps['createFromFile'] += 1
+        with open(filename) as f:
+            data = json.load(f)
+        return BRepBodies(None, [BRepBody(d['box'], d['volume'], d['faces'], d['edges']) for d in data])
@@ -0,0 +1,57 @@
+# Headless benchmark: how much of the stock cellGen.nesting fills with realistic cell footprints.
+#
+# Cells of a synthetic pattern are track-aligned as the add-in does (rotated by minus their direction
+# line's angle) and nested into circular and square stock of half the pattern's area, so the stock fills
+# up. The nesting packs bounding rectangles; the report gives the stock the footprints cover next to the
+# stock their rectangles cover, and the rectangles' own fill of a part (footprint / rectangle area).
+#
+#   python benchmarks/nestingBench.py [--cells 200] [--patterns square hex quads voronoi] [--seed 1]
+
+import argparse, math, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import layout, nesting, patterns
+from cellGen.geometry import polygonArea
+
+# Stock area as a fraction of the pattern's area
+STOCK_FRACTION = 0.5
+
+def circle(area, sides=128):
+    radius = math.sqrt(area / math.pi)
+    return [(radius * math.cos(2 * math.pi * k / sides), radius * math.sin(2 * math.pi * k / sides)) for k in range(sides)]
+
+def square(area):
+    side = math.sqrt(area)
+    return [(0.0, 0.0), (side, 0.0), (side, side), (0.0, side)]
+
+def alignedFootprints(pattern):
+    angles = [-math.atan2(y1 - y0, x1 - x0) for (x0, y0), (x1, y1) in pattern.lines]
+    return [footprint for _, footprint in layout.alignFootprints(pattern.polygons, angles)]
+
+def run(patternKind, cellCount, seed, stockKind):
+    pattern = patterns.generate(patternKind, cellCount, 1.0, seed)
+    parts = alignedFootprints(pattern)
+    area = sum(abs(polygonArea(polygon)) for polygon in pattern.polygons) * STOCK_FRACTION
+    stock = circle(area) if stockKind == 'circle' else square(area)
+    start = time.perf_counter()
+    result = nesting.nest(parts, stock)
+    return result, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cells', type=int, default=200)
+    parser.add_argument('--patterns', nargs='+', default=['square', 'hex', 'quads', 'voronoi'], choices=list(patterns.PATTERNS))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    print(f"{args.cells} cells nested into stock of {STOCK_FRACTION:.0%} of the pattern's area")
+    print(f"{'pattern':>8} {'stock':>7} {'placed':>7} {'footprints':>11} {'rectangles':>11} {'part fill':>10} {'time (s)':>9}")
+    for patternKind in args.patterns:
+        for stockKind in ('square', 'circle'):
+            result, seconds = run(patternKind, args.cells, args.seed, stockKind)
+            partFill = result.partsArea / result.rectsArea if result.rectsArea else 0.0
+            print(f"{patternKind:>8} {stockKind:>7} {result.placed:>7} {result.utilization:>10.1%} "
+                  f"{result.rectUtilization:>10.1%} {partFill:>9.1%} {seconds:>9.3f}")
+
+if __name__ == '__main__':
+    main()
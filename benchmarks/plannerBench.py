@@ -0,0 +1,76 @@
+# Headless benchmark: planning a run's cells serially vs across cellGen.planner's process pool,
+# and what MIN_PARALLEL_PROFILES and CHUNK_SIZE are set from.
+#
+# Times a serial plan per profile, the cost of starting the pool (a plan of two one-profile chunks)
+# and parallel plans of a Voronoi pattern at several sizes and chunk sizes. Every parallel plan is
+# checked to equal the serial one. The break-even is the run size where the pool's start-up is paid
+# back by sharing the serial work between the workers.
+#
+#   python benchmarks/plannerBench.py [--cells 500 2000 8000] [--workers N] [--chunk-sizes 50 250 1000]
+
+import argparse, math, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import patterns, planner
+
+IDENTITY = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+def planInputs(cellCount, seed=1):
+    pattern = patterns.generate('voronoi', cellCount, 1.0, seed)
+    angles = [math.degrees(math.atan2(y1 - y0, x1 - x0)) for (x0, y0), (x1, y1) in pattern.lines]
+    return pattern.profiles(), pattern.midpoints(), angles, [IDENTITY] * len(pattern)
+
+def cellTuples(plan):
+    return [(cell.lineIndex, cell.profileIndex, cell.footprint, cell.trackAngle, cell.signature, cell.layers,
+             cell.expectedVolume, cell.error) for cell in plan.cells]
+
+# Plans the inputs with the given number of workers and chunk size, the parallel ones whatever their size.
+# Returns (seconds, plan)
+def timePlan(inputs, workers, chunkSize):
+    def onFallback(reason):
+        raise RuntimeError(f"parallel plan fell back to serial: {reason}")
+    previous = planner.MIN_PARALLEL_PROFILES, planner.CHUNK_SIZE
+    planner.MIN_PARALLEL_PROFILES, planner.CHUNK_SIZE = 0, chunkSize
+    try:
+        start = time.perf_counter()
+        plan = planner.planCells(*inputs, IDENTITY, 1.0, math.radians(30), workers=workers, onFallback=onFallback)
+        return time.perf_counter() - start, plan
+    finally:
+        planner.MIN_PARALLEL_PROFILES, planner.CHUNK_SIZE = previous
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cells', nargs='+', type=int, default=[500, 2000, 8000])
+    parser.add_argument('--workers', type=int, default=max(2, os.cpu_count() or 1))
+    parser.add_argument('--chunk-sizes', nargs='+', type=int, default=[50, 250, 1000])
+    args = parser.parse_args(argv)
+    print(f"{os.cpu_count()} cores, {args.workers} workers, MIN_PARALLEL_PROFILES {planner.MIN_PARALLEL_PROFILES}, "
+          f"CHUNK_SIZE {planner.CHUNK_SIZE}")
+
+    startup, _ = timePlan(planInputs(2), 2, 1)
+    print(f"pool start-up {startup:.3f} s")
+
+    print(f"{'cells':>8} {'serial (s)':>11} {'ms/cell':>8} {'parallel (s)':>13} {'speedup':>8} {'break-even':>11}")
+    for cellCount in args.cells:
+        inputs = planInputs(cellCount)
+        serialTime, serialPlan = timePlan(inputs, 1, planner.CHUNK_SIZE)
+        parallelTime, parallelPlan = timePlan(inputs, args.workers, planner.CHUNK_SIZE)
+        assert cellTuples(parallelPlan) == cellTuples(serialPlan), "parallel and serial plans differ"
+        perCell = serialTime / cellCount
+        # Profiles at which start-up equals the serial time the other workers take over
+        breakEven = startup / (perCell * (1 - 1 / args.workers))
+        print(f"{cellCount:>8} {serialTime:>11.3f} {perCell * 1e3:>8.3f} {parallelTime:>13.3f} "
+              f"{serialTime / parallelTime:>7.2f}x {breakEven:>11.0f}")
+
+    cellCount = max(args.cells)
+    inputs = planInputs(cellCount)
+    serialPlan = cellTuples(timePlan(inputs, 1, planner.CHUNK_SIZE)[1])
+    print(f"{'chunk':>8} {'tasks':>6} {'parallel (s)':>13}   ({cellCount} cells)")
+    for chunkSize in args.chunk_sizes:
+        parallelTime, parallelPlan = timePlan(inputs, args.workers, chunkSize)
+        assert cellTuples(parallelPlan) == serialPlan, "parallel and serial plans differ"
+        print(f"{chunkSize:>8} {math.ceil(cellCount / chunkSize):>6} {parallelTime:>13.3f}")
+
+if __name__ == '__main__':
+    main()
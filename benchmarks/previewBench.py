@@ -0,0 +1,97 @@
+# Headless benchmark: how long the create command's preview takes on large patterns, against its
+# TARGET_MS budget per update.
+#
+# Each run builds a fresh synthetic design on the fake adsk layer (see spawnBodyCopiesBench), creates the
+# command with every input selected and times the add-in's updatePreview four ways:
+#   first   - nothing cached: profiles read & classified, outlines, arrows and prisms built
+#   cached  - the same inputs again, as Fusion asks for a preview on every input change
+#   height  - a new cell height, only the prism mesh is rebuilt
+#   drag    - the slowest of the next DRAG_STEPS heights & chamfer angles, as when a value is dragged
+# The first update is also split into its pure-Python parts (classifyProfiles, PreviewCache.setCells,
+# PreviewCache.prismMesh), timed outside the add-in on the same inputs.
+#
+#   python benchmarks/previewBench.py [--cells 1000 5000 10000] [--patterns voronoi] [--repeat 3] [--output results.json]
+
+import argparse, json, math, os, platform, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import spawnBodyCopiesBench as bench
+
+# Preview budget per update, in milliseconds
+TARGET_MS = 100
+
+# Height & chamfer angle factors of the drag
+DRAG_STEPS = [(1.25, 1.0), (0.75, 1.0), (1.0, 1.2), (1.0, 0.8), (2.0, 1.0)]
+
+def timeMs(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1e3
+
+# The first update's parts, timed on fresh copies of its inputs
+def splitFirstUpdate(scenario):
+    addin = scenario.addin
+    fusionIO, geometry, preview = addin.fusionIO, addin.geometry, addin.preview
+    directionLines = fusionIO.readDirectionLines(scenario.directionSketch)
+    angles = directionLines.angles()
+    profiles = fusionIO.readProfiles(scenario.boundarySketch)
+    midpoints = directionLines.midpointsIn(fusionIO.sketchToWorldMatrix(scenario.boundarySketch))
+    owned = []
+    split = {'classify': timeMs(lambda: owned.extend(geometry.classifyProfiles(profiles, midpoints)))}
+    cache = preview.PreviewCache()
+    split['outlines'] = timeMs(lambda: cache.setCells('key', [(profileData, math.radians(angles[pointIndex] - 90)) for profileData, pointIndex in owned],
+                                                      [midpoints[pointIndex] for _, pointIndex in owned]))
+    height = addin._cellHeightInput.value
+    split['prisms'] = timeMs(lambda: cache.prismMesh(height, addin._cellChamferAngleInput.value))
+    return split
+
+def run(patternKind, cellCount, seed):
+    scenario = bench.Scenario(patternKind, cellCount, 'Direct', 'Batched', 'Transform', seed)
+    addin = scenario.addin
+    result = {'pattern': patternKind, 'cells': cellCount}
+    result['first'] = timeMs(addin.updatePreview)
+    result['cached'] = timeMs(addin.updatePreview)
+    inputs = scenario.command.commandInputs
+    heightInput, angleInput = inputs.itemById('cellHeightInput'), inputs.itemById('cellChamferAngleInput')
+    height, angle = heightInput.value, angleInput.value
+    heightInput.value = height * 1.5
+    result['height'] = timeMs(addin.updatePreview)
+    dragTimes = []
+    for heightFactor, angleFactor in DRAG_STEPS:
+        heightInput.value, angleInput.value = height * heightFactor, angle * angleFactor
+        dragTimes.append(timeMs(addin.updatePreview))
+    result['drag'] = max(dragTimes)
+    addin.clearPreview()
+    result.update(splitFirstUpdate(scenario))
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cells', nargs='+', type=int, default=[1000, 5000, 10000])
+    parser.add_argument('--patterns', nargs='+', default=['voronoi'], choices=['square', 'hex', 'quads', 'voronoi'])
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per size, the fastest is reported")
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    columns = ('first', 'cached', 'height', 'drag', 'classify', 'outlines', 'prisms')
+    print(f"Preview updates in ms, target {TARGET_MS} ms")
+    print(f"{'pattern':>8} {'cells':>7} " + ' '.join(f"{name:>9}" for name in columns) + "  within target")
+    results = []
+    for patternKind in args.patterns:
+        for cellCount in args.cells:
+            runs = [run(patternKind, cellCount, args.seed) for _ in range(max(args.repeat, 1))]
+            best = {name: min(r[name] for r in runs) for name in columns}
+            best.update(pattern=patternKind, cells=cellCount)
+            best['withinTarget'] = [name for name in ('first', 'cached', 'height', 'drag') if best[name] <= TARGET_MS]
+            results.append(best)
+            print(f"{patternKind:>8} {cellCount:>7} " + ' '.join(f"{best[name]:>9.1f}" for name in columns)
+                  + f"  {', '.join(best['withinTarget']) or 'none'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': platform.python_version(), 'targetMs': TARGET_MS, 'runs': results}, f, indent=1)
+
+if __name__ == '__main__':
+    main()
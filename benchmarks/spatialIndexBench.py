@@ -0,0 +1,75 @@
+# Headless benchmark: matching direction line midpoints to cell profiles,
+# old linear scans vs the uniform-grid index.
+#
+#   python benchmarks/spatialIndexBench.py [cellCount ...]
+
+import os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import geometry
+from cellGen.spatialIndex import UniformGrid
+
+# Profiles sampled for the linear baseline, the rest is extrapolated
+LINEAR_SAMPLE = 500
+
+def squarePattern(cellCount, seed=1):
+    rng = random.Random(seed)
+    side = int(cellCount ** 0.5 + 0.999)
+    profiles, midpoints = [], []
+    for n in range(cellCount):
+        x, y = (n % side) * 1.0, (n // side) * 1.0
+        segments = [('line', x, y, x + 1, y), ('line', x + 1, y, x + 1, y + 1),
+                    ('line', x + 1, y + 1, x, y + 1), ('line', x, y + 1, x, y)]
+        profiles.append(geometry.ProfileData(n, [(True, segments)]))
+        midpoints.append((x + rng.uniform(0.2, 0.8), y + rng.uniform(0.2, 0.8)))
+    rng.shuffle(midpoints)
+    return profiles, midpoints
+
+# The pre-index behaviour of spawnBodyCopies: a bounding-box scan over every midpoint,
+# then a containment scan over every midpoint again
+def classifyLinear(profiles, midpoints, tolerance=geometry.DEFAULT_TOLERANCE):
+    owned = []
+    for profile in profiles:
+        minX, minY, maxX, maxY = profile.bounds(tolerance)
+        hasPoint = any(minX <= x <= maxX and minY <= y <= maxY for x, y in midpoints)
+        if not hasPoint:
+            continue
+        for lineIndex, (x, y) in enumerate(midpoints):
+            if profile.containsPoint(x, y, tolerance):
+                owned.append((profile, lineIndex))
+                break
+    return owned
+
+def run(cellCount):
+    profiles, midpoints = squarePattern(cellCount)
+    for profile in profiles:
+        profile.polygons()
+
+    sample = profiles[:LINEAR_SAMPLE]
+    start = time.perf_counter()
+    linear = classifyLinear(sample, midpoints)
+    linearTime = (time.perf_counter() - start) * len(profiles) / len(sample)
+
+    start = time.perf_counter()
+    grid = UniformGrid.fromPoints(midpoints)
+    buildTime = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = geometry.classifyProfiles(profiles, midpoints, pointIndex=grid)
+    queryTime = time.perf_counter() - start
+
+    assert [l for _, l in linear] == [l for _, l in indexed[:len(sample)]], "index and scan disagree"
+    assert len(indexed) == cellCount
+    return linearTime, buildTime, queryTime
+
+def main(counts):
+    print(f"{'cells':>8} {'linear (s)':>12} {'grid build':>12} {'grid query':>12} {'speedup':>9}")
+    for count in counts:
+        linearTime, buildTime, queryTime = run(count)
+        extrapolated = '*' if count > LINEAR_SAMPLE else ' '
+        print(f"{count:>8} {linearTime:>11.4f}{extrapolated} {buildTime:>12.4f} {queryTime:>12.4f} "
+              f"{linearTime / (buildTime + queryTime):>8.1f}x")
+    print(f"* linear time extrapolated from the first {LINEAR_SAMPLE} profiles")
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [100, 1000, 10000])
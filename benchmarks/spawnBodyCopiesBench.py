@@ -0,0 +1,292 @@
+# Headless benchmark of the whole generate command on the fake adsk layer in benchmarks/fakeAdsk.
+#
+# Every run loads a fresh copy of the add-in, builds a synthetic design (a cellGen.patterns
+# pattern drawn into the boundary & direction sketches, spawn body, destination profile), creates the command through the add-in's
+# own CommandCreated handler, selects the inputs and then times the preview, spawnBodyCopies and the custom feature's
+# compute event after each edit (unchanged, new height, one direction line moved, one added cell). Edits the compute cannot
+# apply, as adding a cell or changing a Parametric feature's cells, are reported as the errors it put on the feature.
+# Wall time, API calls per calling function, timeline features and B-Rep operations are reported as JSON. With --profile the add-in's
+# own per-stage profile (cellGen.profiling) of the execute phase is added to each run.
+# The add-in's on-disk cell cache (cellGen.bodyCache) is off unless --cell-cache names its directory.
+# With --output-mode "Export Files" the cells are written to a temporary folder instead (cellGen.export),
+# the recomputes are skipped and the run reports the files & manifest.
+#
+#   python benchmarks/spawnBodyCopiesBench.py [--cells 10 100 1000 10000] [--patterns square hex quads voronoi]
+#                                             [--engines Parametric Direct]
+#                                             [--spawn-modes "Per Line" Batched] [--layout-modes Transform]
+#                                             [--direction-angles 0 60 120] [--no-reuse]
+#                                             [--output-mode Design "Export Files"] [--export-format STEP SMT STL]
+#                                             [--profile] [--cell-cache DIR] [--output results.json]
+
+import argparse, importlib.machinery, importlib.util, json, math, os, platform, sys, tempfile, time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, 'fakeAdsk'))
+
+import adsk, adsk.core, adsk.fusion
+
+# The add-in imports its own modules relatively, so it is loaded as a package rooted at the repo
+ADDIN_PACKAGE = 'abstractCellAddin'
+ADDIN_MODULE = ADDIN_PACKAGE + '.myAddonTest'
+
+# Wide enough that the default 1 cm height and 30 deg chamfer never collapse a whole cell,
+# short Voronoi edges between sharp corners still shrink to nothing on the way up
+CELL_SIZE = 5.0
+
+def loadAddin():
+    for name in [n for n in sys.modules if n == ADDIN_PACKAGE or n.startswith(ADDIN_PACKAGE + '.')]:
+        del sys.modules[name]
+    spec = importlib.machinery.ModuleSpec(ADDIN_PACKAGE, None, is_package=True)
+    spec.submodule_search_locations = [REPO_DIR]
+    sys.modules[ADDIN_PACKAGE] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(ADDIN_MODULE)
+
+# The pattern is drawn with fusionIO.writePattern, as it would be in Fusion. The fake sketch
+# cannot find profiles itself, so they are handed in from the pattern's polygons
+def buildDesign(addin, pattern, phases):
+    app = adsk.core.Application.get()
+    design = adsk.fusion.Design()
+    app.activeProduct = design
+    root = design.rootComponent
+
+    boundarySketch = root.sketches.add(root.xYConstructionPlane)
+    boundarySketch.name = 'Cell Boundaries'
+    directionSketch = root.sketches.add(root.xYConstructionPlane)
+    directionSketch.name = 'Cell Directions'
+    phases.append(measure('writePattern', lambda: addin.fusionIO.writePattern(boundarySketch, directionSketch, pattern)))
+    for polygon in pattern.polygons:
+        boundarySketch.profiles._add([(True, polygon)])
+
+    # Spawn body: a box well away from the pattern, taller than the cells
+    spawnBody = adsk.fusion.BRepBody([-30.0, -30.0, 0.0, -30.0 + CELL_SIZE * 1.5, -30.0 + CELL_SIZE * 1.5, 2.0],
+                                     (CELL_SIZE * 1.5) ** 2 * 2.0, 6, 12, root, 'Spawn Body')
+    root.bRepBodies._items.append(spawnBody)
+
+    # Destination stock to the right of the pattern, sized for the rotated parts with some slack
+    patternMaxX = max(x for polygon in pattern.polygons for x, _ in polygon)
+    side = math.sqrt(len(pattern) * 2.5) * CELL_SIZE
+    x0 = patternMaxX + 10.0
+    destSketch = root.sketches.add(root.xYConstructionPlane)
+    destSketch.name = 'Destination'
+    destProfile = destSketch.profiles._add([(True, [(x0, 0.0), (x0 + side, 0.0), (x0 + side, side), (x0, side)])])
+    return design, boundarySketch, directionSketch, spawnBody, destProfile
+
+# Moves the first direction line a little along itself, which changes its cell only
+def moveLine(directionSketch):
+    line = directionSketch.sketchCurves.sketchLines.item(0)
+    delta = line.startSketchPoint.geometry.vectorTo(line.endSketchPoint.geometry)
+    delta.scaleBy(0.1 / line.length)
+    line.startSketchPoint.move(delta)
+    line.endSketchPoint.move(delta)
+
+# One more cell above the pattern, for the incremental recompute
+def addCell(boundarySketch, directionSketch, pattern):
+    maxY = max(y for polygon in pattern.polygons for _, y in polygon)
+    polygon = [(0.0, maxY), (CELL_SIZE, maxY), (CELL_SIZE, maxY + CELL_SIZE), (0.0, maxY + CELL_SIZE)]
+    boundarySketch.profiles._add([(True, polygon)])
+    cy = maxY + CELL_SIZE / 2
+    line = directionSketch.sketchCurves.sketchLines.addByTwoPoints(adsk.core.Point3D.create(CELL_SIZE * 0.25, cy, 0),
+                                                                   adsk.core.Point3D.create(CELL_SIZE * 0.75, cy, 0))
+    line.isConstruction = True
+
+def selectListItem(dropDown, name):
+    for item in dropDown.listItems:
+        if item.name == name:
+            item.isSelected = True
+            return
+    raise ValueError(f"{dropDown.id} has no item '{name}'")
+
+def measure(phase, fn):
+    adsk.stats.reset()
+    start = time.perf_counter()
+    fn()
+    wallTime = time.perf_counter() - start
+    return {'phase': phase, 'wallTime': round(wallTime, 4), **adsk.stats.report()}
+
+# Fires the custom feature's compute event as Fusion does after an edit, the errors it reports on the feature go in the phase
+def measureRecompute(phase, customFeature):
+    eventArgs = adsk.fusion.CustomFeatureEventArgs(customFeature)
+    result = measure(phase, lambda: customFeature.definition.customFeatureCompute._fire(eventArgs))
+    result['rejected'] = [message.message for message in eventArgs.computeStatus.statusMessages]
+    return result
+
+# The add-in writes its log to the palette in batches of several lines
+def paletteLines(palette):
+    return [line for text in palette._lines for line in text.splitlines()]
+
+# The add-in reports where it wrote its profile on the palette
+def readProfileReport(palette):
+    prefix = 'Profile report written to '
+    for line in reversed(paletteLines(palette)):
+        if line.startswith(prefix):
+            with open(line[len(prefix):]) as f:
+                return json.load(f)
+    return None
+
+# The manifest an export run wrote, and the size of its files
+def readExportManifest(directory):
+    names = sorted(name for name in os.listdir(directory) if name.endswith('-manifest.json'))
+    if not names:
+        return None
+    with open(os.path.join(directory, names[-1])) as f:
+        manifest = json.load(f)
+    return {
+        'format': manifest['format'],
+        'complete': manifest['complete'],
+        'files': len(manifest['files']),
+        'bytes': sum(entry['bytes'] for entry in manifest['files']),
+        'cells': len(manifest['cells']),
+        'skipped': len(manifest['skipped']),
+    }
+
+# A fresh add-in and synthetic design with the generate command created and its inputs selected, ready to execute
+class Scenario:
+
+    def __init__(self, patternKind, cellCount, engine, spawnMode, layoutMode, seed, profile=False, directionAngles=None, reuse=True,
+                 outputMode='Design', exportFormat='STEP'):
+        adsk.core.Application._reset()
+        self.addin = loadAddin()
+        patterns = importlib.import_module(ADDIN_PACKAGE + '.cellGen.patterns')
+        self.pattern = patterns.generate(patternKind, cellCount, CELL_SIZE, seed, directionAngles)
+        self.phases = []
+        self.design, self.boundarySketch, self.directionSketch, self.spawnBody, self.destProfile = buildDesign(self.addin, self.pattern, self.phases)
+
+        self.ui = adsk.core.Application.get().userInterface
+        self.addin.run(None)
+        self.exportDir = None
+        if outputMode == self.addin.OUTPUT_MODE_EXPORT:
+            self.exportDir = tempfile.mkdtemp(prefix='cellGenExport')
+        self.engine, self.spawnMode, self.layoutMode, self.profile, self.reuse = engine, spawnMode, layoutMode, profile, reuse
+        self.outputMode, self.exportFormat = outputMode, exportFormat
+        self.command = self.createCommand()
+
+    # Creates the generate command through the add-in's own handler, with every input selected
+    def createCommand(self):
+        command = self.ui.commandDefinitions.itemById('adskCustomPocketCreate')._createCommand()
+        inputs = command.commandInputs
+        inputs.itemById('selectBoundarySketch').addSelection(self.boundarySketch)
+        inputs.itemById('selectDirectionSketch').addSelection(self.directionSketch)
+        inputs.itemById('selectSpawnBody').addSelection(self.spawnBody)
+        inputs.itemById('selectDestPlane').addSelection(self.destProfile)
+        selectListItem(inputs.itemById('buildEngineInput'), self.engine)
+        selectListItem(inputs.itemById('spawnModeInput'), self.spawnMode)
+        selectListItem(inputs.itemById('layoutModeInput'), self.layoutMode)
+        inputs.itemById('profileInput').value = self.profile
+        inputs.itemById('reuseCongruentInput').value = self.reuse
+        selectListItem(inputs.itemById('outputModeInput'), self.outputMode)
+        selectListItem(inputs.itemById('exportFormatInput'), self.exportFormat)
+        if self.exportDir:
+            inputs.itemById('exportFolderInput').value = self.exportDir
+        return command
+
+    def execute(self):
+        self.addin.spawnBodyCopies(adsk.core.CommandEventArgs(self.command))
+
+    def paletteLines(self):
+        return paletteLines(self.ui.palettes.itemById('TextCommands'))
+
+def runScenario(patternKind, cellCount, engine, spawnMode, layoutMode, seed, profile=False, directionAngles=None, reuse=True,
+                outputMode='Design', exportFormat='STEP'):
+    scenario = Scenario(patternKind, cellCount, engine, spawnMode, layoutMode, seed, profile, directionAngles, reuse, outputMode, exportFormat)
+    addin, pattern, design, phases = scenario.addin, scenario.pattern, scenario.design, scenario.phases
+    boundarySketch, directionSketch, exportDir = scenario.boundarySketch, scenario.directionSketch, scenario.exportDir
+    ui = scenario.ui
+
+    timelineBefore = design.timeline.count
+    phases.append(measure('preview', addin.updatePreview))
+    phases.append(measure('execute', scenario.execute))
+    timelineAfter = design.timeline.count
+    bodiesAfterExecute = sum(c.bRepBodies.count for c in design.allComponents)
+    palette = ui.palettes.itemById('TextCommands')
+    skippedCells = sum('skipped' in line for line in paletteLines(palette))
+    profileReport = readProfileReport(palette) if profile else None
+
+    customFeatures = design.rootComponent.features.customFeatures
+    customFeature = customFeatures.item(0) if customFeatures.count else None
+    if customFeature:
+        phases.append(measureRecompute('recomputeUnchanged', customFeature))
+        height = customFeature.parameters.itemById('cellHeight')
+        height.expression = f"{height.value * 1.5} cm"
+        phases.append(measureRecompute('recomputeHeight', customFeature))
+        moveLine(directionSketch)
+        phases.append(measureRecompute('recomputeMovedLine', customFeature))
+        addCell(boundarySketch, directionSketch, pattern)
+        phases.append(measureRecompute('recomputeAddedCell', customFeature))
+
+    errors = [line for line in paletteLines(palette) if 'Failed' in line or 'Traceback' in line]
+    return {
+        'pattern': patternKind,
+        'cells': cellCount,
+        'engine': engine,
+        'spawnMode': spawnMode if engine == addin.BUILD_ENGINE_PARAMETRIC else None,
+        'layoutMode': layoutMode,
+        'directionAngles': directionAngles,
+        'reuseCongruent': reuse,
+        'outputMode': outputMode,
+        'timelineItems': timelineAfter - timelineBefore,
+        'skippedCells': skippedCells,
+        'bodiesAfterExecute': bodiesAfterExecute,
+        'bodiesInDesign': sum(c.bRepBodies.count for c in design.allComponents),
+        'customFeatureGroups': customFeature.features.count if customFeature else 0,
+        'export': readExportManifest(exportDir) if exportDir else None,
+        'errors': errors,
+        'phases': phases,
+        'profile': profileReport,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cells', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--patterns', nargs='+', default=['square'], choices=['square', 'hex', 'quads', 'voronoi'])
+    parser.add_argument('--engines', nargs='+', default=['Parametric', 'Direct'])
+    parser.add_argument('--spawn-modes', nargs='+', default=['Per Line', 'Batched'])
+    parser.add_argument('--layout-modes', nargs='+', default=['Transform'])
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--direction-angles', type=float, nargs='+',
+                        help='pick every direction line angle (degrees) from these, so congruent cells repeat')
+    parser.add_argument('--output-mode', default='Design', choices=['Design', 'Export Files'])
+    parser.add_argument('--export-format', default='STEP', choices=['STEP', 'SMT', 'STL'])
+    parser.add_argument('--no-reuse', action='store_true', help='build every cell, even congruent ones')
+    parser.add_argument('--profile', action='store_true', help="include the add-in's per-stage profile of each execute")
+    parser.add_argument('--cell-cache', help='keep finished Direct cells in this cache directory, shared by every run')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+    if args.profile:
+        os.environ.setdefault('ABSTRACT_CELL_PROFILE_DIR', tempfile.mkdtemp(prefix='cellGenProfile'))
+    if args.cell_cache:
+        os.environ['ABSTRACT_CELL_CACHE_DIR'] = args.cell_cache
+    else:
+        os.environ['ABSTRACT_CELL_CACHE_MB'] = '0'
+
+    runs = []
+    for pattern in args.patterns:
+        for cellCount in args.cells:
+            for engine in args.engines:
+                # The spawn mode only matters to the parametric engine
+                for spawnMode in (args.spawn_modes if engine == 'Parametric' else args.spawn_modes[:1]):
+                    for layoutMode in args.layout_modes:
+                        run = runScenario(pattern, cellCount, engine, spawnMode, layoutMode, args.seed, args.profile,
+                                          args.direction_angles, not args.no_reuse, args.output_mode, args.export_format)
+                        runs.append(run)
+                        execute = next(p for p in run['phases'] if p['phase'] == 'execute')
+                        print(f"{pattern:>8} {cellCount:>6} {engine:>10} {run['spawnMode'] or '':>9} {layoutMode.split()[-1]:>9} "
+                              f"{execute['wallTime']:>9.3f} s {execute['apiCalls']:>9} calls "
+                              f"{execute['timelineFeatures']:>7} features{'  ERRORS' if run['errors'] else ''}",
+                              file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'runs': runs,
+    }
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
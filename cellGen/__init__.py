@@ -0,0 +1,3 @@
+# Pure-Python geometry used by the add-in.
+# Nothing in this package may import adsk, except the modules named fusion*.py,
+# so that the cell geometry can be run and measured outside of Fusion 360.
@@ -0,0 +1,174 @@
+# Persistent, size-bounded cache of finished cell bodies.
+#
+# Each entry is one file in the cache directory named after its key (a cell fingerprint), holding
+# the body as written by TemporaryBRepManager.exportToFile. Recency is the file's modification
+# time, refreshed on every hit, so the least recently used files are deleted first once the
+# directory grows past maxBytes, across sessions and documents. Files are written under a
+# temporary name and renamed into place, so another Fusion session never reads a partial entry.
+# Entries live in a folder per KEY_VERSION, so a change to what keys cover is never served old bodies.
+# Only the Direct build engine reads the cache, and only when the environment turns it on.
+# This module only handles files; fusionBuild turns them into bodies and back.
+
+import os, re, shutil, tempfile, uuid
+from collections import OrderedDict
+
+# Cache directory, a folder in the system temp directory when not set
+DIR_ENV = 'ABSTRACT_CELL_CACHE_DIR'
+# Size limit in MB, 0 turns the cache off
+SIZE_ENV = 'ABSTRACT_CELL_CACHE_MB'
+
+DEFAULT_SIZE_MB = 512
+
+# Bump whenever what a key covers changes, e.g. the cell fingerprint. Entries of other versions could
+# never be hit again, so opening the cache deletes them rather than leave them taking up its size
+KEY_VERSION = 2
+
+def directoryFromEnvironment():
+    return os.environ.get(DIR_ENV) or os.path.join(tempfile.gettempdir(), 'AbstractCellGen', 'cells')
+
+def sizeFromEnvironment(default=DEFAULT_SIZE_MB):
+    value = os.environ.get(SIZE_ENV, '').strip()
+    try:
+        return float(value) * 1e6 if value else default * 1e6
+    except ValueError:
+        return default * 1e6
+
+class DiskCache:
+
+    def __init__(self, directory, maxBytes, extension='.smt', version=KEY_VERSION):
+        self.directory = os.path.join(directory, f"v{version}")
+        self.maxBytes = maxBytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        # key -> size in bytes, least recently used first
+        self.entries = OrderedDict()
+        self.totalBytes = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Files of other key versions deleted on opening
+        self.dropped = self._dropOtherVersions(directory)
+        self._scan()
+
+    # Entries from before keys were versioned sit in the top folder itself
+    def _dropOtherVersions(self, directory):
+        dropped = 0
+        for entry in os.scandir(directory):
+            if entry.is_dir() and re.fullmatch(r'v\d+', entry.name) and entry.path != self.directory:
+                dropped += sum(len(files) for _, _, files in os.walk(entry.path))
+                shutil.rmtree(entry.path, ignore_errors=True)
+            elif entry.is_file() and entry.name.endswith(self.extension):
+                dropped += 1
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+        return dropped
+
+    def _scan(self):
+        found = []
+        for entry in os.scandir(self.directory):
+            # Staging files start with a dot, those left by a crashed session are not entries
+            if entry.is_file() and entry.name.endswith(self.extension) and not entry.name.startswith('.'):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-len(self.extension)], stat.st_size))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.totalBytes += size
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    # The entry's file, or None on a miss
+    def get(self, key):
+        path = self.path(key)
+        if key not in self.entries or not os.path.exists(path):
+            self._forget(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    # A fresh file name to write an entry to, to be passed to put once written
+    def stagingPath(self):
+        return os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp{self.extension}")
+
+    # Moves a written staging file into place as the entry for key
+    def put(self, key, stagingPath):
+        size = os.path.getsize(stagingPath)
+        if size > self.maxBytes:
+            os.remove(stagingPath)
+            return False
+        os.replace(stagingPath, self.path(key))
+        self._forget(key)
+        self.entries[key] = size
+        self.totalBytes += size
+        self.stores += 1
+        self._evict()
+        return True
+
+    # Drops an entry whose file turned out to be unreadable
+    def discard(self, key):
+        self._forget(key)
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def _forget(self, key):
+        size = self.entries.pop(key, None)
+        if size is not None:
+            self.totalBytes -= size
+
+    def _evict(self):
+        while self.totalBytes > self.maxBytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.totalBytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Statistics count from here, e.g. per run
+    def resetStats(self):
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / lookups if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.totalBytes,
+        }
+
+    def summary(self):
+        stats = self.stats()
+        return (f"Cell cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hitRate'] * 100:.0f}%), "
+                f"{stats['stores']} stored, {stats['evictions']} evicted, {stats['entries']} entries "
+                f"{stats['bytes'] / 1e6:.1f} of {self.maxBytes / 1e6:.0f} MB")
+
+# The cache the environment asks for. None unless ABSTRACT_CELL_CACHE_DIR or ABSTRACT_CELL_CACHE_MB is set,
+# or when the size is 0
+def fromEnvironment():
+    if not os.environ.get(DIR_ENV) and not os.environ.get(SIZE_ENV, '').strip():
+        return None
+    maxBytes = sizeFromEnvironment()
+    if maxBytes <= 0:
+        return None
+    return DiskCache(directoryFromEnvironment(), maxBytes)
@@ -0,0 +1,144 @@
+# Analytic 2D bounds of profile curves, computed from the curve definitions in sketch space.
+#   lines    - endpoints
+#   arcs     - endpoints plus every axis-extremal angle the sweep passes through
+#   splines  - control hull, refined by knot insertion until it is within tolerance of the curve
+
+import math
+
+from .geometry import DEFAULT_TOLERANCE, evaluateSpline, findKnotSpan
+
+# Upper limit on control points produced while refining a spline hull
+MAX_REFINED_POINTS = 4096
+
+def lineBounds(x0, y0, x1, y1):
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+def arcBounds(cx, cy, radius, startAngle, sweepAngle):
+    a0 = min(startAngle, startAngle + sweepAngle)
+    a1 = max(startAngle, startAngle + sweepAngle)
+    xs = [math.cos(a0), math.cos(a1)]
+    ys = [math.sin(a0), math.sin(a1)]
+
+    # Extremes sit at multiples of 90 degrees
+    k = math.ceil(a0 / (math.pi / 2))
+    while k * math.pi / 2 <= a1:
+        quadrant = k % 4
+        if quadrant == 0:
+            xs.append(1.0)
+        elif quadrant == 1:
+            ys.append(1.0)
+        elif quadrant == 2:
+            xs.append(-1.0)
+        else:
+            ys.append(-1.0)
+        k += 1
+    return (cx + radius * min(xs), cy + radius * min(ys),
+            cx + radius * max(xs), cy + radius * max(ys))
+
+# Boehm insertion of a knot u that is not already in the knot vector.
+# Works on homogeneous points [x*w, y*w, w].
+def insertKnot(degree, homogeneous, knots, u):
+    k = findKnotSpan(degree, knots, u)
+    out = []
+    for i in range(len(homogeneous) + 1):
+        if i <= k - degree:
+            out.append(homogeneous[i])
+        elif i <= k:
+            alpha = (u - knots[i]) / (knots[i + degree] - knots[i])
+            p, q = homogeneous[i], homogeneous[i - 1]
+            out.append([alpha * p[j] + (1 - alpha) * q[j] for j in range(3)])
+        else:
+            out.append(homogeneous[i - 1])
+    return out, knots[:k + 1] + [u] + knots[k + 1:]
+
+# Bounds of a (rational) B-spline, relying on the convex hull property of its control polygon.
+# The hull box always contains the curve; it is refined until it is no more than
+# tolerance outside the box of points known to be on the curve.
+def splineBounds(degree, controlPoints, knots, weights, tolerance=DEFAULT_TOLERANCE):
+    weights = weights or [1.0] * len(controlPoints)
+    homogeneous = [[p[0] * w, p[1] * w, w] for p, w in zip(controlPoints, weights)]
+    knots = list(knots)
+    t0, t1 = knots[degree], knots[len(knots) - degree - 1]
+
+    while True:
+        hull = [(h[0] / h[2], h[1] / h[2]) for h in homogeneous]
+        outer = _pointBounds(hull)
+
+        params = sorted(set(k for k in knots if t0 <= k <= t1))
+        onCurve = [evaluateSpline(degree, hull, knots, [h[2] for h in homogeneous], t) for t in params]
+        inner = _pointBounds(onCurve)
+
+        gap = max(inner[0] - outer[0], inner[1] - outer[1], outer[2] - inner[2], outer[3] - inner[3])
+        if gap <= tolerance or len(homogeneous) * 2 > MAX_REFINED_POINTS:
+            return outer
+
+        for a, b in zip(params, params[1:]):
+            homogeneous, knots = insertKnot(degree, homogeneous, knots, (a + b) / 2)
+
+def segmentBounds(segment, tolerance=DEFAULT_TOLERANCE):
+    kind = segment[0]
+    if kind == 'line':
+        return lineBounds(*segment[1:])
+    if kind == 'arc':
+        return arcBounds(*segment[1:])
+    if kind == 'circle':
+        _, cx, cy, radius = segment
+        return cx - radius, cy - radius, cx + radius, cy + radius
+    if kind == 'spline':
+        _, degree, controlPoints, knots, weights = segment
+        return splineBounds(degree, controlPoints, knots, weights, tolerance)
+    if kind == 'polyline':
+        return _pointBounds(segment[1])
+    raise ValueError(f"Unknown segment type '{kind}'")
+
+# Bounds of the outer loop(s) of a profile, in the profile's sketch space
+def profileBounds(profile, tolerance=DEFAULT_TOLERANCE):
+    boxes = [segmentBounds(s, tolerance) for isOuter, segments in profile.loops if isOuter for s in segments]
+    if not boxes:
+        boxes = [segmentBounds(s, tolerance) for _, segments in profile.loops for s in segments]
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+# Largest distance between corresponding sides of two (minX, minY, maxX, maxY) boxes
+def boundsDeviation(a, b):
+    return max(abs(i - j) for i, j in zip(a, b))
+
+# Bounds per profile, kept for the life of one command
+class BoundsCache:
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE):
+        self.tolerance = tolerance
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, profile):
+        box = self.cache.get(profile.key)
+        if box is None:
+            self.misses += 1
+            box = profileBounds(profile, self.tolerance)
+            self.cache[profile.key] = box
+        else:
+            self.hits += 1
+        return box
+
+    # The cached box of a profile, None when it has not been worked out yet
+    def lookup(self, profile):
+        box = self.cache.get(profile.key)
+        if box is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return box
+
+    # Keeps a box worked out elsewhere, e.g. by a planner worker
+    def store(self, profile, box):
+        self.cache[profile.key] = box
+
+    def clear(self):
+        self.cache.clear()
+
+def _pointBounds(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
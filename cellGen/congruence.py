@@ -0,0 +1,91 @@
+# Congruent cells: cells that are the same shape up to a rigid motion in the sketch plane.
+#
+# A cell is built from its profile and the spawn body placed at its direction line, so two cells
+# come out identical when their profiles match once each is expressed in its own line's frame
+# (origin at the line's midpoint, x along the line). The signature of a cell is its loops in that
+# frame: invariant to where the cell sits and how it is turned, and it already includes the
+# direction angle relative to the loop and where the line lies inside it.
+# Each class is built once; every other member is the representative moved by a known transform.
+
+import hashlib
+
+from . import layout
+from .geometry import DEFAULT_TOLERANCE, polygonArea
+
+# Frame coordinates are rounded to this many decimals (cm) before hashing
+SIGNATURE_DIGITS = 5
+
+class CellClass:
+
+    def __init__(self, signature, profileData, lineIndex):
+        self.signature = signature
+        self.representative = (profileData, lineIndex)
+
+        # [(profile, line index, transform)], the representative first with the identity.
+        # transform is the row-major 4x4 sketch-space matrix that moves the representative onto the member
+        self.members = [(profileData, lineIndex, layout.IDENTITY)]
+
+    def __len__(self):
+        return len(self.members)
+
+# Maps the cell's frame to sketch space: rotate by angle (radians), then move to the midpoint
+def cellFrame(midpoint, angle):
+    return layout.multiply(layout.translation(midpoint[0], midpoint[1], 0.0), layout.rotationZ(angle))
+
+def _round(value, digits):
+    return round(value, digits) + 0.0
+
+# One loop in canonical form: outer loops counter-clockwise, holes clockwise, rounded, starting at
+# the smallest vertex. The vertices of a simple loop are distinct, so that start is the rotation
+# of the loop that is lexicographically least and the result does not depend on where it began
+def canonicalLoop(polygon, isOuter, digits=SIGNATURE_DIGITS):
+    if (polygonArea(polygon) > 0) != isOuter:
+        polygon = polygon[::-1]
+    points = []
+    for x, y in polygon:
+        point = (_round(x, digits), _round(y, digits))
+        if not points or points[-1] != point:
+            points.append(point)
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    if not points:
+        return ()
+    start = points.index(min(points))
+    return tuple(points[start:] + points[:start])
+
+def cellSignature(profileData, midpoint, angle, digits=SIGNATURE_DIGITS, tolerance=DEFAULT_TOLERANCE):
+    toFrame = layout.invertRigid(cellFrame(midpoint, angle))
+    loops = [(isOuter, canonicalLoop(layout.transformPoints(toFrame, polygon), isOuter, digits))
+             for isOuter, polygon in profileData.polygons(tolerance)]
+    outer = [loop for isOuter, loop in loops if isOuter]
+    holes = sorted(loop for isOuter, loop in loops if not isOuter)
+    return hashlib.sha1(repr((outer, holes)).encode('utf-8')).hexdigest()
+
+# Groups the owned profiles [(profile, line index)] into congruence classes, in order of first appearance.
+# midpoints are the sketch-space midpoints of the direction lines, angles their directions in radians.
+# signatures may hold the cellSignature of each owned profile, computed beforehand (see planner)
+def classifyCells(ownedProfiles, midpoints, angles, digits=SIGNATURE_DIGITS, signatures=None):
+    classes = {}
+    frames = {}
+    for i, (profileData, lineIndex) in enumerate(ownedProfiles):
+        if signatures is None:
+            signature = cellSignature(profileData, midpoints[lineIndex], angles[lineIndex], digits)
+        else:
+            signature = signatures[i]
+        frames[lineIndex] = cellFrame(midpoints[lineIndex], angles[lineIndex])
+        cellClass = classes.get(signature)
+        if cellClass is None:
+            classes[signature] = CellClass(signature, profileData, lineIndex)
+            continue
+        representativeLine = cellClass.representative[1]
+        transform = layout.multiply(frames[lineIndex], layout.invertRigid(frames[representativeLine]))
+        cellClass.members.append((profileData, lineIndex, transform))
+    return list(classes.values())
+
+# One class per cell, for when congruent cells are not reused
+def singletonClasses(ownedProfiles):
+    return [CellClass(None, profileData, lineIndex) for profileData, lineIndex in ownedProfiles]
+
+# A sketch-space transform expressed in world space, for a sketch whose transform is sketchMatrix
+def worldTransform(sketchMatrix, transform):
+    return layout.multiply(sketchMatrix, layout.multiply(transform, layout.invertRigid(sketchMatrix)))
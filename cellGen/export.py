@@ -0,0 +1,110 @@
+# Writing CAM-ready cells straight to files, without adding anything to the design.
+#
+# Cells are written a batch at a time, one multi-body file per batch (or one file for the whole
+# run), next to a JSON manifest that lists every cell: the file and body it ended up in, its
+# direction line & profile, its angle and the transform that laid it out. STEP and SMT files are
+# written by TemporaryBRepManager.exportToFile, STL files by writeBinaryStl below from the cells'
+# triangle meshes. This module only handles files and plain data; the add-in feeds it bodies.
+
+import json, os, struct, tempfile, time
+
+FORMAT_STEP = 'STEP'
+FORMAT_SMT = 'SMT'
+FORMAT_STL = 'STL'
+
+EXTENSIONS = {FORMAT_STEP: '.step', FORMAT_SMT: '.smt', FORMAT_STL: '.stl'}
+
+# Export folder when none is given, a folder in the system temp directory when not set
+DIR_ENV = 'ABSTRACT_CELL_EXPORT_DIR'
+
+# Fusion works in cm, STL files are written in mm like Fusion's own STL export
+STL_SCALE = 10.0
+
+def defaultDirectory():
+    return os.environ.get(DIR_ENV) or os.path.join(tempfile.gettempdir(), 'AbstractCellGen', 'export')
+
+# Binary STL of several triangle meshes, given as [(flat xyz node coordinates, flat triangle node indices)].
+# Returns the number of triangles written per mesh
+def writeBinaryStl(path, meshes, scale=1.0, header=b'AbstractCellGen'):
+    counts = [len(indices) // 3 for _, indices in meshes]
+    with open(path, 'wb') as f:
+        f.write(header[:80].ljust(80, b' '))
+        f.write(struct.pack('<I', sum(counts)))
+        record = struct.Struct('<12fH')
+        for coords, indices in meshes:
+            for t in range(0, len(indices) - 2, 3):
+                a, b, c = indices[t] * 3, indices[t + 1] * 3, indices[t + 2] * 3
+                ax, ay, az = coords[a] * scale, coords[a + 1] * scale, coords[a + 2] * scale
+                bx, by, bz = coords[b] * scale, coords[b + 1] * scale, coords[b + 2] * scale
+                cx, cy, cz = coords[c] * scale, coords[c + 1] * scale, coords[c + 2] * scale
+                ux, uy, uz = bx - ax, by - ay, bz - az
+                vx, vy, vz = cx - ax, cy - ay, cz - az
+                nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+                length = (nx * nx + ny * ny + nz * nz) ** 0.5 or 1.0
+                f.write(record.pack(nx / length, ny / length, nz / length, ax, ay, az, bx, by, bz, cx, cy, cz, 0))
+    return counts
+
+class ExportManifest:
+
+    # settings are recorded as they are, e.g. cell height & chamfer angle
+    def __init__(self, directory, exportFormat, settings=None, stem=None):
+        if exportFormat not in EXTENSIONS:
+            raise ValueError(f"Unknown export format '{exportFormat}', expected one of {', '.join(EXTENSIONS)}")
+        self.directory = directory
+        self.exportFormat = exportFormat
+        self.settings = dict(settings or {})
+        self.stem = stem or f"cells-{time.strftime('%Y%m%d-%H%M%S')}"
+        self.createdAt = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.files = []
+        self.cells = []
+        self.skipped = []
+        self.complete = False
+        os.makedirs(directory, exist_ok=True)
+
+    # Path of the next batch file
+    def nextPath(self):
+        return os.path.join(self.directory, f"{self.stem}-{len(self.files) + 1:04d}{EXTENSIONS[self.exportFormat]}")
+
+    # Records a written batch. cells are dicts, one per body in file order.
+    # triangleCounts, for STL, gives the range of triangles each cell occupies in the file
+    def addFile(self, path, cells, triangleCounts=None):
+        name = os.path.basename(path)
+        firstTriangle = 0
+        for bodyIndex, cell in enumerate(cells):
+            entry = dict(cell, file=name, bodyIndex=bodyIndex)
+            if triangleCounts is not None:
+                entry['firstTriangle'] = firstTriangle
+                entry['triangleCount'] = triangleCounts[bodyIndex]
+                firstTriangle += triangleCounts[bodyIndex]
+            self.cells.append(entry)
+        self.files.append({'file': name, 'cells': len(cells), 'bytes': os.path.getsize(path)})
+
+    def addSkipped(self, lineIndex, reason):
+        self.skipped.append({'lineIndex': lineIndex, 'reason': reason})
+
+    def path(self):
+        return os.path.join(self.directory, f"{self.stem}-manifest.json")
+
+    def toDict(self):
+        return {
+            'createdAt': self.createdAt,
+            'format': self.exportFormat,
+            'units': 'mm' if self.exportFormat == FORMAT_STL else 'cm',
+            'complete': self.complete,
+            'settings': self.settings,
+            'files': self.files,
+            'cells': self.cells,
+            'skipped': self.skipped,
+        }
+
+    # Writes the manifest and returns its path
+    def write(self):
+        path = self.path()
+        with open(path, 'w') as f:
+            json.dump(self.toDict(), f, indent=1)
+        return path
+
+    def summary(self):
+        totalBytes = sum(entry['bytes'] for entry in self.files)
+        return (f"Exported {len(self.cells)} cells to {len(self.files)} {self.exportFormat} files in {self.directory}, "
+                f"{totalBytes / 1e6:.1f} MB, {len(self.skipped)} skipped{'' if self.complete else ', incomplete'}")
@@ -0,0 +1,104 @@
+# Input fingerprints for incremental recompute.
+# A cell is rebuilt only when the fingerprint of its profile, its direction line,
+# the spawn body or the cell parameters changes.
+
+import hashlib
+from collections import OrderedDict
+
+# Coordinates are rounded to this many decimals (cm) before hashing,
+# so round-trip noise from the API does not count as an edit
+DIGITS = 7
+
+def _digest(values):
+    return hashlib.sha1(repr(values).encode('utf-8')).hexdigest()
+
+def _round(value):
+    if isinstance(value, float):
+        return round(value, DIGITS) + 0.0
+    if isinstance(value, (list, tuple)):
+        return tuple(_round(v) for v in value)
+    return value
+
+def profileFingerprint(profile, sketchTransform=None):
+    return _digest((_round(profile.loops), _round(sketchTransform)))
+
+# start / end are the world coordinates of the line's endpoints
+def lineFingerprint(start, end):
+    return _digest((_round(start), _round(end)))
+
+def valuesFingerprint(*values):
+    return _digest(_round(values))
+
+def cellFingerprint(profileFp, lineFp, spawnBodyFp, height, chamferAngle):
+    return _digest((profileFp, lineFp, spawnBodyFp, _round(height), _round(chamferAngle)))
+
+# Splits the wanted cells against the ones that already exist.
+#   existing - {fingerprint: body}
+#   wanted   - [(fingerprint, item)]
+# Returns (kept, toBuild, stale): kept is [(item, body)], toBuild is [(fingerprint, item)],
+# stale is the bodies no wanted cell maps to anymore
+def planIncrementalUpdate(existing, wanted):
+    remaining = dict(existing)
+    kept, toBuild = [], []
+    for fp, item in wanted:
+        body = remaining.pop(fp, None)
+        if body is None:
+            toBuild.append((fp, item))
+        else:
+            kept.append((item, body))
+    return kept, toBuild, list(remaining.values())
+
+# Pairs the cells planIncrementalUpdate has to build with the stale entries they replace.
+# keys is [(key of an item, key of a stale entry)], tried in order: an edited cell usually keeps its
+# direction line, or else its profile, while its fingerprint changes.
+# Returns (matched, unmatched, unused): matched is [(fingerprint, item, entry)], unmatched the
+# [(fingerprint, item)] no entry stands for and unused the stale entries no cell replaces
+def matchEdits(toBuild, stale, keys):
+    matched = []
+    unmatched = list(toBuild)
+    unused = list(stale)
+    for itemKey, entryKey in keys:
+        byKey = {}
+        for entry in unused:
+            byKey.setdefault(entryKey(entry), []).append(entry)
+        remaining = []
+        for fp, item in unmatched:
+            entries = byKey.get(itemKey(item))
+            if entries:
+                entry = entries.pop(0)
+                unused.remove(entry)
+                matched.append((fp, item, entry))
+            else:
+                remaining.append((fp, item))
+        unmatched = remaining
+    return matched, unmatched, unused
+
+# Bounded in-memory cache, least recently used entries are dropped first
+class LruCache:
+
+    def __init__(self, maxEntries=4096):
+        self.maxEntries = maxEntries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
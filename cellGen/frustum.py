@@ -0,0 +1,228 @@
+# Chamfered cell prisms ("frustums") in sketch space.
+#
+# A cell is the profile extruded by the cell height with every top edge chamfered.
+# The chamfer is a distance-and-angle chamfer whose distance is the full cell height,
+# measured down the side faces, so each side face ends up tilted inwards by the chamfer
+# angle and the top face is the profile offset inwards by height * tan(angle).
+# With planar side faces the top loop is the miter offset of the bottom loop. Short edges
+# between sharp corners can shrink to nothing on the way up; their side face then ends in a
+# point and the prism is built as a stack of layers, one per such event.
+
+import math
+
+from .geometry import DEFAULT_TOLERANCE, polygonArea
+
+def chamferInset(height, chamferAngle):
+    return height * math.tan(chamferAngle)
+
+# Orients loops so the material is always on the left: outer loops CCW, holes CW
+def orientLoops(polygons):
+    oriented = []
+    for isOuter, poly in polygons:
+        ccw = polygonArea(poly) > 0
+        oriented.append((isOuter, list(poly) if ccw == isOuter else poly[::-1]))
+    return oriented
+
+def _dropDegenerate(poly, tolerance):
+    out = []
+    for p in poly:
+        if not out or math.hypot(p[0] - out[-1][0], p[1] - out[-1][1]) > tolerance:
+            out.append(p)
+    if len(out) > 1 and math.hypot(out[0][0] - out[-1][0], out[0][1] - out[-1][1]) <= tolerance:
+        out.pop()
+    return out
+
+# Per vertex of a material-left loop, how far its miter joint moves per unit of offset to the left.
+# Raises ValueError when the loop folds back on itself
+def _miters(poly):
+    n = len(poly)
+    normals = []
+    for i in range(n):
+        x0, y0 = poly[i]
+        x1, y1 = poly[(i + 1) % n]
+        length = math.hypot(x1 - x0, y1 - y0)
+        normals.append((-(y1 - y0) / length, (x1 - x0) / length))
+
+    miters = []
+    for i in range(n):
+        nx0, ny0 = normals[i - 1]
+        nx1, ny1 = normals[i]
+        denom = 1 + nx0 * nx1 + ny0 * ny1
+        if denom < 1e-9:
+            raise ValueError("Loop folds back on itself")
+        miters.append(((nx0 + nx1) / denom, (ny0 + ny1) / denom))
+    return miters
+
+def _moved(poly, miters, distance):
+    return [(x + distance * mx, y + distance * my) for (x, y), (mx, my) in zip(poly, miters)]
+
+# Offset at which the first edges of the loop shrink to nothing, and those edges.
+# (None, []) when no edge gets shorter
+def _firstCollapse(poly, miters):
+    n = len(poly)
+    distances = []
+    for i in range(n):
+        j = (i + 1) % n
+        ex, ey = poly[j][0] - poly[i][0], poly[j][1] - poly[i][1]
+        length = math.hypot(ex, ey)
+        rate = ((miters[j][0] - miters[i][0]) * ex + (miters[j][1] - miters[i][1]) * ey) / length
+        if rate < -1e-12:
+            distances.append((length / -rate, i))
+    if not distances:
+        return None, []
+    first = min(distances)[0]
+    return first, [i for distance, i in distances if distance <= first * (1 + 1e-9)]
+
+# How a material-left loop offsets to its left the way the chamfer does, straight-skeleton style:
+# when an edge shrinks to nothing it is dropped and the loop is offset further without it.
+# Returns [(start, collapse, loop at start, its miters, loop at start + collapse, next loop)], one step per
+# event. collapse is None on the last step when no edge gets shorter, next loop is None on a step at whose
+# end the whole loop collapses. Steps are worked out until distance, to the end of the loop when None,
+# so a schedule made once can be cut at any offset with scheduleLayers. A loop that folds back on itself
+# past its first step ends in a step without miters, which cannot be cut.
+# Raises ValueError when the loop folds back from the start
+def offsetSchedule(poly, distance=None, tolerance=DEFAULT_TOLERANCE):
+    steps = []
+    done = 0.0
+    clockwise = polygonArea(poly) < 0
+    while True:
+        try:
+            miters = _miters(poly)
+        except ValueError:
+            if not steps:
+                raise
+            steps.append((done, None, poly, None, None, None))
+            return steps
+        collapse, edges = _firstCollapse(poly, miters)
+        if collapse is None or (distance is not None and done + collapse >= distance - tolerance * 1e-3):
+            steps.append((done, collapse, poly, miters, None, poly))
+            return steps
+
+        end = _moved(poly, miters, collapse)
+        n = len(end)
+        collapsed = set(edges)
+        start = next((i for i in range(n) if i not in collapsed), None)
+        if start is None:
+            steps.append((done, collapse, poly, miters, end, None))
+            return steps
+        # Both ends of a collapsed edge become the same point, runs of collapsed edges included
+        for k in range(1, n + 1):
+            i = (start + k) % n
+            if (i - 1) % n in collapsed:
+                end[i] = end[(i - 1) % n]
+        nextPoly = [p for i, p in enumerate(end) if (i - 1) % n not in collapsed]
+        if len(nextPoly) < 3 or (polygonArea(nextPoly) < 0) != clockwise:
+            nextPoly = None
+        steps.append((done, collapse, poly, miters, end, nextPoly))
+        if nextPoly is None:
+            return steps
+        done += collapse
+        poly = nextPoly
+
+# Cuts an offsetSchedule at distance.
+# Returns [(start, end, loop at start, loop at end)], consecutive offset ranges over which the loop keeps
+# its vertices. Edges that shrink to nothing at an end are points there, the same point repeated.
+# Raises ValueError when the whole loop collapses before distance
+def scheduleLayers(steps, distance, tolerance=DEFAULT_TOLERANCE):
+    layers = []
+    for done, collapse, poly, miters, end, nextPoly in steps:
+        if miters is None:
+            raise ValueError("Loop folds back on itself")
+        if collapse is None or done + collapse >= distance - tolerance * 1e-3:
+            layers.append((done, distance, poly, _moved(poly, miters, distance - done)))
+            return layers
+        if nextPoly is None:
+            break
+        layers.append((done, done + collapse, poly, end))
+    raise ValueError(f"Chamfer inset of {distance} collapses the cell")
+
+# Offsets a material-left loop distance to its left the way the chamfer does, see offsetSchedule.
+# Returns the scheduleLayers, raises ValueError when the whole loop collapses before distance
+def offsetLayers(poly, distance, tolerance=DEFAULT_TOLERANCE):
+    return scheduleLayers(offsetSchedule(poly, distance, tolerance), distance, tolerance)
+
+# [(isOuter, offsetSchedule)] of every loop of a profile, oriented material-left. None for distance
+# schedules each loop to its end, for frustums of any height & angle
+def loopSchedules(profile, distance=None, tolerance=DEFAULT_TOLERANCE):
+    schedules = []
+    for isOuter, poly in orientLoops(profile.polygons(tolerance)):
+        poly = _dropDegenerate(poly, tolerance)
+        schedules.append((isOuter, offsetSchedule(poly, distance, tolerance)))
+    return schedules
+
+# Returns the chamfered prism of a profile as [(bottom z, top z, [(isOuter, bottomLoop, topLoop)])], stacked
+# from z 0 to height. Loops are oriented material-left and a loop's bottom & top have the same vertex count;
+# a new layer starts wherever an edge of any loop shrinks to nothing, so its side face ends in a point.
+# Raises ValueError when the chamfer collapses the whole cell
+def frustumLayers(profile, height, chamferAngle, tolerance=DEFAULT_TOLERANCE):
+    inset = chamferInset(height, chamferAngle)
+    return scheduleFrustum(loopSchedules(profile, inset, tolerance), height, chamferAngle, tolerance)
+
+# frustumLayers from the profile's loopSchedules, which must reach at least the chamfer inset
+def scheduleFrustum(schedules, height, chamferAngle, tolerance=DEFAULT_TOLERANCE):
+    inset = chamferInset(height, chamferAngle)
+    loopLayers = [(isOuter, scheduleLayers(steps, inset, tolerance)) for isOuter, steps in schedules]
+
+    # Layers end where any loop's do, ends closer than eps apart are one
+    eps = tolerance * 1e-3
+    cuts = [0.0]
+    for distance in sorted({end for _, layers in loopLayers for _, end, _, _ in layers}):
+        if distance > cuts[-1] + eps:
+            cuts.append(distance)
+    if len(cuts) == 1:
+        cuts.append(inset)
+    cuts[-1] = inset
+
+    stack = []
+    for bottom, top in zip(cuts, cuts[1:]):
+        loops = []
+        for isOuter, layers in loopLayers:
+            start, end, startLoop, endLoop = next((layer for layer in layers if layer[1] > bottom + eps), layers[-1])
+            if bottom - start <= eps and abs(end - top) <= eps:
+                loops.append((isOuter, startLoop, endLoop))
+                continue
+            miters = _miters(startLoop)
+            bottomLoop = startLoop if bottom - start <= eps else _moved(startLoop, miters, bottom - start)
+            topLoop = endLoop if abs(end - top) <= eps else _moved(startLoop, miters, top - start)
+            loops.append((isOuter, bottomLoop, topLoop))
+        if inset > 0:
+            stack.append((bottom / inset * height, top / inset * height, loops))
+        else:
+            stack.append((0.0, height, loops))
+    return stack
+
+# Cross sections are offsets of the bottom loops, so within a layer their area is quadratic in z and
+# Simpson's rule gives the exact volume. The middle loop of a layer is halfway between its bottom & top
+def frustumVolume(profile, height, chamferAngle, tolerance=DEFAULT_TOLERANCE):
+    volume = 0.0
+    for bottomZ, topZ, loops in frustumLayers(profile, height, chamferAngle, tolerance):
+        areas = [0.0, 0.0, 0.0]
+        for _, bottom, top in loops:
+            middle = [((bx + tx) / 2, (by + ty) / 2) for (bx, by), (tx, ty) in zip(bottom, top)]
+            for i, loop in enumerate((bottom, middle, top)):
+                areas[i] += polygonArea(loop)
+        volume += (topZ - bottomZ) / 6 * (areas[0] + 4 * areas[1] + areas[2])
+    return volume
+
+# Compares two builds of the same cells.
+# expected and actual map a direction line index to a body volume.
+def compareCellVolumes(expected, actual, relativeTolerance=0.01):
+    mismatched = []
+    worst = 0.0
+    for lineIndex, expectedVolume in expected.items():
+        actualVolume = actual.get(lineIndex)
+        if actualVolume is None:
+            mismatched.append(lineIndex)
+            continue
+        error = abs(actualVolume - expectedVolume) / max(abs(expectedVolume), 1e-12)
+        worst = max(worst, error)
+        if error > relativeTolerance:
+            mismatched.append(lineIndex)
+    extra = sorted(set(actual) - set(expected))
+    return {
+        'expectedCount': len(expected),
+        'actualCount': len(actual),
+        'maxRelativeError': worst,
+        'mismatched': sorted(mismatched + extra),
+        'ok': not mismatched and not extra,
+    }
@@ -0,0 +1,141 @@
+# Transient B-Rep construction of cells, for the direct build engine.
+# Nothing here touches the timeline; bodies are committed by the caller.
+
+import adsk.core, adsk.fusion, os
+
+from . import frustum
+
+def _point(p, z):
+    return adsk.core.Point3D.create(p[0], p[1], z)
+
+def _plane(origin :adsk.core.Point3D, normal :adsk.core.Vector3D):
+    normal.normalize()
+    return adsk.core.Plane.create(origin, normal)
+
+# Builds one closed, planar-faced layer of a frustum from its [(isOuter, bottomLoop, topLoop)], in sketch space.
+# Side faces are bottom edge -> next vertical -> top edge -> vertical, all faces outward facing. A side face
+# whose top edge has shrunk to a point (the same point twice in topLoop) is a triangle.
+def createLayerBody(loops, bottomZ, topZ) -> adsk.fusion.BRepBody:
+
+    bodyDef = adsk.fusion.BRepBodyDefinition.create()
+    shellDef = bodyDef.lumpDefinitions.add().shellDefinitions.add()
+    faceDefs = shellDef.faceDefinitions
+
+    bottomFaceDef = faceDefs.add(_plane(_point((0, 0), bottomZ), adsk.core.Vector3D.create(0, 0, -1)), False)
+    topFaceDef = faceDefs.add(_plane(_point((0, 0), topZ), adsk.core.Vector3D.create(0, 0, 1)), False)
+
+    for _, bottom, top in loops:
+        n = len(bottom)
+        bottomPnts = [_point(p, bottomZ) for p in bottom]
+        topPnts = [_point(p, topZ) for p in top]
+        bottomVerts = [bodyDef.createVertexDefinition(p) for p in bottomPnts]
+
+        # Top corners that are the same point share one vertex, the edge between them is left out
+        first = next(i for i in range(n) if top[i] != top[i - 1])
+        topVerts = [None] * n
+        for k in range(n):
+            i = (first + k) % n
+            topVerts[i] = topVerts[i - 1] if k and top[i] == top[i - 1] else bodyDef.createVertexDefinition(topPnts[i])
+
+        bottomEdges, topEdges, verticalEdges = [], [], []
+        for i in range(n):
+            j = (i + 1) % n
+            bottomEdges.append(bodyDef.createEdgeDefinitionByCurve(
+                bottomVerts[i], bottomVerts[j], adsk.core.Line3D.create(bottomPnts[i], bottomPnts[j])))
+            topEdges.append(None if topVerts[i] is topVerts[j] else bodyDef.createEdgeDefinitionByCurve(
+                topVerts[i], topVerts[j], adsk.core.Line3D.create(topPnts[i], topPnts[j])))
+            verticalEdges.append(bodyDef.createEdgeDefinitionByCurve(
+                bottomVerts[i], topVerts[i], adsk.core.Line3D.create(bottomPnts[i], topPnts[i])))
+
+        bottomLoop = bottomFaceDef.loopDefinitions.add()
+        for i in reversed(range(n)):
+            bottomLoop.bRepCoEdgeDefinitions.add(bottomEdges[i], True)
+
+        topLoop = topFaceDef.loopDefinitions.add()
+        for i in range(n):
+            if topEdges[i]:
+                topLoop.bRepCoEdgeDefinitions.add(topEdges[i], False)
+
+        for i in range(n):
+            j = (i + 1) % n
+            normal = bottomPnts[i].vectorTo(bottomPnts[j]).crossProduct(bottomPnts[i].vectorTo(topPnts[i]))
+            sideLoop = faceDefs.add(_plane(bottomPnts[i], normal), False).loopDefinitions.add()
+            sideLoop.bRepCoEdgeDefinitions.add(bottomEdges[i], False)
+            sideLoop.bRepCoEdgeDefinitions.add(verticalEdges[j], False)
+            if topEdges[i]:
+                sideLoop.bRepCoEdgeDefinitions.add(topEdges[i], True)
+            sideLoop.bRepCoEdgeDefinitions.add(verticalEdges[i], True)
+
+    return bodyDef.createBody()
+
+# Builds the frustum from frustum.frustumLayers() output, in sketch space: one body per layer, joined
+def createFrustumBody(layers) -> adsk.fusion.BRepBody:
+
+    tmpMgr = adsk.fusion.TemporaryBRepManager.get()
+    body = None
+    for bottomZ, topZ, loops in layers:
+        layerBody = createLayerBody(loops, bottomZ, topZ)
+        if body is None:
+            body = layerBody
+        else:
+            tmpMgr.booleanOperation(body, layerBody, adsk.fusion.BooleanTypes.UnionBooleanType)
+    return body
+
+# A cell body from a bodyCache.DiskCache, as a temporary body, or None on a miss.
+# Entries that cannot be read back are dropped from the cache
+def loadCachedBody(cache, key) -> adsk.fusion.BRepBody:
+
+    path = cache.get(key)
+    if path is None:
+        return None
+    tmpMgr = adsk.fusion.TemporaryBRepManager.get()
+    try:
+        bodies = tmpMgr.createFromFile(path)
+    except (RuntimeError, OSError, ValueError):
+        bodies = None
+    if not bodies or bodies.count == 0:
+        cache.discard(key)
+        return None
+    return bodies.item(0)
+
+# Writes a temporary body to a bodyCache.DiskCache. Returns True when it was stored
+def storeCachedBody(cache, key, body :adsk.fusion.BRepBody):
+
+    tmpMgr = adsk.fusion.TemporaryBRepManager.get()
+    path = cache.stagingPath()
+    try:
+        if tmpMgr.exportToFile([body], path):
+            return cache.put(key, path)
+    except (RuntimeError, OSError):
+        pass
+    if os.path.exists(path):
+        os.remove(path)
+    return False
+
+# Writes temporary bodies to one file, in the format its extension names (.step, .smt, ...)
+def exportBodies(bodies, path):
+
+    tmpMgr = adsk.fusion.TemporaryBRepManager.get()
+    if not tmpMgr.exportToFile(list(bodies), path):
+        raise RuntimeError(f"Could not export {len(bodies)} bodies to {path}")
+
+# Extrudes, chamfers and intersects one cell entirely in memory.
+# layers may be the frustum.frustumLayers() of the profile, computed beforehand (see planner).
+# Returns the finished temporary body, or None when the intersection is empty.
+def buildCellBody(profileData, sketchTransform :adsk.core.Matrix3D, spawnBody :adsk.fusion.BRepBody,
+                  placementMatrix :adsk.core.Matrix3D, height, chamferAngle, layers=None) -> adsk.fusion.BRepBody:
+
+    tmpMgr = adsk.fusion.TemporaryBRepManager.get()
+
+    if layers is None:
+        layers = frustum.frustumLayers(profileData, height, chamferAngle)
+    cellBody = createFrustumBody(layers)
+    tmpMgr.transform(cellBody, sketchTransform)
+
+    spawnCopy = tmpMgr.copy(spawnBody)
+    tmpMgr.transform(spawnCopy, placementMatrix)
+    tmpMgr.booleanOperation(cellBody, spawnCopy, adsk.fusion.BooleanTypes.IntersectionBooleanType)
+
+    if cellBody.faces.count == 0:
+        return None
+    return cellBody
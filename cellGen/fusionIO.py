@@ -0,0 +1,140 @@
+# Reads Fusion sketch entities into the plain data used by cellGen.geometry.
+# This is the only place the profile curves are touched, each one exactly once.
+
+import adsk.core, adsk.fusion, math
+
+from .geometry import ProfileData
+from .sketchSnapshot import LineSnapshot
+
+def curveToSegment(curve :adsk.core.Curve3D):
+
+    curveType = curve.curveType
+    if curveType == adsk.core.Curve3DTypes.Line3DCurveType:
+        start = curve.startPoint
+        end = curve.endPoint
+        return ('line', start.x, start.y, end.x, end.y)
+
+    if curveType == adsk.core.Curve3DTypes.Arc3DCurveType:
+        _, center, normal, refVector, radius, startAngle, endAngle = curve.getData()
+        baseAngle = math.atan2(refVector.y, refVector.x)
+        sweep = endAngle - startAngle
+        if normal.z < 0:
+            return ('arc', center.x, center.y, radius, baseAngle - startAngle, -sweep)
+        return ('arc', center.x, center.y, radius, baseAngle + startAngle, sweep)
+
+    if curveType == adsk.core.Curve3DTypes.Circle3DCurveType:
+        center = curve.center
+        return ('circle', center.x, center.y, curve.radius)
+
+    # Splines, ellipses and anything else go through their NURBS form
+    nurbs = curve if curveType == adsk.core.Curve3DTypes.NurbsCurve3DCurveType else curve.asNurbsCurve
+    _, controlPoints, degree, knots, isRational, weights, _ = nurbs.getData()
+    return ('spline', degree,
+            [(p.x, p.y) for p in controlPoints],
+            list(knots),
+            list(weights) if isRational else None)
+
+# Profile geometry is returned in the space of its parent sketch
+def readProfile(profile :adsk.fusion.Profile, index) -> ProfileData:
+
+    loops = []
+    for loop in profile.profileLoops:
+        segments = [curveToSegment(pc.geometry) for pc in loop.profileCurves]
+        loops.append((loop.isOuter, segments))
+    return ProfileData(index, loops, profile, profile.entityToken)
+
+def readProfiles(sketch :adsk.fusion.Sketch):
+
+    return [readProfile(profile, index) for index, profile in enumerate(sketch.profiles)]
+
+# Converts world-space points into (x, y) in the space of the given sketch
+def pointsToSketchSpace(sketch :adsk.fusion.Sketch, points):
+
+    out = []
+    for point in points:
+        sketchPoint = sketch.modelToSketchSpace(point)
+        out.append((sketchPoint.x, sketchPoint.y))
+    return out
+
+def matrixData(matrix :adsk.core.Matrix3D):
+
+    return tuple(matrix.asArray())
+
+def toMatrix3D(data) -> adsk.core.Matrix3D:
+
+    matrix = adsk.core.Matrix3D.create()
+    matrix.setWithArray(data)
+    return matrix
+
+# Sketch space to world space, through the occurrence the sketch was selected in, if any
+def sketchToWorldMatrix(sketch :adsk.fusion.Sketch):
+
+    matrix = sketch.transform
+    occurrence = sketch.assemblyContext
+    if occurrence:
+        matrix.transformBy(occurrence.transform2)
+    return matrixData(matrix)
+
+# Reads the endpoints of every construction line in one pass over the sketch's lines.
+# Three reads per endpoint pair: the line's geometry, then each point's coordinates as an array
+def readDirectionLines(sketch :adsk.fusion.Sketch) -> LineSnapshot:
+
+    lines = sketch.sketchCurves.sketchLines
+    snapshot = LineSnapshot(sketchToWorldMatrix(sketch), lines.count)
+    for index, line in enumerate(lines):
+        if line.isConstruction:
+            lineGeometry = line.geometry
+            snapshot.append(index, lineGeometry.startPoint.asArray(), lineGeometry.endPoint.asArray())
+    return snapshot
+
+# Triangle mesh of a body as (flat xyz node coordinates, flat triangle node indices), within surfaceTolerance (cm)
+def bodyMesh(body :adsk.fusion.BRepBody, surfaceTolerance=0.01):
+
+    calculator = body.meshManager.createMeshCalculator()
+    calculator.surfaceTolerance = surfaceTolerance
+    mesh = calculator.calculate()
+    return list(mesh.nodeCoordinatesAsDouble), list(mesh.nodeIndices)
+
+# Cheap stand-in for a body's full geometry: extents, mass properties and topology counts
+def bodyFingerprintData(body :adsk.fusion.BRepBody):
+
+    box = body.boundingBox
+    return (box.minPoint.asArray(), box.maxPoint.asArray(),
+            body.volume, body.area, body.faces.count, body.edges.count)
+
+# The body's actual geometry on top of bodyFingerprintData: its triangle mesh, as the sorted triangles of
+# rounded corner points, so neither node numbering nor face order counts. Bodies that only share extents
+# and mass properties, e.g. mirrored ones, differ here
+def bodyGeometryData(body :adsk.fusion.BRepBody, digits=6):
+
+    coords, indices = bodyMesh(body)
+    points = [(round(coords[i], digits) + 0.0, round(coords[i + 1], digits) + 0.0, round(coords[i + 2], digits) + 0.0)
+              for i in range(0, len(coords) - 2, 3)]
+    triangles = sorted(tuple(sorted((points[indices[t]], points[indices[t + 1]], points[indices[t + 2]])))
+                       for t in range(0, len(indices) - 2, 3))
+    return bodyFingerprintData(body) + (tuple(triangles),)
+
+# Draws a cellGen.patterns.Pattern in one batched pass: every cell edge once into boundarySketch,
+# reusing the sketch point at each shared vertex, and one construction line per cell into
+# directionSketch. Profiles are only recomputed once, when compute is turned back on
+def writePattern(boundarySketch :adsk.fusion.Sketch, directionSketch :adsk.fusion.Sketch, pattern):
+
+    sketches = [boundarySketch] if directionSketch == boundarySketch else [boundarySketch, directionSketch]
+    for sketch in sketches:
+        sketch.isComputeDeferred = True
+    try:
+        lines = boundarySketch.sketchCurves.sketchLines
+        sketchPoints = {}
+        for p0, p1 in pattern.boundarySegments():
+            line = lines.addByTwoPoints(sketchPoints.get(p0) or adsk.core.Point3D.create(p0[0], p0[1], 0),
+                                        sketchPoints.get(p1) or adsk.core.Point3D.create(p1[0], p1[1], 0))
+            sketchPoints.setdefault(p0, line.startSketchPoint)
+            sketchPoints.setdefault(p1, line.endSketchPoint)
+
+        lines = directionSketch.sketchCurves.sketchLines
+        for (x0, y0), (x1, y1) in pattern.lines:
+            line = lines.addByTwoPoints(adsk.core.Point3D.create(x0, y0, 0), adsk.core.Point3D.create(x1, y1, 0))
+            line.isConstruction = True
+    finally:
+        for sketch in sketches:
+            sketch.isComputeDeferred = False
@@ -0,0 +1,304 @@
+# 2D sketch-space geometry for cell profiles.
+#
+# Profiles are described with plain data so this module runs without Fusion:
+#   ProfileData.loops is a list of (isOuter, segments)
+#   a segment is one of
+#     ('line', x0, y0, x1, y1)
+#     ('arc', cx, cy, radius, startAngle, sweepAngle)      angles in radians, sweep is signed
+#     ('circle', cx, cy, radius)
+#     ('spline', degree, controlPoints, knots, weights)   weights is None for non-rational
+#     ('polyline', points)
+
+import math
+
+from .spatialIndex import UniformGrid
+
+DEFAULT_TOLERANCE = 0.001
+
+# ProfileData.locatePoint results
+INSIDE, ON_EDGE, OUTSIDE = 1, 0, -1
+
+class ProfileData:
+
+    # source is the Fusion Profile the data was read from, None when headless
+    # key identifies the profile across reads (its entityToken in Fusion)
+    def __init__(self, index, loops, source=None, key=None):
+        self.index = index
+        self.loops = loops
+        self.source = source
+        self.key = index if key is None else key
+        self._polygons = {}
+
+    # Returns [(isOuter, polygon)], tessellated once per tolerance
+    def polygons(self, tolerance=DEFAULT_TOLERANCE):
+        polys = self._polygons.get(tolerance)
+        if polys is None:
+            polys = [(isOuter, loopPolygon(segments, tolerance)) for isOuter, segments in self.loops]
+            self._polygons[tolerance] = polys
+        return polys
+
+    def outerPolygon(self, tolerance=DEFAULT_TOLERANCE):
+        for isOuter, poly in self.polygons(tolerance):
+            if isOuter:
+                return poly
+        return self.polygons(tolerance)[0][1]
+
+    def bounds(self, tolerance=DEFAULT_TOLERANCE):
+        return polygonBounds(self.outerPolygon(tolerance))
+
+    # True if the point is inside or on the profile, holes excluded
+    def containsPoint(self, x, y, tolerance=DEFAULT_TOLERANCE):
+        return self.locatePoint(x, y, tolerance) != OUTSIDE
+
+    # INSIDE, ON_EDGE (within tolerance of one of its loops) or OUTSIDE the profile, holes excluded
+    def locatePoint(self, x, y, tolerance=DEFAULT_TOLERANCE):
+        for isOuter, poly in self.polygons(tolerance):
+            if pointOnPolygon(x, y, poly, tolerance):
+                return ON_EDGE
+            if pointInPolygon(x, y, poly) != isOuter:
+                return OUTSIDE
+        return INSIDE
+
+# Tessellation
+
+def arcStepCount(radius, sweep, tolerance):
+    if radius <= tolerance:
+        return 1
+    maxStep = 2 * math.acos(max(-1.0, 1 - tolerance / radius))
+    if maxStep <= 0:
+        return 64
+    return max(2, int(math.ceil(abs(sweep) / maxStep)))
+
+def tessellateArc(cx, cy, radius, startAngle, sweepAngle, tolerance):
+    count = arcStepCount(radius, sweepAngle, tolerance)
+    return [(cx + radius * math.cos(startAngle + sweepAngle * i / count),
+             cy + radius * math.sin(startAngle + sweepAngle * i / count)) for i in range(count + 1)]
+
+def findKnotSpan(degree, knots, t):
+    n = len(knots) - degree - 2
+    if t >= knots[n + 1]:
+        return n
+    if t <= knots[degree]:
+        return degree
+    low, high = degree, n + 1
+    mid = (low + high) // 2
+    while t < knots[mid] or t >= knots[mid + 1]:
+        if t < knots[mid]:
+            high = mid
+        else:
+            low = mid
+        mid = (low + high) // 2
+    return mid
+
+# de Boor evaluation of a (possibly rational) 2D B-spline
+def evaluateSpline(degree, controlPoints, knots, weights, t):
+    span = findKnotSpan(degree, knots, t)
+    pts = []
+    for j in range(degree + 1):
+        x, y = controlPoints[span - degree + j][:2]
+        w = weights[span - degree + j] if weights else 1.0
+        pts.append([x * w, y * w, w])
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            i = span - degree + j
+            denom = knots[i + degree - r + 1] - knots[i]
+            alpha = 0.0 if denom == 0 else (t - knots[i]) / denom
+            pts[j] = [(1 - alpha) * pts[j - 1][k] + alpha * pts[j][k] for k in range(3)]
+    x, y, w = pts[degree]
+    return (x / w, y / w)
+
+def tessellateSpline(degree, controlPoints, knots, weights, tolerance):
+    t0 = knots[degree]
+    t1 = knots[len(knots) - degree - 1]
+
+    # Start from one sample per distinct knot span and refine where the chord deviates
+    breaks = sorted(set(k for k in knots if t0 <= k <= t1))
+    params = []
+    for a, b in zip(breaks, breaks[1:]):
+        for i in range(degree + 1):
+            params.append(a + (b - a) * i / (degree + 1))
+    params.append(t1)
+
+    pts = [(t, evaluateSpline(degree, controlPoints, knots, weights, t)) for t in params]
+    out = [pts[0][1]]
+    stack = [(ta, pa, tb, pb, 0) for (ta, pa), (tb, pb) in reversed(list(zip(pts, pts[1:])))]
+    while stack:
+        ta, pa, tb, pb, level = stack.pop()
+        tm = (ta + tb) / 2
+        pm = evaluateSpline(degree, controlPoints, knots, weights, tm)
+        if level < 12 and distanceToSegment(pm[0], pm[1], pa[0], pa[1], pb[0], pb[1]) > tolerance:
+            stack.append((tm, pm, tb, pb, level + 1))
+            stack.append((ta, pa, tm, pm, level + 1))
+        else:
+            out.append(pb)
+    return out
+
+def tessellateSegment(segment, tolerance=DEFAULT_TOLERANCE):
+    kind = segment[0]
+    if kind == 'line':
+        _, x0, y0, x1, y1 = segment
+        return [(x0, y0), (x1, y1)]
+    if kind == 'arc':
+        _, cx, cy, radius, startAngle, sweepAngle = segment
+        return tessellateArc(cx, cy, radius, startAngle, sweepAngle, tolerance)
+    if kind == 'circle':
+        _, cx, cy, radius = segment
+        return tessellateArc(cx, cy, radius, 0.0, 2 * math.pi, tolerance)
+    if kind == 'spline':
+        _, degree, controlPoints, knots, weights = segment
+        return tessellateSpline(degree, controlPoints, knots, weights, tolerance)
+    if kind == 'polyline':
+        return [tuple(p[:2]) for p in segment[1]]
+    raise ValueError(f"Unknown segment type '{kind}'")
+
+# Chains the tessellated segments of one loop end-to-end into a polygon.
+# Profile curves are not guaranteed to be ordered or consistently oriented.
+def loopPolygon(segments, tolerance=DEFAULT_TOLERANCE):
+    pieces = [tessellateSegment(s, tolerance) for s in segments]
+    if len(pieces) == 1:
+        poly = pieces[0]
+        if len(poly) > 1 and _near(poly[0], poly[-1], tolerance):
+            poly = poly[:-1]
+        return poly
+
+    joinTol = max(tolerance, 1e-7) * 10
+    poly = list(pieces.pop(0))
+    while pieces:
+        end = poly[-1]
+        best, bestDist, reverse = 0, None, False
+        for i, piece in enumerate(pieces):
+            dStart = _dist2(end, piece[0])
+            dEnd = _dist2(end, piece[-1])
+            d = min(dStart, dEnd)
+            if bestDist is None or d < bestDist:
+                best, bestDist, reverse = i, d, dEnd < dStart
+        piece = pieces.pop(best)
+        if reverse:
+            piece = piece[::-1]
+        poly.extend(piece[1:] if math.sqrt(bestDist) <= joinTol else piece)
+
+    if len(poly) > 1 and _near(poly[0], poly[-1], joinTol):
+        poly.pop()
+    return poly
+
+# Polygon predicates
+
+def polygonBounds(poly):
+    xs = [p[0] for p in poly]
+    ys = [p[1] for p in poly]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def polygonArea(poly):
+    area = 0.0
+    n = len(poly)
+    for i in range(n):
+        x0, y0 = poly[i]
+        x1, y1 = poly[(i + 1) % n]
+        area += x0 * y1 - x1 * y0
+    return area / 2
+
+def polygonCentroid(poly):
+    area = polygonArea(poly)
+    if area == 0:
+        n = len(poly)
+        return sum(p[0] for p in poly) / n, sum(p[1] for p in poly) / n
+    cx = cy = 0.0
+    n = len(poly)
+    for i in range(n):
+        x0, y0 = poly[i]
+        x1, y1 = poly[(i + 1) % n]
+        cross = x0 * y1 - x1 * y0
+        cx += (x0 + x1) * cross
+        cy += (y0 + y1) * cross
+    return cx / (6 * area), cy / (6 * area)
+
+# Even-odd ray cast. Points exactly on an edge may go either way, use pointOnPolygon for those.
+def pointInPolygon(x, y, poly):
+    inside = False
+    n = len(poly)
+    x0, y0 = poly[n - 1]
+    for i in range(n):
+        x1, y1 = poly[i]
+        if (y1 > y) != (y0 > y):
+            xCross = x1 + (y - y1) * (x0 - x1) / (y0 - y1)
+            if x < xCross:
+                inside = not inside
+        x0, y0 = x1, y1
+    return inside
+
+def pointOnPolygon(x, y, poly, tolerance=DEFAULT_TOLERANCE):
+    n = len(poly)
+    for i in range(n):
+        x0, y0 = poly[i - 1]
+        x1, y1 = poly[i]
+        if distanceToSegment(x, y, x0, y0, x1, y1) <= tolerance:
+            return True
+    return False
+
+def distanceToSegment(px, py, x0, y0, x1, y1):
+    dx, dy = x1 - x0, y1 - y0
+    lenSq = dx * dx + dy * dy
+    if lenSq == 0:
+        return math.hypot(px - x0, py - y0)
+    t = max(0.0, min(1.0, ((px - x0) * dx + (py - y0) * dy) / lenSq))
+    return math.hypot(px - (x0 + t * dx), py - (y0 + t * dy))
+
+# Classification
+
+# Maps each profile to the direction line whose midpoint it contains.
+# midpoints are (x, y) in the same sketch space as the profiles, indexed by line.
+# Returns [(profile, lineIndex)] for the profiles that own a line, in profile order, and every line
+# has at most one owner:
+#   a line whose midpoint is inside a profile belongs to it
+#   a line whose midpoint sits on the edges of several profiles goes to the first of them that owns
+#   no inside line, so two profiles sharing an edge never both claim it
+# As with the old pointContainment loop, the lowest line index wins if a profile holds several.
+# boundsOf(profile) may supply cached bounds, otherwise the tessellated bounds are used.
+def classifyProfiles(profiles, midpoints, tolerance=DEFAULT_TOLERANCE, pointIndex=None, boundsOf=None):
+    inside, edgeClaims = claimLines(profiles, midpoints, tolerance, pointIndex, boundsOf)
+    owned = inside + resolveEdgeClaims(edgeClaims, {lineIndex for _, lineIndex in inside})
+    order = {id(profile): position for position, profile in enumerate(profiles)}
+    return sorted(owned, key=lambda pair: order[id(pair[0])])
+
+# The first half of classifyProfiles, which needs no other profiles than the ones given.
+# Returns ([(profile, lineIndex)] for the profiles with a midpoint inside them,
+#          [(profile, [lineIndex])] of the midpoints on the edges of every other profile that has any)
+def claimLines(profiles, midpoints, tolerance=DEFAULT_TOLERANCE, pointIndex=None, boundsOf=None):
+    if pointIndex is None:
+        pointIndex = UniformGrid.fromPoints(midpoints)
+    inside = []
+    edgeClaims = []
+    for profile in profiles:
+        minX, minY, maxX, maxY = boundsOf(profile) if boundsOf else profile.bounds(tolerance)
+        candidates = pointIndex.query(minX - tolerance, minY - tolerance, maxX + tolerance, maxY + tolerance)
+        onEdge = []
+        for lineIndex in candidates:
+            x, y = midpoints[lineIndex]
+            location = profile.locatePoint(x, y, tolerance)
+            if location == INSIDE:
+                inside.append((profile, lineIndex))
+                break
+            if location == ON_EDGE:
+                onEdge.append(lineIndex)
+        else:
+            if onEdge:
+                edgeClaims.append((profile, onEdge))
+    return inside, edgeClaims
+
+# The second half of classifyProfiles: hands each edge claim, in the order given, its lowest line
+# that is not in claimedLines yet. Returns [(profile, lineIndex)] and adds the lines to claimedLines
+def resolveEdgeClaims(edgeClaims, claimedLines):
+    owned = []
+    for profile, lineIndices in edgeClaims:
+        for lineIndex in lineIndices:
+            if lineIndex not in claimedLines:
+                claimedLines.add(lineIndex)
+                owned.append((profile, lineIndex))
+                break
+    return owned
+
+def _dist2(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2
+
+def _near(a, b, tolerance):
+    return _dist2(a, b) <= tolerance * tolerance
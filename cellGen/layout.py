@@ -0,0 +1,103 @@
+# Batched CAM layout: one pass over every cell computes its "track-aligned" rotation and its
+# final placement on the destination plane, as row-major 4x4 matrices ready for Matrix3D.setWithArray.
+
+import math
+
+from . import nesting
+
+IDENTITY = (1.0, 0.0, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0)
+
+def multiply(a, b):
+    return tuple(sum(a[r * 4 + k] * b[k * 4 + c] for k in range(4)) for r in range(4) for c in range(4))
+
+def translation(x, y, z):
+    return (1.0, 0.0, 0.0, x,
+            0.0, 1.0, 0.0, y,
+            0.0, 0.0, 1.0, z,
+            0.0, 0.0, 0.0, 1.0)
+
+def rotationZ(angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return (c, -s, 0.0, 0.0,
+            s, c, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0)
+
+# Inverse of a rotation & translation, without a general 4x4 inverse
+def invertRigid(m):
+    return (m[0], m[4], m[8], -(m[0] * m[3] + m[4] * m[7] + m[8] * m[11]),
+            m[1], m[5], m[9], -(m[1] * m[3] + m[5] * m[7] + m[9] * m[11]),
+            m[2], m[6], m[10], -(m[2] * m[3] + m[6] * m[7] + m[10] * m[11]),
+            0.0, 0.0, 0.0, 1.0)
+
+def transformPoints(matrix, points):
+    m = matrix
+    return [(m[0] * x + m[1] * y + m[3], m[4] * x + m[5] * y + m[7]) for x, y in points]
+
+def _bounds(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+# Rotates each footprint by its own angle (radians) about its bounding-box center.
+# Returns [(rotation matrix, rotated footprint)]
+def alignFootprints(footprints, angles):
+    aligned = []
+    for footprint, angle in zip(footprints, angles):
+        minX, minY, maxX, maxY = _bounds(footprint)
+        cx, cy = (minX + maxX) / 2, (minY + maxY) / 2
+        matrix = multiply(translation(cx, cy, 0.0), multiply(rotationZ(angle), translation(-cx, -cy, 0.0)))
+        aligned.append((matrix, transformPoints(matrix, footprint)))
+    return aligned
+
+# Places rectangles left to right in rows of at most rowWidth, rows stacked upwards.
+# Returns the min corner of each rectangle
+def shelfPositions(sizes, originX, originY, rowWidth, gap):
+    positions = []
+    x, y, rowHeight = originX, originY, 0.0
+    for width, height in sizes:
+        if x > originX and x + width > originX + rowWidth:
+            x = originX
+            y += rowHeight + gap
+            rowHeight = 0.0
+        positions.append((x, y))
+        x += width + gap
+        rowHeight = max(rowHeight, height)
+    return positions
+
+# footprints are world XY polygons of each cell, angles the track-aligning rotation in radians.
+# Every cell is rotated about its own center, then moved from sourceZ to the destination
+# plane and packed in rows starting at destination's min corner.
+# Returns one 4x4 matrix per cell.
+def layoutTransforms(footprints, angles, sourceZ, destination, gap=0.1):
+    destMinX, destMinY, destMaxX, destMaxY, destZ = destination
+    aligned = alignFootprints(footprints, angles)
+    boxes = [_bounds(footprint) for _, footprint in aligned]
+    sizes = [(b[2] - b[0], b[3] - b[1]) for b in boxes]
+    positions = shelfPositions(sizes, destMinX, destMinY, max(destMaxX - destMinX, gap), gap)
+    return [multiply(translation(px - box[0], py - box[1], destZ - sourceZ), matrix)
+            for (matrix, _), box, (px, py) in zip(aligned, boxes, positions)]
+
+# Same as layoutTransforms, but packs the parts inside the container polygon with the
+# nesting engine. Parts that do not fit are lined up in rows to the right of the stock.
+# Returns (one 4x4 matrix per cell, nesting.NestResult)
+def nestTransforms(footprints, angles, sourceZ, container, destZ, gap=0.1):
+    aligned = alignFootprints(footprints, angles)
+    result = nesting.nest([footprint for _, footprint in aligned], container, gap)
+
+    unplaced = result.unplaced
+    if unplaced:
+        minX, minY, maxX, maxY = _bounds(container)
+        boxes = [_bounds(aligned[i][1]) for i in unplaced]
+        positions = shelfPositions([(b[2] - b[0], b[3] - b[1]) for b in boxes], maxX + gap * 10, minY, maxX - minX, gap)
+        for i, box, (px, py) in zip(unplaced, boxes, positions):
+            result.offsets[i] = (px - box[0], py - box[1])
+
+    transforms = [multiply(translation(dx, dy, destZ - sourceZ), matrix)
+                  for (matrix, _), (dx, dy) in zip(aligned, result.offsets)]
+    for i in unplaced:
+        result.offsets[i] = None
+    return transforms, result
@@ -0,0 +1,163 @@
+# Leveled, buffered messages for long add-in commands.
+#
+# Messages are kept as (level, message, args) records in a ring buffer and only %-formatted when
+# they are flushed, so a debug call below the current level costs one comparison. Pending records
+# go to every sink in one batch: when batchSize records are waiting, when flushInterval seconds
+# have passed since the last flush, on every ERROR, and whenever the caller flushes at the end of
+# a command. A long step that logs nothing keeps its records waiting, so callers also tick() the
+# logger wherever they yield to the host (every chunk of a run) and close() it at shutdown.
+# There is no timer thread: sinks such as a palette's writeText must be called on the host's thread.
+# A sink is any callable taking the batch as one string.
+
+import os, time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+# Level name or number, INFO when not set
+LEVEL_ENV = 'ABSTRACT_CELL_LOG_LEVEL'
+# Also append every message to this file, rotated by RotatingFileSink
+FILE_ENV = 'ABSTRACT_CELL_LOG_FILE'
+
+def parseLevel(value, default=INFO):
+    if value is None or str(value).strip() == '':
+        return default
+    text = str(value).strip().upper()
+    if text.isdigit():
+        return int(text)
+    for level, name in LEVEL_NAMES.items():
+        if name == text:
+            return level
+    raise ValueError(f"Unknown log level '{value}', expected one of {', '.join(LEVEL_NAMES.values())}")
+
+def levelFromEnvironment(default=INFO):
+    try:
+        return parseLevel(os.environ.get(LEVEL_ENV), default)
+    except ValueError:
+        return default
+
+def logFileFromEnvironment():
+    return os.environ.get(FILE_ENV) or None
+
+class Logger:
+
+    # capacity bounds the records held in memory, flushed ones included, so recent() can show the
+    # last messages of a run. batchSize must not exceed it, otherwise unflushed records are lost
+    def __init__(self, level=INFO, capacity=2000, batchSize=200, flushInterval=1.0, clock=time.monotonic):
+        self.level = level
+        self.sinks = []
+        self.batchSize = min(batchSize, capacity)
+        self.flushInterval = flushInterval
+        self.clock = clock
+        self._records = deque(maxlen=capacity)
+        self._pending = 0
+        self._lastFlush = clock()
+
+    def addSink(self, sink):
+        self.sinks.append(sink)
+
+    def removeSink(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    def isEnabledFor(self, level):
+        return level >= self.level
+
+    def log(self, level, message, *args):
+        if level < self.level:
+            return
+        self._records.append((level, message, args))
+        self._pending += 1
+        if level >= ERROR or self._pending >= self.batchSize or self.clock() - self._lastFlush >= self.flushInterval:
+            self.flush()
+
+    def debug(self, message, *args):
+        if DEBUG >= self.level:
+            self.log(DEBUG, message, *args)
+
+    def info(self, message, *args):
+        if INFO >= self.level:
+            self.log(INFO, message, *args)
+
+    def warning(self, message, *args):
+        if WARNING >= self.level:
+            self.log(WARNING, message, *args)
+
+    def error(self, message, *args):
+        self.log(ERROR, message, *args)
+
+    # Flushes when records have waited flushInterval seconds, for callers that yield to the host between steps
+    def tick(self):
+        if self._pending and self.clock() - self._lastFlush >= self.flushInterval:
+            self.flush()
+
+    # Flushes and lets go of the sinks, at shutdown
+    def close(self):
+        self.flush()
+        self.sinks.clear()
+
+    # Writes every pending record to every sink, one call per sink
+    def flush(self):
+        self._lastFlush = self.clock()
+        if not self._pending:
+            return
+        records = list(self._records)[-self._pending:]
+        self._pending = 0
+        if not self.sinks:
+            return
+        text = '\n'.join(formatRecord(record) for record in records)
+        for sink in self.sinks:
+            sink(text)
+
+    # The last count messages, flushed or not, formatted
+    def recent(self, count=None):
+        records = list(self._records)
+        if count is not None:
+            records = records[-count:]
+        return [formatRecord(record) for record in records]
+
+# Debug & warning lines are tagged with their level, info & error are shown as they are
+def formatRecord(record):
+    level, message, args = record
+    if args:
+        try:
+            message = message % args
+        except (TypeError, ValueError):
+            message = f"{message} {args!r}"
+    if level in (DEBUG, WARNING):
+        return f"[{LEVEL_NAMES[level]}] {message}"
+    return message
+
+# Appends to a text file, which is moved to path.1 (path.1 to path.2 and so on) once it grows past
+# maxBytes. Only backupCount old files are kept
+class RotatingFileSink:
+
+    def __init__(self, path, maxBytes=1000000, backupCount=3):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, text):
+        if os.path.exists(self.path) and os.path.getsize(self.path) + len(text) > self.maxBytes:
+            self._rotate()
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f"--- {stamp}\n{text}\n")
+
+    def _rotate(self):
+        for index in range(self.backupCount - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        if self.backupCount > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
@@ -0,0 +1,324 @@
+# 2D nesting of track-aligned cell footprints onto the destination profile.
+#
+# Skyline bottom-left heuristic: parts are taken tallest first and each one goes to the
+# lowest, then left-most, position on the skyline where its bounding rectangle fits inside
+# the container polygon. Where the polygon is narrower than its bounding box (a circle, a
+# triangle) a candidate climbs from the skyline and slides right until the rectangle fits
+# between the polygon's walls. Container edges live in a uniform grid so the containment
+# checks only look at the edges near the candidate.
+#
+# Only the bounding rectangles are packed, a part never sits in the notch of another one, so the
+# stock covered by the footprints themselves is lower than the rectangles' fill. NestResult reports
+# both; benchmarks/nestingBench.py measures the difference on the synthetic patterns.
+
+from bisect import bisect_left, bisect_right
+
+from .geometry import pointInPolygon, polygonArea, polygonBounds
+from .spatialIndex import UniformGrid
+
+class NestResult:
+
+    def __init__(self, offsets, placed, containerArea, partsArea, rectsArea=0.0):
+        # offsets[i] is the (dx, dy) that moves part i into place, None when it did not fit
+        self.offsets = offsets
+        self.placed = placed
+        self.containerArea = containerArea
+        self.partsArea = partsArea
+
+        # Area of the placed parts' bounding rectangles, gap excluded
+        self.rectsArea = rectsArea
+
+    @property
+    def unplaced(self):
+        return [i for i, offset in enumerate(self.offsets) if offset is None]
+
+    # Fraction of the stock covered by the footprints of the placed parts
+    @property
+    def utilization(self):
+        return self.partsArea / self.containerArea if self.containerArea else 0.0
+
+    # Fraction of the stock covered by the bounding rectangles of the placed parts, what the packing sees
+    @property
+    def rectUtilization(self):
+        return self.rectsArea / self.containerArea if self.containerArea else 0.0
+
+    def summary(self):
+        return (f"Nested {self.placed} of {len(self.offsets)} parts, "
+                f"stock utilization {self.utilization * 100:.1f}% (bounding rectangles {self.rectUtilization * 100:.1f}%)")
+
+class Container:
+
+    def __init__(self, polygon):
+        self.polygon = polygon
+        self.bounds = polygonBounds(polygon)
+        minX, minY, maxX, maxY = self.bounds
+        self.edges = UniformGrid(max(maxX - minX, maxY - minY, 1e-9) / max(len(polygon) ** 0.5, 1), minX, minY)
+        n = len(polygon)
+        for i in range(n):
+            (x0, y0), (x1, y1) = polygon[i - 1], polygon[i]
+            self.edges.insertBox(i, min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+        # Between two consecutive vertex heights the same edges cross every horizontal line, in the same
+        # order. Per such slab: [(x at the slab's bottom, dx/dy)] of those edges, left to right
+        self.vertexYs = sorted({y for _, y in polygon})
+        self.slabs = []
+        for k in range(len(self.vertexYs) - 1):
+            bottom, top = self.vertexYs[k], self.vertexYs[k + 1]
+            middle = (bottom + top) / 2
+            crossing = []
+            for i in self.edges.query(minX, bottom, maxX, top):
+                (x0, y0), (x1, y1) = polygon[i - 1], polygon[i]
+                if min(y0, y1) <= bottom and max(y0, y1) >= top:
+                    slope = (x1 - x0) / (y1 - y0)
+                    crossing.append((x0 + (middle - y0) * slope, x0 + (bottom - y0) * slope, slope))
+            self.slabs.append([(x, slope) for _, x, slope in sorted(crossing)])
+
+    # [(minX, maxX)] where the polygon is inside along the horizontal line at y
+    def scanline(self, y):
+        k = bisect_right(self.vertexYs, y) - 1
+        if k < 0 or k >= len(self.slabs):
+            return []
+        bottom = self.vertexYs[k]
+        xs = [x + (y - bottom) * slope for x, slope in self.slabs[k]]
+        return [(xs[i], xs[i + 1]) for i in range(0, len(xs) - 1, 2)]
+
+    # Lowest height >= y at which the horizontal line through the polygon is at least width wide right of
+    # minX, None when there is none. Within a slab each inside interval's width right of minX is the
+    # smaller of two functions linear in y, so the heights where it is wide enough form one range
+    def nextWideEnough(self, y, minX, width):
+        for k in range(max(bisect_right(self.vertexYs, y) - 1, 0), len(self.slabs)):
+            bottom, top = self.vertexYs[k], self.vertexYs[k + 1]
+            if top < y:
+                continue
+            lowest = None
+            edges = self.slabs[k]
+            for i in range(0, len(edges) - 1, 2):
+                (left, leftSlope), (right, rightSlope) = edges[i], edges[i + 1]
+                lo, hi = max(y, bottom), top
+                # right - left >= width and right - minX >= width, with both sides linear in y - bottom
+                for offset, slope in ((right - left - width, rightSlope - leftSlope), (right - minX - width, rightSlope)):
+                    if abs(slope) < 1e-12:
+                        if offset < -1e-12:
+                            lo, hi = 1.0, 0.0
+                    elif slope > 0:
+                        lo = max(lo, bottom - offset / slope)
+                    else:
+                        hi = min(hi, bottom - offset / slope)
+                if lo <= hi and (lowest is None or lo < lowest):
+                    lowest = lo
+            if lowest is not None:
+                return lowest
+        return None
+
+    # [(minX, maxX)] over which the polygon is inside for every y between minY and maxY.
+    # Edges are straight between vertices, so the lines at both ends and at every vertex in between tell
+    def band(self, minY, maxY, eps=1e-9):
+        levels = [minY + eps, maxY - eps]
+        levels.extend(y for y in self.vertexYs[bisect_right(self.vertexYs, minY):bisect_left(self.vertexYs, maxY)])
+        intervals = self.scanline(levels[0])
+        for y in levels[1:]:
+            if not intervals:
+                break
+            intervals = _intersectIntervals(intervals, self.scanline(y))
+        return intervals
+
+    # True if the rectangle lies inside the polygon: its corners are inside and no edge crosses it
+    def containsRect(self, minX, minY, maxX, maxY):
+        cMinX, cMinY, cMaxX, cMaxY = self.bounds
+        if minX < cMinX or minY < cMinY or maxX > cMaxX or maxY > cMaxY:
+            return False
+        for x, y in ((minX, minY), (maxX, minY), (maxX, maxY), (minX, maxY)):
+            if not pointInPolygon(x, y, self.polygon):
+                return False
+        for i in self.edges.query(minX, minY, maxX, maxY):
+            (x0, y0), (x1, y1) = self.polygon[i - 1], self.polygon[i]
+            if _segmentCrossesRect(x0, y0, x1, y1, minX, minY, maxX, maxY):
+                return False
+        return True
+
+def _intersectIntervals(a, b):
+    out = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        lo, hi = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if lo < hi:
+            out.append((lo, hi))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+def _segmentCrossesRect(x0, y0, x1, y1, minX, minY, maxX, maxY):
+    # Liang-Barsky clip against the open rectangle
+    t0, t1 = 0.0, 1.0
+    dx, dy = x1 - x0, y1 - y0
+    for p, q in ((-dx, x0 - minX), (dx, maxX - x0), (-dy, y0 - minY), (dy, maxY - y0)):
+        if p == 0:
+            if q <= 0:
+                return False
+            continue
+        r = q / p
+        if p < 0:
+            t0 = max(t0, r)
+        else:
+            t1 = min(t1, r)
+        if t0 >= t1:
+            return False
+    return t1 - t0 > 1e-12
+
+class Skyline:
+
+    def __init__(self, minX, maxX, y):
+        # [x, y, width] segments covering minX..maxX, left to right
+        self.segments = [[minX, y, maxX - minX]]
+        self.maxX = maxX
+
+    # Lowest y at which a part of this width can sit when its left edge is at segment i
+    def fitAt(self, i, width):
+        x = self.segments[i][0]
+        if x + width > self.maxX + 1e-9:
+            return None
+        y = 0.0
+        remaining = width
+        j = i
+        first = True
+        while remaining > 1e-12:
+            if j >= len(self.segments):
+                return None
+            sx, sy, sw = self.segments[j]
+            y = sy if first else max(y, sy)
+            first = False
+            remaining -= sw if j > i else sw - (x - sx)
+            j += 1
+        return y
+
+    # Highest skyline under x..x + width
+    def heightUnder(self, x, width):
+        right = x + width
+        return max(sy for sx, sy, sw in self.segments if sx < right - 1e-12 and sx + sw > x + 1e-12)
+
+    def place(self, x, y, width, height):
+        top = y + height
+        right = x + width
+        newSegments = []
+        for sx, sy, sw in self.segments:
+            sRight = sx + sw
+            if sRight <= x or sx >= right:
+                newSegments.append([sx, sy, sw])
+                continue
+            if sx < x:
+                newSegments.append([sx, sy, x - sx])
+            if sRight > right:
+                newSegments.append([right, sy, sRight - right])
+        newSegments.append([x, top, width])
+        newSegments.sort(key=lambda s: s[0])
+
+        # Merge neighbours at the same height
+        merged = [newSegments[0]]
+        for segment in newSegments[1:]:
+            last = merged[-1]
+            if abs(last[1] - segment[1]) < 1e-12:
+                last[2] += segment[2]
+            else:
+                merged.append(segment)
+        self.segments = merged
+
+# Left-most x >= minX at which a part of this width, gap included, sits between the walls of the
+# container over y..y + height, clear of them by eps. None when it does not fit at that height
+def _fitBetweenWalls(container, minX, y, width, height, half, eps=1e-7):
+    for lo, hi in container.band(y + half - eps, y + height - half + eps):
+        x = max(minX, lo - half + eps)
+        if x + width - half <= hi - eps:
+            return x
+    return None
+
+# Lowest height >= y at which the container is wide enough for the part at both its bottom and its top
+def _nextWideEnough(container, y, minX, width, height, half):
+    while True:
+        bottom = container.nextWideEnough(y + half, minX + half, width - 2 * half)
+        if bottom is None:
+            return None
+        y = bottom - half
+        top = container.nextWideEnough(y + height - half, minX + half, width - 2 * half)
+        if top is None:
+            return None
+        if top - height + half <= y + 1e-12:
+            return y
+        y = top - height + half
+
+# Lowest position with the part's left edge at or right of the skyline segment's start, as (x, y).
+# The part climbs from the skyline until it fits between the container's walls, then settles on the
+# skyline under where it ended up. Gives up above maxTop, the top of the best position found so far
+def _climb(container, skyline, segment, width, height, half, maxTop, bisections=12):
+    x0 = skyline.segments[segment][0]
+    y = skyline.fitAt(segment, width)
+    if y is None:
+        return None
+    step = max(height / 4, 1e-6)
+    while y + height < maxTop:
+        x = _fitBetweenWalls(container, x0, y, width, height, half)
+        if x is None:
+            # Climb in steps, skipping the slabs of the container that are too narrow for the part,
+            # then narrow the lowest height that fits down by bisection
+            lower = upper = y
+            while x is None:
+                lower = upper
+                upper = _nextWideEnough(container, upper + step, x0, width, height, half)
+                if upper is None or upper + height >= maxTop:
+                    return None
+                x = _fitBetweenWalls(container, x0, upper, width, height, half)
+            for _ in range(bisections):
+                middle = (lower + upper) / 2
+                xMiddle = _fitBetweenWalls(container, x0, middle, width, height, half)
+                if xMiddle is None:
+                    lower = middle
+                else:
+                    upper, x = middle, xMiddle
+            y = upper
+        if x + width > skyline.maxX + 1e-9:
+            return None
+        # Sliding right may have moved the part over a higher part of the skyline
+        floor = skyline.heightUnder(x, width)
+        if floor > y + 1e-12:
+            y = floor
+            continue
+        if container.containsRect(x + half, y + half, x + width - half, y + height - half):
+            return x, y
+        y += step
+    return None
+
+# parts are footprint polygons in their final orientation, container is the stock polygon
+def nest(parts, container, gap=0.1):
+    container = Container(container)
+    cMinX, cMinY, cMaxX, cMaxY = container.bounds
+    skyline = Skyline(cMinX, cMaxX, cMinY)
+
+    boxes = [polygonBounds(p) for p in parts]
+    sizes = [(b[2] - b[0] + gap, b[3] - b[1] + gap) for b in boxes]
+    order = sorted(range(len(parts)), key=lambda i: (-sizes[i][1], -sizes[i][0], i))
+
+    offsets = [None] * len(parts)
+    placed = 0
+    partsArea = rectsArea = 0.0
+    half = gap / 2
+    for i in order:
+        width, height = sizes[i]
+        best = None
+        for s in range(len(skyline.segments)):
+            position = _climb(container, skyline, s, width, height, half,
+                              best[0] if best else cMaxY + half + 1e-9)
+            if position is not None:
+                x, y = position
+                if best is None or (y + height, x) < best:
+                    best = (y + height, x, y)
+        if best is None:
+            continue
+        _, x, y = best
+        skyline.place(x, y, width, height)
+        offsets[i] = (x + half - boxes[i][0], y + half - boxes[i][1])
+        placed += 1
+        partsArea += abs(polygonArea(parts[i]))
+        rectsArea += (width - gap) * (height - gap)
+
+    return NestResult(offsets, placed, abs(polygonArea(container.polygon)), partsArea, rectsArea)
@@ -0,0 +1,241 @@
+# Synthetic cell patterns for scale testing.
+#
+# Each generator returns a Pattern: one convex polygon per cell plus one direction line per cell,
+# through the cell's centroid at a random angle, or at one of directionAngles (degrees) when given,
+# which makes the cells of the regular patterns repeat. The same arguments always give the same
+# pattern. size is the typical cell width (cm). Use fusionIO.writePattern to draw a pattern into
+# live sketches, or Pattern.profiles() / midpoints() for the headless path.
+
+import math, random
+
+from .geometry import ProfileData, polygonArea, polygonCentroid
+from .spatialIndex import UniformGrid
+
+# Vertices closer than this (cm) are welded into one, so cells that share an edge share its endpoints exactly
+WELD_TOLERANCE = 1e-7
+
+class Pattern:
+
+    # polygons are CCW [(x, y)], lines are ((x0, y0), (x1, y1)), by cell
+    def __init__(self, kind, polygons, lines):
+        self.kind = kind
+        self.polygons = polygons
+        self.lines = lines
+
+    def __len__(self):
+        return len(self.polygons)
+
+    # Every cell edge once, shared edges included only once, in a stable order
+    def boundarySegments(self):
+        seen = set()
+        segments = []
+        for polygon in self.polygons:
+            for i in range(len(polygon)):
+                p0, p1 = polygon[i - 1], polygon[i]
+                key = (p0, p1) if p0 < p1 else (p1, p0)
+                if key not in seen:
+                    seen.add(key)
+                    segments.append((p0, p1))
+        return segments
+
+    def profiles(self):
+        return [ProfileData(index, [(True, [('polyline', list(polygon) + [polygon[0]])])])
+                for index, polygon in enumerate(self.polygons)]
+
+    def midpoints(self):
+        return [((x0 + x1) / 2, (y0 + y1) / 2) for (x0, y0), (x1, y1) in self.lines]
+
+# Snaps every vertex to the first vertex seen within tolerance, and drops repeated vertices
+def _weld(polygons, tolerance=WELD_TOLERANCE):
+    buckets = {}
+    welded = []
+    for polygon in polygons:
+        out = []
+        for x, y in polygon:
+            i, j = int(math.floor(x / tolerance)), int(math.floor(y / tolerance))
+            match = None
+            for key in ((a, b) for a in (i - 1, i, i + 1) for b in (j - 1, j, j + 1)):
+                for vx, vy in buckets.get(key, ()):
+                    if abs(vx - x) <= tolerance and abs(vy - y) <= tolerance:
+                        match = (vx, vy)
+                        break
+                if match:
+                    break
+            if match is None:
+                match = (x + 0.0, y + 0.0)
+                buckets.setdefault((i, j), []).append(match)
+            if not out or out[-1] != match:
+                out.append(match)
+        if len(out) > 1 and out[0] == out[-1]:
+            out.pop()
+        welded.append(out)
+    return welded
+
+def _directionLines(polygons, rng, directionAngles=None):
+    lines = []
+    for polygon in polygons:
+        cx, cy = polygonCentroid(polygon)
+        angle = math.radians(rng.choice(directionAngles)) if directionAngles else rng.uniform(0.0, 2 * math.pi)
+        half = 0.2 * math.sqrt(abs(polygonArea(polygon)))
+        dx, dy = math.cos(angle) * half, math.sin(angle) * half
+        lines.append(((cx - dx, cy - dy), (cx + dx, cy + dy)))
+    return lines
+
+def _columns(count):
+    return max(1, math.ceil(math.sqrt(count)))
+
+def squarePattern(count, size=1.0, seed=0, directionAngles=None):
+    rng = random.Random(seed)
+    columns = _columns(count)
+    polygons = []
+    for n in range(count):
+        x, y = (n % columns) * size, (n // columns) * size
+        polygons.append([(x, y), (x + size, y), (x + size, y + size), (x, y + size)])
+    polygons = _weld(polygons)
+    return Pattern('square', polygons, _directionLines(polygons, rng, directionAngles))
+
+# Pointy-top hexagons, size is the flat-to-flat width, odd rows shifted by half a cell
+def hexPattern(count, size=1.0, seed=0, directionAngles=None):
+    rng = random.Random(seed)
+    columns = _columns(count)
+    radius = size / math.sqrt(3)
+    corners = [(radius * math.cos(math.radians(30 + 60 * k)), radius * math.sin(math.radians(30 + 60 * k))) for k in range(6)]
+    polygons = []
+    for n in range(count):
+        row, column = divmod(n, columns)
+        cx = column * size + (size / 2 if row % 2 else 0.0)
+        cy = row * radius * 1.5
+        polygons.append([(cx + dx, cy + dy) for dx, dy in corners])
+    polygons = _weld(polygons)
+    return Pattern('hex', polygons, _directionLines(polygons, rng, directionAngles))
+
+# Jittered grid: every grid vertex is moved by up to jitter * size, which keeps the quads convex
+def randomQuadPattern(count, size=1.0, seed=0, directionAngles=None, jitter=0.25):
+    rng = random.Random(seed)
+    columns = _columns(count)
+    rows = math.ceil(count / columns)
+    vertices = {}
+    for j in range(rows + 1):
+        for i in range(columns + 1):
+            onBorder = i in (0, columns) or j in (0, rows)
+            dx = 0.0 if onBorder else rng.uniform(-jitter, jitter) * size
+            dy = 0.0 if onBorder else rng.uniform(-jitter, jitter) * size
+            vertices[(i, j)] = (i * size + dx, j * size + dy)
+    polygons = []
+    for n in range(count):
+        j, i = divmod(n, columns)
+        polygons.append([vertices[(i, j)], vertices[(i + 1, j)], vertices[(i + 1, j + 1)], vertices[(i, j + 1)]])
+    polygons = _weld(polygons)
+    return Pattern('quads', polygons, _directionLines(polygons, rng, directionAngles))
+
+# Bridson's algorithm: samples at least radius apart, filling the rectangle until no more fit.
+# The background grid has cells of radius / sqrt(2), so each holds at most one sample and a
+# candidate only has to be checked against the 5 x 5 cells around it.
+def poissonDiskSamples(width, height, radius, rng, attempts=30):
+    cellSize = radius / math.sqrt(2)
+    cells = {}
+    samples = []
+    radius2 = radius * radius
+
+    def fits(x, y):
+        i, j = int(x / cellSize), int(y / cellSize)
+        for a in range(i - 2, i + 3):
+            for b in range(j - 2, j + 3):
+                index = cells.get((a, b))
+                if index is not None:
+                    sx, sy = samples[index]
+                    if (sx - x) ** 2 + (sy - y) ** 2 < radius2:
+                        return False
+        return True
+
+    def add(x, y):
+        cells[(int(x / cellSize), int(y / cellSize))] = len(samples)
+        samples.append((x, y))
+
+    add(rng.uniform(0, width), rng.uniform(0, height))
+    active = [0]
+    while active:
+        k = rng.randrange(len(active))
+        sx, sy = samples[active[k]]
+        for _ in range(attempts):
+            angle = rng.uniform(0, 2 * math.pi)
+            distance = rng.uniform(radius, 2 * radius)
+            x, y = sx + math.cos(angle) * distance, sy + math.sin(angle) * distance
+            if 0 <= x < width and 0 <= y < height and fits(x, y):
+                active.append(len(samples))
+                add(x, y)
+                break
+        else:
+            active[k] = active[-1]
+            active.pop()
+    return samples
+
+# Keeps the part of the polygon on the seed's side of the bisector between seed and other
+def _clipToBisector(polygon, seed, other):
+    nx, ny = other[0] - seed[0], other[1] - seed[1]
+    offset = (nx * (seed[0] + other[0]) + ny * (seed[1] + other[1])) / 2
+    clipped = []
+    for i in range(len(polygon)):
+        (x0, y0), (x1, y1) = polygon[i - 1], polygon[i]
+        d0 = nx * x0 + ny * y0 - offset
+        d1 = nx * x1 + ny * y1 - offset
+        if d0 <= 0:
+            clipped.append((x0, y0))
+        if (d0 < 0 < d1) or (d1 < 0 < d0):
+            t = d0 / (d0 - d1)
+            clipped.append((x0 + (x1 - x0) * t, y0 + (y1 - y0) * t))
+    return clipped
+
+# Voronoi cells of Poisson-disk seeds, clipped to the seeds' rectangle.
+# Every cell is the rectangle clipped by the bisectors to the seeds near it, nearest first.
+# Once the next seed is more than twice as far as the cell's farthest vertex it cannot cut
+# the cell anymore; with maximal Poisson-disk sampling that always happens within 4 * radius.
+def voronoiPattern(count, size=1.0, seed=0, directionAngles=None):
+    rng = random.Random(seed)
+    radius = size * 0.8
+
+    # A maximal sampling holds about one seed per 1.6 * radius^2, the square is sized for a few spare
+    side = math.sqrt(count * 1.75) * radius
+    samples = poissonDiskSamples(side, side, radius, rng)
+    while len(samples) < count:
+        side *= 1.1
+        samples = poissonDiskSamples(side, side, radius, rng)
+
+    # Keep the lowest rows of seeds, so the pattern stays compact
+    samples = sorted(samples, key=lambda p: (p[1], p[0]))[:count]
+    maxY = samples[-1][1] + radius
+    domain = [(0.0, 0.0), (side, 0.0), (side, maxY), (0.0, maxY)]
+
+    grid = UniformGrid(radius * 2)
+    for index, (x, y) in enumerate(samples):
+        grid.insertPoint(index, x, y)
+    reach = radius * 4
+    polygons = []
+    for index, point in enumerate(samples):
+        x, y = point
+        near = grid.query(x - reach, y - reach, x + reach, y + reach)
+        near.sort(key=lambda i: (samples[i][0] - x) ** 2 + (samples[i][1] - y) ** 2)
+        polygon = domain
+        for other in near:
+            if other == index:
+                continue
+            ox, oy = samples[other]
+            reach2 = max((px - x) ** 2 + (py - y) ** 2 for px, py in polygon)
+            if (ox - x) ** 2 + (oy - y) ** 2 > 4 * reach2:
+                break
+            polygon = _clipToBisector(polygon, point, (ox, oy))
+        polygons.append(polygon)
+    polygons = _weld(polygons)
+    return Pattern('voronoi', polygons, _directionLines(polygons, rng, directionAngles))
+
+PATTERNS = {
+    'square': squarePattern,
+    'hex': hexPattern,
+    'quads': randomQuadPattern,
+    'voronoi': voronoiPattern,
+}
+
+def generate(kind, count, size=1.0, seed=0, directionAngles=None):
+    if kind not in PATTERNS:
+        raise ValueError(f"Unknown pattern '{kind}', expected one of {', '.join(PATTERNS)}")
+    return PATTERNS[kind](count, size, seed, directionAngles)
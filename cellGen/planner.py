@@ -0,0 +1,256 @@
+# Pure-geometry planning of a run, spread over worker processes.
+#
+# Everything about a cell that does not need Fusion's B-Rep is worked out here from plain data:
+# which direction line each profile owns, the cell's congruence signature, its chamfered frustum
+# layers & volume, its world footprint and track angle. The result is one CellPlan per owned
+# profile, which the single-threaded Fusion stage then consumes.
+#
+# The profiles are handed out in chunks to a ProcessPoolExecutor using the spawn start method.
+# Worker processes import this file as the top-level module cellGen.planner, with the folder that
+# holds cellGen on their sys.path, since the package the add-in is loaded as only exists in the host.
+# Inside Fusion sys.executable is Fusion itself, so the pool is started with the Python interpreter
+# found next to it; without one, for small runs, or when the pool fails the plan is made serially.
+
+import importlib, math, multiprocessing, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import spawn
+
+from . import bounds, congruence, frustum, layout
+from .geometry import DEFAULT_TOLERANCE, ProfileData, claimLines, resolveEdgeClaims
+from .spatialIndex import UniformGrid
+
+# Number of worker processes, 0 or 1 to always plan serially. All cores when not set
+WORKERS_ENV = 'ABSTRACT_CELL_PLAN_WORKERS'
+
+# Below this many profiles starting the workers costs more than it saves
+MIN_PARALLEL_PROFILES = 2000
+
+# Profiles per task handed to a worker
+CHUNK_SIZE = 250
+
+WORKER_MODULE = 'cellGen.planner'
+
+class CellPlan:
+
+    def __init__(self, lineIndex, profileIndex, transform, footprint, trackAngle, signature=None,
+                 layers=None, expectedVolume=None, error=None):
+        self.lineIndex = lineIndex
+        self.profileIndex = profileIndex
+
+        # Row-major 4x4 world placement of the spawn body at the cell's direction line
+        self.transform = transform
+
+        # World XY outer polygon of the cell, and the rotation (radians) that aligns its track
+        self.footprint = footprint
+        self.trackAngle = trackAngle
+
+        # Congruence signature, None when congruent cells are not reused
+        self.signature = signature
+
+        # frustum.frustumLayers() output & frustum.frustumVolume(), the volume before the spawn body is
+        # intersected. Both are None and error holds the reason when the chamfer collapses the cell
+        self.layers = layers
+        self.expectedVolume = expectedVolume
+        self.error = error
+
+class Plan:
+
+    def __init__(self, cells, mode, workers, seconds):
+        self.cells = cells
+        self.mode = mode
+        self.workers = workers
+        self.seconds = seconds
+
+    def byLine(self):
+        return {cell.lineIndex: cell for cell in self.cells}
+
+    def summary(self):
+        failed = sum(1 for cell in self.cells if cell.error)
+        return (f"Planned {len(self.cells)} cells in {self.seconds:.2f} s ({self.mode}, {self.workers} "
+                f"{'worker' if self.workers == 1 else 'workers'}), {failed} collapse under the chamfer")
+
+def workersFromEnvironment():
+    value = os.environ.get(WORKERS_ENV, '').strip()
+    if value.isdigit():
+        return int(value)
+    return os.cpu_count() or 1
+
+# A Python interpreter to start the workers with: sys.executable when it is one, otherwise the
+# interpreter the host ships next to its Python library. None when there is none to be found
+def pythonInterpreter():
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+    names = ('python.exe', 'python3', 'python')
+    for directory in dict.fromkeys((sys.prefix, sys.exec_prefix, os.path.join(sys.prefix, 'bin'),
+                                    os.path.dirname(sys.executable))):
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+    return None
+
+# State shared by every task of a worker, set once per process by _initWorker
+_shared = None
+
+def _initWorker(midpoints, angles, sketchMatrix, height, chamferAngle, withSignatures, tolerance):
+    global _shared
+    _shared = (midpoints, angles, UniformGrid.fromPoints(midpoints), sketchMatrix, height, chamferAngle,
+               withSignatures, tolerance)
+
+# Plans one chunk of profiles, given as [(profile index, loops, bounds or None when not known yet)].
+# Only profiles with a midpoint inside them are planned here, which line a midpoint on a shared edge
+# goes to depends on profiles in other chunks.
+# Returns (planned cells, [(profile index, bounds)] worked out here, [(profile index, [line index])] of
+# the edge claims), as plain tuples so the result does not depend on the module the caller imported
+def _planChunk(profiles):
+    midpoints, angles, grid, sketchMatrix, height, chamferAngle, withSignatures, tolerance = _shared
+    knownBounds = {index: box for index, _, box in profiles if box is not None}
+    newBounds = []
+    def boundsOf(profile):
+        box = knownBounds.get(profile.index)
+        if box is None:
+            box = bounds.profileBounds(profile, tolerance)
+            newBounds.append((profile.index, box))
+        return box
+    profiles = [ProfileData(index, loops) for index, loops, _ in profiles]
+    inside, edgeClaims = claimLines(profiles, midpoints, tolerance, grid, boundsOf)
+    return _planOwned(inside), newBounds, [(profileData.index, lineIndices) for profileData, lineIndices in edgeClaims]
+
+# Plans [(ProfileData, owned line index)] with the state _initWorker set
+def _planOwned(owned):
+    midpoints, angles, grid, sketchMatrix, height, chamferAngle, withSignatures, tolerance = _shared
+    planned = []
+    for profileData, lineIndex in owned:
+        angle = angles[lineIndex]
+        signature = None
+        if withSignatures:
+            signature = congruence.cellSignature(profileData, midpoints[lineIndex], math.radians(angle), tolerance=tolerance)
+        try:
+            layers = frustum.frustumLayers(profileData, height, chamferAngle, tolerance)
+            volume = frustum.frustumVolume(profileData, height, chamferAngle, tolerance)
+            error = None
+        except ValueError as e:
+            layers = volume = None
+            error = str(e)
+        footprint = layout.transformPoints(sketchMatrix, profileData.outerPolygon(tolerance))
+        planned.append((lineIndex, profileData.index, footprint, math.radians(-angle), signature, layers, volume, error))
+    return planned
+
+def _planSerial(chunks, initArgs):
+    global _shared
+    _initWorker(*initArgs)
+    try:
+        return [_planChunk(chunk) for chunk in chunks]
+    finally:
+        _shared = None
+
+# Settles the edge claims of every chunk, in profile order, and plans the profiles they go to
+def _planEdgeClaims(edgeClaims, claimedLines, loopsByIndex, initArgs):
+    global _shared
+    owned = resolveEdgeClaims(edgeClaims, claimedLines)
+    if not owned:
+        return []
+    _initWorker(*initArgs)
+    try:
+        return _planOwned([(ProfileData(index, loopsByIndex[index]), lineIndex) for index, lineIndex in owned])
+    finally:
+        _shared = None
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+# Imports this file as WORKER_MODULE, the name the workers will find it under.
+# Returns (module, added path) or (None, None) when a different cellGen is already imported
+def _workerModule():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    existing = sys.modules.get(WORKER_MODULE)
+    if existing is not None:
+        if os.path.abspath(getattr(existing, '__file__', '')) != os.path.abspath(__file__):
+            return None, None
+        return existing, None
+    if 'cellGen' in sys.modules:
+        return None, None
+    added = None
+    if root not in sys.path:
+        sys.path.insert(0, root)
+        added = root
+    return importlib.import_module(WORKER_MODULE), added
+
+def _forgetWorkerModule(added):
+    if added is None:
+        return
+    if added in sys.path:
+        sys.path.remove(added)
+    for name in [n for n in sys.modules if n == 'cellGen' or n.startswith('cellGen.')]:
+        del sys.modules[name]
+
+def _planParallel(chunks, initArgs, workers, interpreter):
+    module, added = _workerModule()
+    if module is None:
+        raise RuntimeError(f"{WORKER_MODULE} is already imported from another location")
+    context = multiprocessing.get_context('spawn')
+    previousExecutable = None
+    if interpreter != sys.executable:
+        previousExecutable = spawn.get_executable()
+        context.set_executable(interpreter)
+    try:
+        with ProcessPoolExecutor(workers, context, module._initWorker, initArgs) as pool:
+            return list(pool.map(module._planChunk, chunks))
+    finally:
+        if previousExecutable is not None:
+            context.set_executable(previousExecutable)
+        _forgetWorkerModule(added)
+
+# Plans every cell of a run.
+# profiles are the boundary sketch's ProfileData, midpoints the (x, y) midpoints of the direction lines
+# in the same sketch space and angles their directions in degrees, both indexed by line.
+# transforms are the per-line placement matrices, sketchMatrix the boundary sketch's sketch-to-world matrix.
+# workers defaults to WORKERS_ENV. onFallback(reason) is told why a parallel plan was not used.
+# A bounds.BoundsCache at the same tolerance hands the workers the profile bounds it already holds,
+# and gets the ones they work out.
+# Returns a Plan whose cells follow profile order, as geometry.classifyProfiles does
+def planCells(profiles, midpoints, angles, transforms, sketchMatrix, height, chamferAngle, withSignatures=True,
+              workers=None, tolerance=DEFAULT_TOLERANCE, onFallback=None, boundsCache=None):
+    startTime = time.perf_counter()
+    midpoints = [tuple(point) for point in midpoints]
+    angles = list(angles)
+    initArgs = (midpoints, angles, tuple(sketchMatrix), height, chamferAngle, withSignatures, tolerance)
+    if boundsCache is not None and boundsCache.tolerance != tolerance:
+        boundsCache = None
+    chunks = _chunks([(profileData.index, profileData.loops, boundsCache.lookup(profileData) if boundsCache is not None else None)
+                      for profileData in profiles], CHUNK_SIZE)
+    workers = min(workersFromEnvironment() if workers is None else workers, len(chunks))
+
+    planned = None
+    mode = 'serial'
+    if workers > 1 and len(profiles) >= MIN_PARALLEL_PROFILES:
+        interpreter = pythonInterpreter()
+        if interpreter is None:
+            if onFallback:
+                onFallback("no Python interpreter to start the workers with")
+        else:
+            try:
+                planned = _planParallel(chunks, initArgs, workers, interpreter)
+                mode = 'parallel'
+            except Exception as e:
+                if onFallback:
+                    onFallback(f"the worker pool failed: {e!r}")
+    if planned is None:
+        workers = 1
+        planned = _planSerial(chunks, initArgs)
+    profilesByIndex = {profileData.index: profileData for profileData in profiles}
+    if boundsCache is not None:
+        for _, newBounds, _ in planned:
+            for index, box in newBounds:
+                boundsCache.store(profilesByIndex[index], box)
+    edgeClaims = [claim for _, _, chunkClaims in planned for claim in chunkClaims]
+    planned = [cell for chunkCells, _, _ in planned for cell in chunkCells]
+    if edgeClaims:
+        loopsByIndex = {index: profilesByIndex[index].loops for index, _ in edgeClaims}
+        planned += _planEdgeClaims(edgeClaims, {cell[0] for cell in planned}, loopsByIndex, initArgs)
+        order = {profileData.index: position for position, profileData in enumerate(profiles)}
+        planned.sort(key=lambda cell: order[cell[1]])
+
+    cells = [CellPlan(lineIndex, profileIndex, transforms[lineIndex], footprint, trackAngle, signature, layers, volume, error)
+             for lineIndex, profileIndex, footprint, trackAngle, signature, layers, volume, error in planned]
+    return Plan(cells, mode, workers, time.perf_counter() - startTime)
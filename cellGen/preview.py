@@ -0,0 +1,188 @@
+# Lightweight preview buffers for the create command, in boundary sketch space.
+# Outlines and direction arrows depend only on the classification and are built once per
+# selection; the coarse prism mesh is rebuilt only when the height or chamfer angle changes.
+# What a cell's prism needs that does not depend on height or angle, its loops' offset schedules
+# and its bottom face's triangles, is worked out on the first mesh and kept with the cell, so a new
+# height or angle only moves points. The loops are scheduled to their end, so that holds for any inset;
+# it makes the first mesh slower, which pays off from the first edit on.
+# benchmarks/previewBench.py times the updates against their 100 ms budget.
+
+import math
+
+from . import frustum
+from .geometry import polygonArea
+
+# Tessellation tolerance used for preview geometry (cm)
+PREVIEW_TOLERANCE = 0.02
+
+# Normals of the bottom & top faces
+DOWN = (0.0, 0.0, -1.0)
+UP = (0.0, 0.0, 1.0)
+
+# Ear clipping of a simple polygon, returns triangles as index triples into poly.
+# Convex polygons, most cells, are fanned out from their first vertex
+def triangulate(poly):
+    n = len(poly)
+    if n < 3:
+        return []
+    area = polygonArea(poly)
+    if _isConvex(poly, area > 0):
+        if area > 0:
+            return [(0, i, i + 1) for i in range(1, n - 1)]
+        return [(0, i + 1, i) for i in range(1, n - 1)]
+    indices = list(range(n)) if area > 0 else list(range(n - 1, -1, -1))
+    triangles = []
+    guard = 0
+    while len(indices) > 3 and guard < n * n:
+        guard += 1
+        count = len(indices)
+        for k in range(count):
+            i0, i1, i2 = indices[k - 1], indices[k], indices[(k + 1) % count]
+            ax, ay = poly[i0]
+            bx, by = poly[i1]
+            cx, cy = poly[i2]
+            if (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) <= 0:
+                continue
+            if any(_inTriangle(poly[j], poly[i0], poly[i1], poly[i2]) for j in indices if j not in (i0, i1, i2)):
+                continue
+            triangles.append((i0, i1, i2))
+            del indices[k]
+            break
+        else:
+            break
+    if len(indices) == 3:
+        triangles.append(tuple(indices))
+    return triangles
+
+def _isConvex(poly, ccw):
+    sign = 1 if ccw else -1
+    n = len(poly)
+    for i in range(n):
+        (ax, ay), (bx, by), (cx, cy) = poly[i - 2], poly[i - 1], poly[i]
+        if sign * ((bx - ax) * (cy - ay) - (by - ay) * (cx - ax)) < 0:
+            return False
+    return True
+
+def _inTriangle(p, a, b, c):
+    def side(p0, p1, p2):
+        return (p1[0] - p0[0]) * (p2[1] - p0[1]) - (p1[1] - p0[1]) * (p2[0] - p0[0])
+    return side(a, b, p) >= 0 and side(b, c, p) >= 0 and side(c, a, p) >= 0
+
+# Arrow as 3 line segments: shaft plus two head strokes
+def arrowSegments(x, y, angle, length):
+    dx, dy = math.cos(angle) * length / 2, math.sin(angle) * length / 2
+    tipX, tipY = x + dx, y + dy
+    head = length * 0.25
+    segments = [((x - dx, y - dy), (tipX, tipY))]
+    for side in (-1, 1):
+        a = angle + math.pi + side * math.radians(25)
+        segments.append(((tipX, tipY), (tipX + math.cos(a) * head, tipY + math.sin(a) * head)))
+    return segments
+
+class PreviewCache:
+
+    def __init__(self):
+        self.key = None
+        self.cells = []
+        self.lineCoords = []
+        self.lineIndices = []
+        self.meshKey = None
+        self.mesh = None
+
+    # cells are [(profile, lineAngle)] where lineAngle is the direction of the owned line, in radians
+    # midpoints are the line midpoints in sketch space, by cell
+    def setCells(self, key, cells, midpoints):
+        self.key = key
+        self.cells = cells
+        self.meshKey = None
+        self.mesh = None
+
+        # Per cell, (frustum.loopSchedules, bottom face triangles) once the first mesh needs them,
+        # None for cells whose loops cannot be offset
+        self.shapes = None
+
+        coords, indices = [], []
+        def addSegment(p0, p1):
+            base = len(coords) // 3
+            coords.extend((p0[0], p0[1], 0.0, p1[0], p1[1], 0.0))
+            indices.extend((base, base + 1))
+
+        for (profile, lineAngle), (x, y) in zip(cells, midpoints):
+            for _, poly in profile.polygons(PREVIEW_TOLERANCE):
+                for i in range(len(poly)):
+                    addSegment(poly[i - 1], poly[i])
+            size = math.sqrt(abs(polygonArea(profile.outerPolygon(PREVIEW_TOLERANCE))))
+            for p0, p1 in arrowSegments(x, y, lineAngle, size * 0.5):
+                addSegment(p0, p1)
+
+        self.lineCoords = coords
+        self.lineIndices = indices
+
+    # Flat-shaded triangle soup for every cell's chamfered prism.
+    # Returns (coords, indices, normals, normalIndices), rebuilt only when height or angle changes.
+    # Cells the chamfer collapses entirely are left out; holes are drawn as walls only.
+    def prismMesh(self, height, chamferAngle):
+        meshKey = (round(height, 9), round(chamferAngle, 9))
+        if self.meshKey == meshKey:
+            return self.mesh
+
+        if self.shapes is None:
+            self.shapes = [self._cellShape(profile) for profile, _ in self.cells]
+
+        coords, normals = [], []
+
+        for shape in self.shapes:
+            if shape is None:
+                continue
+            schedules, bottomTriangles = shape
+            try:
+                layers = frustum.scheduleFrustum(schedules, height, chamferAngle, PREVIEW_TOLERANCE)
+            except ValueError:
+                continue
+            for triangle in bottomTriangles:
+                coords.extend(triangle)
+                normals.extend(DOWN * 3)
+            for isOuter, _, top in layers[-1][2]:
+                if isOuter:
+                    top = [p for i, p in enumerate(top) if p != top[i - 1]]
+                    for i0, i1, i2 in triangulate(top):
+                        coords.extend((*top[i0], height, *top[i1], height, *top[i2], height))
+                        normals.extend(UP * 3)
+            for bottomZ, topZ, loops in layers:
+                for _, bottom, top in loops:
+                    n = len(bottom)
+                    for i in range(n):
+                        j = (i + 1) % n
+                        (bx0, by0), (bx1, by1) = bottom[i], bottom[j]
+                        (tx0, ty0), (tx1, ty1) = top[i], top[j]
+                        # A side face is planar, both its triangles share the normal of (b0, b1, t1)
+                        ux, uy = bx1 - bx0, by1 - by0
+                        vx, vy, vz = tx1 - bx0, ty1 - by0, topZ - bottomZ
+                        nx, ny, nz = uy * vz, -ux * vz, ux * vy - uy * vx
+                        length = math.sqrt(nx * nx + ny * ny + nz * nz) or 1.0
+                        normal = (nx / length, ny / length, nz / length)
+                        coords.extend((bx0, by0, bottomZ, bx1, by1, bottomZ, tx1, ty1, topZ))
+                        normals.extend(normal * 3)
+                        if tx0 != tx1 or ty0 != ty1:
+                            coords.extend((bx0, by0, bottomZ, tx1, ty1, topZ, tx0, ty0, topZ))
+                            normals.extend(normal * 3)
+
+        indices = list(range(len(coords) // 3))
+        self.mesh = (coords, indices, normals, indices)
+        self.meshKey = meshKey
+        return self.mesh
+
+    # (loop schedules, bottom face triangles as flat xyz coordinates) of a cell, None when it cannot be offset
+    @staticmethod
+    def _cellShape(profile):
+        try:
+            schedules = frustum.loopSchedules(profile, tolerance=PREVIEW_TOLERANCE)
+        except ValueError:
+            return None
+        triangles = []
+        for isOuter, steps in schedules:
+            if isOuter:
+                bottom = steps[0][2]
+                for i0, i1, i2 in triangulate(bottom):
+                    triangles.append((*bottom[i0], 0.0, *bottom[i2], 0.0, *bottom[i1], 0.0))
+        return schedules, triangles
@@ -0,0 +1,192 @@
+# Per-stage instrumentation for long add-in commands.
+#
+# A Profiler times named stages that follow each other (beginStage ends the previous one) and
+# records per stage: wall time, Fusion API calls, timeline features created and peak Python
+# memory. API calls are counted with a sys.setprofile hook: every call into an adsk module made
+# from outside adsk counts once. When profiling is off the add-in holds NULL_PROFILER, whose
+# methods do nothing, so instrumented code costs a few empty calls per run.
+
+import json, os, sys, tempfile, time, tracemalloc
+from collections import Counter
+
+# Set to 1 to profile every run without ticking the dialog option
+ENABLE_ENV = 'ABSTRACT_CELL_PROFILE'
+# Directory for the JSON reports, the system temp directory when not set
+REPORT_DIR_ENV = 'ABSTRACT_CELL_PROFILE_DIR'
+
+def enabledFromEnvironment():
+    return os.environ.get(ENABLE_ENV, '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+def reportDirectory():
+    return os.environ.get(REPORT_DIR_ENV) or os.path.join(tempfile.gettempdir(), 'AbstractCellGen')
+
+def _isApiModule(name):
+    return name is not None and (name.startswith('adsk') or name in ('_core', '_fusion', '_cam'))
+
+class StageRecord:
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.entries = 0
+        self.apiCalls = 0
+        self.timelineFeatures = 0
+        self.peakMemoryBytes = 0
+
+    def toDict(self):
+        return {
+            'name': self.name,
+            'seconds': round(self.seconds, 6),
+            'entries': self.entries,
+            'apiCalls': self.apiCalls,
+            'timelineFeatures': self.timelineFeatures,
+            'peakMemoryBytes': self.peakMemoryBytes,
+        }
+
+class Profiler:
+
+    enabled = True
+
+    # timelineCount returns the design's current timeline length, None to skip feature counts
+    def __init__(self, name, timelineCount=None, countApiCalls=True, traceMemory=True):
+        self.name = name
+        self.timelineCount = timelineCount
+        self.stages = {}
+        self.counters = Counter()
+        self.report = None
+        self._current = None
+        self._paused = False
+        self._ownsTracemalloc = traceMemory and not tracemalloc.is_tracing()
+        if self._ownsTracemalloc:
+            tracemalloc.start()
+        self._traceMemory = traceMemory
+        self._previousProfile = sys.getprofile()
+        self._countApiCalls = countApiCalls
+        if countApiCalls:
+            sys.setprofile(self._profileHook)
+        self._startTime = time.perf_counter()
+        self._startedAt = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def _profileHook(self, frame, event, arg):
+        if self._current is None or self._paused:
+            return
+        if event == 'call':
+            if not _isApiModule(frame.f_globals.get('__name__')):
+                return
+            caller = frame.f_back
+            if caller is None or _isApiModule(caller.f_globals.get('__name__')):
+                return
+        elif event == 'c_call':
+            if not _isApiModule(getattr(arg, '__module__', None)) or _isApiModule(frame.f_globals.get('__name__')):
+                return
+        else:
+            return
+        self._current.apiCalls += 1
+
+    def _timeline(self):
+        if self.timelineCount is None:
+            return 0
+        self._paused = True
+        try:
+            return self.timelineCount()
+        finally:
+            self._paused = False
+
+    # Ends the current stage, if any, and starts timing the named one.
+    # A stage can be entered several times, its numbers add up
+    def beginStage(self, name):
+        self.endStage()
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageRecord(name)
+        stage.entries += 1
+        if self._traceMemory and hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self._stageTimeline = self._timeline()
+        self._stageStart = time.perf_counter()
+        self._current = stage
+
+    def endStage(self):
+        stage = self._current
+        if stage is None:
+            return
+        stage.seconds += time.perf_counter() - self._stageStart
+        self._current = None
+        stage.timelineFeatures += self._timeline() - self._stageTimeline
+        if self._traceMemory:
+            stage.peakMemoryBytes = max(stage.peakMemoryBytes, tracemalloc.get_traced_memory()[1])
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    # Stops profiling and returns the report as a dict
+    def finish(self, **extra):
+        if self.report is not None:
+            return self.report
+        self.endStage()
+        totalSeconds = time.perf_counter() - self._startTime
+        if self._countApiCalls:
+            sys.setprofile(self._previousProfile)
+        peak = max((s.peakMemoryBytes for s in self.stages.values()), default=0)
+        if self._ownsTracemalloc:
+            tracemalloc.stop()
+        stages = list(self.stages.values())
+        self.report = {
+            'name': self.name,
+            'startedAt': self._startedAt,
+            'totalSeconds': round(totalSeconds, 6),
+            'apiCalls': sum(s.apiCalls for s in stages),
+            'timelineFeatures': sum(s.timelineFeatures for s in stages),
+            'peakMemoryBytes': peak,
+            'stages': [s.toDict() for s in stages],
+            'counters': dict(self.counters),
+            **extra,
+        }
+        return self.report
+
+    # Writes the finished report as JSON and returns its path
+    def writeReport(self, directory=None):
+        report = self.finish()
+        directory = directory or reportDirectory()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=1)
+        return path
+
+    # Text summary for the TextCommands palette, one line per stage
+    def summary(self):
+        report = self.finish()
+        total = report['totalSeconds'] or 1e-12
+        lines = [f"Profile {report['name']}: {report['totalSeconds']:.2f} s, {report['apiCalls']} API calls, "
+                 f"{report['timelineFeatures']} timeline features, peak {report['peakMemoryBytes'] / 1e6:.1f} MB"]
+        for stage in report['stages']:
+            lines.append(f"  {stage['name']:<20} {stage['seconds']:>8.3f} s {stage['seconds'] / total * 100:>5.1f}% "
+                         f"{stage['apiCalls']:>9} calls {stage['timelineFeatures']:>6} features "
+                         f"{stage['peakMemoryBytes'] / 1e6:>7.1f} MB")
+        for name, value in sorted(report['counters'].items()):
+            lines.append(f"  {name}: {value}")
+        return '\n'.join(lines)
+
+# Stands in for a Profiler when profiling is off
+class NullProfiler:
+
+    enabled = False
+    report = None
+
+    def beginStage(self, name):
+        pass
+
+    def endStage(self):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+    def finish(self, **extra):
+        return None
+
+NULL_PROFILER = NullProfiler()
+
+def create(enabled, name, timelineCount=None):
+    return Profiler(name, timelineCount) if enabled else NULL_PROFILER
@@ -0,0 +1,101 @@
+# Generation-session registry of cells.
+# Each cell is recorded once, when it is built, with its direction angle, source line
+# and source profile. As the cell's body moves through the later stages (copy, CAM-ready,
+# componentize) the new entityTokens are bound to the same record, so every stage can
+# look a body up in constant time instead of searching the design's attributes.
+
+import json
+
+class CellRecord:
+
+    def __init__(self, lineIndex, profileIndex, angle, fingerprint=None, tokens=None, sourceLine=None):
+        self.lineIndex = lineIndex
+        self.profileIndex = profileIndex
+        self.angle = angle
+        self.fingerprint = fingerprint
+        self.tokens = dict(tokens or {})
+
+        # Line index of the congruent cell whose body this cell reuses, None when it has its own
+        self.sourceLine = sourceLine
+
+    def toDict(self):
+        return {
+            'lineIndex': self.lineIndex,
+            'profileIndex': self.profileIndex,
+            'angle': self.angle,
+            'fingerprint': self.fingerprint,
+            'tokens': self.tokens,
+            'sourceLine': self.sourceLine,
+        }
+
+    @classmethod
+    def fromDict(cls, data):
+        return cls(data['lineIndex'], data['profileIndex'], data['angle'], data.get('fingerprint'), data.get('tokens'),
+                   data.get('sourceLine'))
+
+class CellRegistry:
+
+    def __init__(self):
+        self.records = []
+        self.byToken = {}
+
+        # Live entities by token; only valid for the session that created them, never persisted
+        self.entities = {}
+
+    def add(self, stage, token, lineIndex, profileIndex, angle, fingerprint=None, entity=None):
+        record = CellRecord(lineIndex, profileIndex, angle, fingerprint)
+        self.records.append(record)
+        self.bind(record, stage, token, entity)
+        return record
+
+    # Records a cell that is placed as a copy of the congruent cell on sourceLine, it has no body of its own yet
+    def addReuse(self, lineIndex, profileIndex, angle, sourceLine, fingerprint=None):
+        record = CellRecord(lineIndex, profileIndex, angle, fingerprint, sourceLine=sourceLine)
+        self.records.append(record)
+        return record
+
+    def bind(self, record, stage, token, entity=None):
+        record.tokens[stage] = token
+        self.byToken[token] = record
+        if entity is not None:
+            self.entities[token] = entity
+
+    # Binds the bodies that a stage produced, in the same order as the bodies it consumed
+    def bindStage(self, stage, oldTokens, newTokens, newEntities=None):
+        if len(oldTokens) != len(newTokens):
+            raise ValueError(f"Stage '{stage}' produced {len(newTokens)} bodies from {len(oldTokens)}")
+        for i, (oldToken, newToken) in enumerate(zip(oldTokens, newTokens)):
+            record = self.byToken.get(oldToken)
+            if record is not None:
+                self.bind(record, stage, newToken, newEntities[i] if newEntities else None)
+
+    def get(self, token):
+        return self.byToken.get(token)
+
+    def entity(self, record, stage):
+        return self.entities.get(record.tokens.get(stage))
+
+    def remove(self, record):
+        self.records.remove(record)
+        for token in record.tokens.values():
+            self.byToken.pop(token, None)
+            self.entities.pop(token, None)
+
+    def byFingerprint(self):
+        return {r.fingerprint: r for r in self.records if r.fingerprint}
+
+    def __len__(self):
+        return len(self.records)
+
+    def toJson(self):
+        return json.dumps([r.toDict() for r in self.records], separators=(',', ':'))
+
+    @classmethod
+    def fromJson(cls, text):
+        registry = cls()
+        for data in json.loads(text):
+            record = CellRecord.fromDict(data)
+            registry.records.append(record)
+            for token in record.tokens.values():
+                registry.byToken[token] = record
+        return registry
@@ -0,0 +1,170 @@
+# Chunked, cancellable generation.
+#
+# ChunkScheduler runs the per-cell work of a long command a chunk at a time. Between chunks it
+# hands control back to the host (adsk.doEvents in Fusion) so the UI stays responsive and a
+# Cancel click is seen, reports progress, and stops with Cancelled when asked to. A chunk that
+# raises stops the run with ChunkFailed, so the caller can keep the chunks finished before it.
+#
+# A Checkpoint is what a run has finished so far, saved after every chunk: the fingerprint of
+# the run's inputs, the entityTokens of the features it created and one entry per finished cell.
+# A later run with the same input fingerprint picks up after the last entry. A chunk consumes
+# every spawned copy it makes, so only the finished cells need to be recorded.
+# Checkpoints are kept in a CheckpointStore, files next to the document rather than attributes in
+# it: an attribute is written in the command's own transaction and is lost with it in a crash.
+
+import hashlib, json, os, tempfile, uuid
+
+class Cancelled(Exception):
+
+    def __init__(self, done, total):
+        super().__init__(f"Cancelled after {done} of {total}")
+        self.done = done
+        self.total = total
+
+class ChunkFailed(Exception):
+
+    # error is what the chunk raised, done the items finished before it
+    def __init__(self, done, total, error):
+        super().__init__(f"Failed after {done} of {total}: {error!r}")
+        self.done = done
+        self.total = total
+        self.error = error
+
+class ChunkScheduler:
+
+    # yieldEvents is called before every chunk, then isCancelled is checked.
+    # onProgress gets the number of items done after every chunk
+    def __init__(self, chunkSize=50, yieldEvents=None, onProgress=None, isCancelled=None):
+        self.chunkSize = max(1, chunkSize)
+        self.yieldEvents = yieldEvents
+        self.onProgress = onProgress
+        self.isCancelled = isCancelled
+        self.chunks = 0
+
+    # Passes items to processChunk in slices of chunkSize.
+    # done & total only feed the progress report, so a resumed run can count its earlier work.
+    # Returns the number of items done
+    def run(self, items, processChunk, done=0, total=None):
+        total = done + len(items) if total is None else total
+        for start in range(0, len(items), self.chunkSize):
+            if self.yieldEvents:
+                self.yieldEvents()
+            if self.isCancelled and self.isCancelled():
+                raise Cancelled(done, total)
+            chunk = items[start:start + self.chunkSize]
+            try:
+                processChunk(chunk)
+            except Exception as e:
+                raise ChunkFailed(done, total, e) from e
+            self.chunks += 1
+            done += len(chunk)
+            if self.onProgress:
+                self.onProgress(done)
+        return done
+
+class Checkpoint:
+
+    # Checkpoints saved by a version with a different layout are not resumed
+    VERSION = 2
+
+    def __init__(self, runFingerprint, total, features=None, cells=None, version=VERSION):
+        self.runFingerprint = runFingerprint
+        self.total = total
+        self.version = version
+
+        # entityToken by role, e.g. the first feature of the run
+        self.features = dict(features or {})
+
+        # [(direction line index, body entityToken)] in build order, the token is None for skipped cells
+        self.cells = [tuple(cell) for cell in (cells or [])]
+
+    def completedLines(self):
+        return {lineIndex for lineIndex, _ in self.cells}
+
+    # The owned profiles [(profile, line index)] that have no cell yet, in their original order
+    def remaining(self, ownedProfiles):
+        completed = self.completedLines()
+        return [(profileData, lineIndex) for profileData, lineIndex in ownedProfiles if lineIndex not in completed]
+
+    def addCells(self, lineIndices, tokensByLine):
+        self.cells.extend((lineIndex, tokensByLine.get(lineIndex)) for lineIndex in lineIndices)
+
+    def tokens(self):
+        return list(self.features.values()) + [token for _, token in self.cells if token]
+
+    def toJson(self):
+        return json.dumps({
+            'version': self.version,
+            'runFingerprint': self.runFingerprint,
+            'total': self.total,
+            'features': self.features,
+            'cells': self.cells,
+        }, separators=(',', ':'))
+
+    @classmethod
+    def fromJson(cls, text):
+        data = json.loads(text)
+        return cls(data['runFingerprint'], data['total'], data.get('features'), data.get('cells'), data.get('version', 1))
+
+# Checkpoint directory, a folder in the system temp directory when not set
+DIR_ENV = 'ABSTRACT_CELL_CHECKPOINT_DIR'
+
+def directoryFromEnvironment():
+    return os.environ.get(DIR_ENV) or os.path.join(tempfile.gettempdir(), 'AbstractCellGen', 'checkpoints')
+
+# One checkpoint file per document, named after the document and the run's input fingerprint.
+# Files are written under a temporary name and renamed into place, so a crash mid-write leaves
+# the previous checkpoint as it was
+class CheckpointStore:
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _documentKey(self, documentId):
+        return hashlib.sha1(str(documentId).encode('utf-8')).hexdigest()
+
+    def path(self, documentId, runFingerprint):
+        return os.path.join(self.directory, f"{self._documentKey(documentId)}-{runFingerprint}.json")
+
+    def _documentPaths(self, documentId):
+        prefix = self._documentKey(documentId) + '-'
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.startswith(prefix) and name.endswith('.json')]
+
+    # The document's checkpoint for this run, None when there is none or it cannot be resumed.
+    # Returns (checkpoint, stale): stale is True when the document has checkpoints of other runs,
+    # other versions or unreadable ones, which load drops
+    def load(self, documentId, runFingerprint):
+        wanted = self.path(documentId, runFingerprint)
+        checkpoint, stale = None, False
+        for path in self._documentPaths(documentId):
+            if path == wanted:
+                try:
+                    with open(path) as f:
+                        saved = Checkpoint.fromJson(f.read())
+                    if saved.version == Checkpoint.VERSION and saved.runFingerprint == runFingerprint:
+                        checkpoint = saved
+                        continue
+                except (OSError, ValueError, KeyError):
+                    pass
+            stale = True
+            self._remove(path)
+        return checkpoint, stale
+
+    def save(self, documentId, checkpoint):
+        path = self.path(documentId, checkpoint.runFingerprint)
+        stagingPath = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        with open(stagingPath, 'w') as f:
+            f.write(checkpoint.toJson())
+        os.replace(stagingPath, path)
+
+    def clear(self, documentId):
+        for path in self._documentPaths(documentId):
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
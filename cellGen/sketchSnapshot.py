@@ -0,0 +1,89 @@
+# Column snapshot of a sketch's direction lines.
+#
+# fusionIO.readDirectionLines walks the sketch's lines once and keeps the endpoints of every
+# construction line in flat array('d') columns, in sketch space, plus the one matrix that maps the
+# sketch to world space. Angles, midpoints, placement matrices and fingerprints are then computed
+# from the columns in plain Python, without another call into the API.
+
+import math
+from array import array
+
+from . import fingerprint, layout
+
+class LineSnapshot:
+
+    # sketchToWorld is the row-major 4x4 matrix from sketch space to world space
+    def __init__(self, sketchToWorld=layout.IDENTITY, lineCount=0):
+        self.sketchToWorld = tuple(sketchToWorld)
+
+        # Lines in the sketch, construction or not
+        self.lineCount = lineCount
+
+        # Index of each snapshot line in the sketch's sketchLines
+        self.sourceIndex = array('l')
+        self.startX = array('d')
+        self.startY = array('d')
+        self.startZ = array('d')
+        self.endX = array('d')
+        self.endY = array('d')
+        self.endZ = array('d')
+        self._world = None
+
+    def __len__(self):
+        return len(self.sourceIndex)
+
+    def append(self, sourceIndex, start, end):
+        self.sourceIndex.append(sourceIndex)
+        self.startX.append(start[0])
+        self.startY.append(start[1])
+        self.startZ.append(start[2])
+        self.endX.append(end[0])
+        self.endY.append(end[1])
+        self.endZ.append(end[2])
+        self._world = None
+
+    # Direction of each line in degrees, 90 degrees off the sketch X axis, as the spawn body is placed
+    def angles(self):
+        return [90 + math.degrees(math.atan2(ey - sy, ex - sx))
+                for sx, sy, ex, ey in zip(self.startX, self.startY, self.endX, self.endY)]
+
+    # (world starts, world ends) as [(x, y, z)], computed once
+    def worldEndpoints(self):
+        if self._world is None:
+            m = self.sketchToWorld
+            def transform(xs, ys, zs):
+                return [(m[0] * x + m[1] * y + m[2] * z + m[3],
+                         m[4] * x + m[5] * y + m[6] * z + m[7],
+                         m[8] * x + m[9] * y + m[10] * z + m[11]) for x, y, z in zip(xs, ys, zs)]
+            self._world = (transform(self.startX, self.startY, self.startZ), transform(self.endX, self.endY, self.endZ))
+        return self._world
+
+    def worldMidpoints(self):
+        starts, ends = self.worldEndpoints()
+        return [((s[0] + e[0]) / 2, (s[1] + e[1]) / 2, (s[2] + e[2]) / 2) for s, e in zip(starts, ends)]
+
+    # Midpoints as (x, y) in the space of another sketch, given that sketch's sketch-to-world matrix
+    def midpointsIn(self, targetSketchToWorld):
+        m = layout.invertRigid(targetSketchToWorld)
+        return [(m[0] * x + m[1] * y + m[2] * z + m[3], m[4] * x + m[5] * y + m[6] * z + m[7])
+                for x, y, z in self.worldMidpoints()]
+
+    # Per line, the world transform that turns a body by the line's angle about fromPoint
+    # and then moves fromPoint onto the line's midpoint, as row-major 4x4 tuples
+    def placementMatrices(self, fromPoint):
+        fx, fy, fz = fromPoint
+        matrices = []
+        for angle, (mx, my, mz) in zip(self.angles(), self.worldMidpoints()):
+            c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+            matrices.append((c, -s, 0.0, mx - c * fx + s * fy,
+                             s, c, 0.0, my - s * fx - c * fy,
+                             0.0, 0.0, 1.0, mz - fz,
+                             0.0, 0.0, 0.0, 1.0))
+        return matrices
+
+    # Per line, the fingerprint of its sketch & world endpoints
+    def fingerprints(self):
+        starts, ends = self.worldEndpoints()
+        return [fingerprint.lineFingerprint((sx, sy, sz) + start, (ex, ey, ez) + end)
+                for sx, sy, sz, ex, ey, ez, start, end
+                in zip(self.startX, self.startY, self.startZ, self.endX, self.endY, self.endZ, starts, ends)]
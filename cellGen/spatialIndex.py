@@ -0,0 +1,86 @@
+# Uniform-grid spatial index over 2D points and boxes.
+# Entries are stored by the index they were inserted with, so a query hands back
+# the direction line index directly (placementMatrices[i], angleIndexes[i], ...).
+
+import math
+
+class UniformGrid:
+
+    def __init__(self, cellSize, originX=0.0, originY=0.0):
+        if cellSize <= 0:
+            raise ValueError("cellSize must be positive")
+        self.cellSize = cellSize
+        self.originX = originX
+        self.originY = originY
+        self.cells = {}
+        self.points = {}
+        self.boxes = {}
+
+    # Builds a grid sized so each cell holds about perCell points
+    @classmethod
+    def fromPoints(cls, points, perCell=2.0):
+        points = list(points)
+        if not points:
+            return cls(1.0)
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        minX, minY = min(xs), min(ys)
+        width = max(xs) - minX
+        height = max(ys) - minY
+        area = max(width * height, max(width, height) ** 2 / len(points), 1e-12)
+        cellSize = math.sqrt(area * perCell / len(points))
+        grid = cls(cellSize, minX, minY)
+        for index, (x, y) in enumerate(points):
+            grid.insertPoint(index, x, y)
+        return grid
+
+    def cellOf(self, x, y):
+        return (int(math.floor((x - self.originX) / self.cellSize)),
+                int(math.floor((y - self.originY) / self.cellSize)))
+
+    def insertPoint(self, index, x, y):
+        self.points[index] = (x, y)
+        self.cells.setdefault(self.cellOf(x, y), []).append(index)
+
+    def insertBox(self, index, minX, minY, maxX, maxY):
+        self.boxes[index] = (minX, minY, maxX, maxY)
+        i0, j0 = self.cellOf(minX, minY)
+        i1, j1 = self.cellOf(maxX, maxY)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self.cells.setdefault((i, j), []).append(index)
+
+    def remove(self, index):
+        if index in self.points:
+            x, y = self.points.pop(index)
+            self.cells[self.cellOf(x, y)].remove(index)
+            return
+        minX, minY, maxX, maxY = self.boxes.pop(index)
+        i0, j0 = self.cellOf(minX, minY)
+        i1, j1 = self.cellOf(maxX, maxY)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self.cells[(i, j)].remove(index)
+
+    # Returns the sorted indices of every point inside, or box overlapping, the query box
+    def query(self, minX, minY, maxX, maxY):
+        i0, j0 = self.cellOf(minX, minY)
+        i1, j1 = self.cellOf(maxX, maxY)
+        found = set()
+        cells = self.cells
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(cells):
+            candidates = [idx for key, bucket in cells.items()
+                          if i0 <= key[0] <= i1 and j0 <= key[1] <= j1 for idx in bucket]
+        else:
+            candidates = [idx for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)
+                          for idx in cells.get((i, j), ())]
+        for idx in candidates:
+            point = self.points.get(idx)
+            if point is not None:
+                if minX <= point[0] <= maxX and minY <= point[1] <= maxY:
+                    found.add(idx)
+            else:
+                bMinX, bMinY, bMaxX, bMaxY = self.boxes[idx]
+                if bMinX <= maxX and bMaxX >= minX and bMinY <= maxY and bMaxY >= minY:
+                    found.add(idx)
+        return sorted(found)
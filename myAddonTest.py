@@ -1,7 +1,9 @@
 #Author-Autodesk
 #Description-Demonstrates the creation of a custom feature.
 
-import adsk.core, adsk.fusion, traceback, random, math
+import adsk.core, adsk.fusion, traceback, random, math, time
+
+from .cellGen import geometry, fusionIO, bounds, frustum, fusionBuild, fingerprint, preview, registry, layout, profiling, logger, scheduler, congruence, planner, bodyCache, export
 
 _app: adsk.core.Application = None
 _ui: adsk.core.UserInterface = None
@@ -15,11 +17,82 @@ _spawnBodySelectInput: adsk.core.SelectionCommandInput = None
 _destPlaneInput: adsk.core.SelectionCommandInput = None
 _cellHeightInput: adsk.core.ValueCommandInput = None
 _cellChamferAngleInput: adsk.core.ValueCommandInput = None
+_spawnModeInput: adsk.core.DropDownCommandInput = None
+_buildEngineInput: adsk.core.DropDownCommandInput = None
+_layoutModeInput: adsk.core.DropDownCommandInput = None
+_nestPartsInput: adsk.core.BoolValueCommandInput = None
+_reuseCongruentInput: adsk.core.BoolValueCommandInput = None
+_profileInput: adsk.core.BoolValueCommandInput = None
+_outputModeInput: adsk.core.DropDownCommandInput = None
+_exportFormatInput: adsk.core.DropDownCommandInput = None
+_exportFolderInput: adsk.core.StringValueCommandInput = None
+_exportBatchInput: adsk.core.IntegerSpinnerCommandInput = None
+
+# How the per-line copies of the spawn body are created
+SPAWN_MODE_PER_LINE = 'Per Line'
+SPAWN_MODE_BATCHED = 'Batched'
+
+# How the cells are extruded, chamfered & intersected
+BUILD_ENGINE_PARAMETRIC = 'Parametric'
+BUILD_ENGINE_DIRECT = 'Direct'
+
+# How the CAM-ready SubComponents are positioned on the destination plane
+LAYOUT_MODE_TRANSFORM = 'Transform'
+LAYOUT_MODE_JOINTS = 'Transform + Planar Joints'
+
+# Cells built between two UI updates, cancel checks & checkpoints
+GENERATION_CHUNK_SIZE = 50
+
+# Where the cells go: into the design, or laid out and written straight to files
+OUTPUT_MODE_DESIGN = 'Design'
+OUTPUT_MODE_EXPORT = 'Export Files'
+
+# Cells per exported file by default, 0 writes one file
+EXPORT_CELLS_PER_FILE = 200
 
 _editedCustomFeature: adsk.fusion.CustomFeature = None
 _restoreTimelineObject: adsk.fusion.TimelineObject = None
 _isRolledForEdit = False
 
+# Profile bounds are cached for the life of each create command
+_boundsCache: bounds.BoundsCache = None
+
+# When True, every profile's analytic bounds are checked against the old
+# TemporaryBRepManager / MeasureManager path and the differences are reported
+_verifyBoundsMode = False
+
+# When True, the parametric build is kept as the output and every cell is also built
+# by the direct engine, reporting any difference in body count or volume
+_verifyDirectBuildMode = False
+
+# Preview state, kept for the life of each create command
+_previewCache: preview.PreviewCache = None
+_previewGraphicsGroup: adsk.fusion.CustomGraphicsGroup = None
+_previewMeshGraphics: adsk.fusion.CustomGraphicsMesh = None
+_previewMesh = None
+
+# Recently built cells of each custom feature by fingerprint, so a recompute that returns to an earlier state
+# rebuilds nothing. Only the features recomputed last keep theirs, and all are dropped when a document closes
+CELL_CACHE_FEATURES = 4
+CELL_CACHE_ENTRIES = 256
+_cellBodyCaches = fingerprint.LruCache(CELL_CACHE_FEATURES)
+
+# Finished cells on disk by fingerprint, shared by every document and session. None when turned off
+_cellDiskCache: bodyCache.DiskCache = None
+
+# Checkpoints of interrupted runs, kept outside the design so they outlive the command's transaction. None when unavailable
+_checkpointStore: scheduler.CheckpointStore = None
+
+# Stage timings of the running generation, a no-op unless profiling was asked for
+_profiler = profiling.NULL_PROFILER
+
+# Progress of the running generation, cancelling it stops after the current chunk of cells
+_progressDialog: adsk.core.ProgressDialog = None
+
+# Progress & diagnostics, written to the TextCommands palette in batches.
+# Per-cell messages are DEBUG, so at the default INFO level a run does no per-cell UI work
+_log = logger.Logger(logger.levelFromEnvironment())
+
 def getPreciseBoundingBox3D(
     profile :adsk.fusion.Profile
     ) -> adsk.core.BoundingBox3D:
@@ -62,6 +135,26 @@ def getPreciseBoundingBox3D(
 
     # return adsk.core.BoundingBox3D.create(minPnt, maxPnt)
 
+# Verification mode for the analytic profile bounds.
+# Runs getPreciseBoundingBox3D for every profile and reports how far the two results differ, in sketch space
+def verifyAnalyticBounds(boundarySketch :adsk.fusion.Sketch, profiles, boundsCache :bounds.BoundsCache):
+
+    worstDeviation = 0.0
+    for profileData in profiles:
+        minPnt, maxPnt = getPreciseBoundingBox3D(profileData.source)
+        minSketchPnt = boundarySketch.modelToSketchSpace(minPnt)
+        maxSketchPnt = boundarySketch.modelToSketchSpace(maxPnt)
+        preciseBox = (min(minSketchPnt.x, maxSketchPnt.x), min(minSketchPnt.y, maxSketchPnt.y),
+                      max(minSketchPnt.x, maxSketchPnt.x), max(minSketchPnt.y, maxSketchPnt.y))
+
+        deviation = bounds.boundsDeviation(preciseBox, boundsCache.get(profileData))
+        worstDeviation = max(worstDeviation, deviation)
+        if deviation > boundsCache.tolerance:
+            _log.warning("Profile %d: analytic bounds differ by %.6f cm", profileData.index, deviation)
+
+    _log.info("Bounds verification: %d profiles, max deviation %.6f cm", len(profiles), worstDeviation)
+    return worstDeviation
+
 # Mainly for fast prototyping, to avoid repetitively selecting things in the UI
 def getSketchByName(name):
 
@@ -76,6 +169,25 @@ def run(context):
         _app = adsk.core.Application.get()
         _ui  = _app.userInterface
 
+        _log.addSink(writeToPalette)
+        logFile = logger.logFileFromEnvironment()
+        if logFile:
+            _log.addSink(logger.RotatingFileSink(logFile))
+
+        global _cellDiskCache
+        try:
+            _cellDiskCache = bodyCache.fromEnvironment()
+            if _cellDiskCache and _cellDiskCache.dropped:
+                _log.info("Cell cache: dropped %d cells cached under an earlier key version", _cellDiskCache.dropped)
+        except OSError as e:
+            _log.warning("Cell cache turned off: %s", e)
+
+        global _checkpointStore
+        try:
+            _checkpointStore = scheduler.CheckpointStore(scheduler.directoryFromEnvironment())
+        except OSError as e:
+            _log.warning("Checkpoints turned off, interrupted runs start over: %s", e)
+
         # Create the command definition for the creation command.
         createCmdDef = _ui.commandDefinitions.addButtonDefinition('adskCustomPocketCreate', 
                                                                     'Custom Pocket', 
@@ -108,12 +220,20 @@ def run(context):
         computeCustomFeature = ComputeCustomFeature()
         _customFeatureDef.customFeatureCompute.add(computeCustomFeature)
         _handlers.append(computeCustomFeature)
+
+        # Cached cells are dropped with the documents they were built for
+        documentClosed = DocumentClosedHandler()
+        _app.documentClosed.add(documentClosed)
+        _handlers.append(documentClosed)
     except:
         showMessage('Run Failed:\n{}'.format(traceback.format_exc()))
 
 
 def stop(context):
     try:
+        _log.close()
+        _cellBodyCaches.clear()
+
         # Remove all UI elements.
         solidWS = _ui.workspaces.itemById('FusionSolidEnvironment')
         panel = solidWS.toolbarPanels.itemById('SolidCreatePanel')
@@ -149,6 +269,20 @@ class CreatePocketCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             global _cellHeightInput
             global _spawnBodySelectInput 
             global _destPlaneInput
+            global _spawnModeInput
+            global _buildEngineInput
+            global _layoutModeInput
+            global _nestPartsInput
+            global _reuseCongruentInput
+            global _profileInput
+            global _outputModeInput
+            global _exportFormatInput
+            global _exportFolderInput
+            global _exportBatchInput
+            global _boundsCache
+            global _previewCache
+            _boundsCache = bounds.BoundsCache()
+            _previewCache = preview.PreviewCache()
             # _lengthInput
             # _widthInput
             # depthInput
@@ -189,11 +323,54 @@ class CreatePocketCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             default = adsk.core.ValueInput.createByString("30 deg")
             _cellChamferAngleInput = inputs.addAngleValueCommandInput('cellChamferAngleInput', 'cellChamferAngleInput', default)
 
+            _spawnModeInput = inputs.addDropDownCommandInput('spawnModeInput', 'SpawnMode', adsk.core.DropDownStyles.TextListDropDownStyle)
+            _spawnModeInput.listItems.add(SPAWN_MODE_PER_LINE, True)
+            _spawnModeInput.listItems.add(SPAWN_MODE_BATCHED, False)
+            _spawnModeInput.tooltip = 'Per Line adds a copy and a move feature per direction line, Batched adds all copies in one Base Feature'
+
+            _buildEngineInput = inputs.addDropDownCommandInput('buildEngineInput', 'BuildEngine', adsk.core.DropDownStyles.TextListDropDownStyle)
+            _buildEngineInput.listItems.add(BUILD_ENGINE_PARAMETRIC, True)
+            _buildEngineInput.listItems.add(BUILD_ENGINE_DIRECT, False)
+            _buildEngineInput.tooltip = 'Parametric adds an extrude, chamfer and combine per cell, Direct builds all cells in memory and adds one Base Feature'
+
+            _layoutModeInput = inputs.addDropDownCommandInput('layoutModeInput', 'LayoutMode', adsk.core.DropDownStyles.TextListDropDownStyle)
+            _layoutModeInput.listItems.add(LAYOUT_MODE_TRANSFORM, True)
+            _layoutModeInput.listItems.add(LAYOUT_MODE_JOINTS, False)
+            _layoutModeInput.tooltip = 'Transform places every CAM-ready part directly, Planar Joints also adds a joint per part to slide it around'
+
+            _nestPartsInput = inputs.addBoolValueInput('nestPartsInput', 'NestParts', True, '', True)
+            _nestPartsInput.tooltip = 'Pack the CAM-ready parts inside the destination profile, otherwise they are laid out in rows'
+
+            _reuseCongruentInput = inputs.addBoolValueInput('reuseCongruentInput', 'Reuse Congruent Cells', True, '', True)
+            _reuseCongruentInput.tooltip = 'Build cells that are the same shape, with the direction line in the same place, once and place the others as copies of its component'
+
+            _profileInput = inputs.addBoolValueInput('profileInput', 'Profile', True, '', profiling.enabledFromEnvironment())
+            _profileInput.tooltip = f'Time every stage and write a JSON report (also on when {profiling.ENABLE_ENV}=1)'
+
+            _outputModeInput = inputs.addDropDownCommandInput('outputModeInput', 'OutputMode', adsk.core.DropDownStyles.TextListDropDownStyle)
+            _outputModeInput.listItems.add(OUTPUT_MODE_DESIGN, True)
+            _outputModeInput.listItems.add(OUTPUT_MODE_EXPORT, False)
+            _outputModeInput.tooltip = 'Design adds the cells, CAM-ready parts & custom feature to the design, Export Files builds the laid out cells in memory and writes them to files with a manifest, adding nothing to the design'
+
+            _exportFormatInput = inputs.addDropDownCommandInput('exportFormatInput', 'ExportFormat', adsk.core.DropDownStyles.TextListDropDownStyle)
+            _exportFormatInput.listItems.add(export.FORMAT_STEP, True)
+            _exportFormatInput.listItems.add(export.FORMAT_SMT, False)
+            _exportFormatInput.listItems.add(export.FORMAT_STL, False)
+
+            _exportFolderInput = inputs.addStringValueInput('exportFolderInput', 'ExportFolder', export.defaultDirectory())
+
+            _exportBatchInput = inputs.addIntegerSpinnerCommandInput('exportBatchInput', 'CellsPerFile', 0, 100000, 50, EXPORT_CELLS_PER_FILE)
+            _exportBatchInput.tooltip = 'Cells written to each file, 0 writes every cell to one file'
+
              
             # Connect to the needed command related events.
-            # onExecutePreview = ExecutePreviewHandler()
-            # cmd.executePreview.add(onExecutePreview)
-            # _handlers.append(onExecutePreview)
+            onExecutePreview = ExecutePreviewHandler()
+            cmd.executePreview.add(onExecutePreview)
+            _handlers.append(onExecutePreview)
+
+            onDestroy = CreateDestroyHandler()
+            cmd.destroy.add(onDestroy)
+            _handlers.append(onDestroy)
 
             onExecute = CreateExecuteHandler()
             cmd.execute.add(onExecute)
@@ -212,24 +389,38 @@ class CreateExecuteHandler(adsk.core.CommandEventHandler):
 
         try:
             eventArgs: adsk.fusion.CustomFeatureEventArgs = args
-            directionLineMidpointsCol, copiedBodiesCol = spawnBodyCopies(args)
+            clearPreview()
+            spawnBodyCopies(args)
 
         except:
             eventArgs.executeFailed = True
             showMessage('Execute: {}\n'.format(traceback.format_exc()))
 
 # Event handler for the executePreview event.
+# Only draws transient graphics, no features are created until the command executes
 class ExecutePreviewHandler(adsk.core.CommandEventHandler):
     def __init__(self):
         super().__init__()
     def notify(self, args):
         try:
             
-            spawnBodyCopies(args)
+            updatePreview()
 
         except:
             showMessage('ExecutePreview: {}\n'.format(traceback.format_exc()))       
 
+# Event handler for the destroy event of the create command.
+class CreateDestroyHandler(adsk.core.CommandEventHandler):
+    def __init__(self):
+        super().__init__()
+    def notify(self, args):
+        try:
+            
+            clearPreview()
+
+        except:
+            showMessage('Destroy: {}\n'.format(traceback.format_exc()))       
+
 # Event handler to handle the compute of the custom feature.
 class ComputeCustomFeature(adsk.fusion.CustomFeatureEventHandler):
     def __init__(self):
@@ -237,16 +428,302 @@ class ComputeCustomFeature(adsk.fusion.CustomFeatureEventHandler):
     def notify(self, args):
         try:
             eventArgs: adsk.fusion.CustomFeatureEventArgs = args
+            recomputeCustomFeature(eventArgs.customFeature, eventArgs.computeStatus)
 
-            showMessage(f"ComputeCustomFeature(adsk.fusion.CustomFeatureEventHandler)")
-
-            # directionLineMidpointsCol, copiedBodiesCol = spawnBodyCopies(args)
-
+        except:
+            showMessage('CustomFeatureCompute: {}\n'.format(traceback.format_exc()))
+        finally:
+            _log.flush()
 
-            # showMessage(f"hit 3b")
+# Event handler to drop the cached cells of custom features when a document closes.
+# Entity tokens do not say which document they belong to, so every feature's cache is dropped
+class DocumentClosedHandler(adsk.core.DocumentEventHandler):
+    def __init__(self):
+        super().__init__()
+    def notify(self, args):
+        try:
+            _cellBodyCaches.clear()
 
         except:
-            showMessage('CustomFeatureCompute: {}\n'.format(traceback.format_exc()))
+            showMessage('DocumentClosed: {}\n'.format(traceback.format_exc()))
+
+# Brings the custom feature up to date with its inputs, rebuilding only the cells whose input fingerprint changed.
+# The Direct engine's changed cells are rebuilt in place in its Base Feature, so their copies in "Copied Bodies" and
+# the CAM-Ready parts made from them recompute with them, then every part is laid out again for the new footprints.
+# A compute cannot add components or features, so an edit that adds or removes cells, changes which cells reuse a
+# congruent one or changes the cells of a Parametric feature is rejected with an error on the feature instead
+def recomputeCustomFeature(customFeature :adsk.fusion.CustomFeature, computeStatus :adsk.fusion.FeatureComputeStatus=None):
+
+    startTime = time.perf_counter()
+    design = adsk.fusion.Design.cast(_app.activeProduct)
+    boundarySketch: adsk.fusion.Sketch = customFeature.dependencies.itemById('boundarySketch').entity
+    directionSketch: adsk.fusion.Sketch = customFeature.dependencies.itemById('directionSketch').entity
+    spawnBody: adsk.fusion.BRepBody = customFeature.dependencies.itemById('spawnBody').entity
+    height = customFeature.parameters.itemById('cellHeight').value
+    chamferAngle = customFeature.parameters.itemById('cellChamferAngle').value
+
+    # Restore the cell registry saved with the feature
+    registryAttr = customFeature.attributes.itemByName('AbstractCellGen1', 'CellRegistry')
+    if not registryAttr:
+        rejectRecompute(computeStatus, "the feature has no cell registry, run the command again to regenerate it")
+        return
+    cellRegistry = registry.CellRegistry.fromJson(registryAttr.value)
+
+    # Fingerprint every cell as it would be built now, and group the cells as a new run would
+    directionLines, angles, placementMatrices, lineFingerprints = readDirectionLines(directionSketch, spawnBody)
+    profiles = fusionIO.readProfiles(boundarySketch)
+    midpoints2D = directionLines.midpointsIn(fusionIO.sketchToWorldMatrix(boundarySketch))
+    ownedProfiles = geometry.classifyProfiles(profiles, midpoints2D, boundsOf=bounds.BoundsCache().get)
+    cellFingerprints = getCellFingerprints(boundarySketch, ownedProfiles, lineFingerprints, spawnBody, height, chamferAngle)
+    if customFeature.attributes.itemByName('AbstractCellGen1', 'ReuseCongruent'):
+        cellClasses = congruence.classifyCells(ownedProfiles, midpoints2D, [math.radians(angle) for angle in angles])
+    else:
+        cellClasses = congruence.singletonClasses(ownedProfiles)
+    boundaryTransform = fusionIO.matrixData(boundarySketch.transform)
+    reuseTransforms = {lineIndex: (cellClass.representative[1], congruence.worldTransform(boundaryTransform, transform))
+                       for cellClass in cellClasses for _, lineIndex, transform in cellClass.members[1:]}
+
+    # Every cell the feature holds is matched to a cell of the edit: an unchanged fingerprint keeps it as it is,
+    # an edited cell takes over the record, and so the body & part, of the cell on its line or else its profile
+    kept, toBuild, staleRecords = fingerprint.planIncrementalUpdate(cellRegistry.byFingerprint(), list(zip(cellFingerprints, ownedProfiles)))
+    edited, addedCells, removedRecords = fingerprint.matchEdits(toBuild, staleRecords,
+                                                                [(lambda item: item[1], lambda record: record.lineIndex),
+                                                                 (lambda item: item[0].index, lambda record: record.profileIndex)])
+    if addedCells or removedRecords:
+        rejectRecompute(computeStatus, f"the edit adds {len(addedCells)} and removes {len(removedRecords)} cells, "
+                                       "run the command again to regenerate the feature")
+        return
+    lineByRecord = {id(record): lineIndex for (_, lineIndex), record in kept}
+    lineByRecord.update({id(record): lineIndex for _, (_, lineIndex), record in edited})
+    lineByOldLine = {record.lineIndex: lineByRecord[id(record)] for record in cellRegistry.records}
+    for record in cellRegistry.records:
+        sourceLine = lineByOldLine.get(record.sourceLine) if record.sourceLine is not None else None
+        wantedSource = reuseTransforms[lineByRecord[id(record)]][0] if lineByRecord[id(record)] in reuseTransforms else None
+        if sourceLine != wantedSource:
+            rejectRecompute(computeStatus, "the edit changes which cells reuse a congruent cell, run the command again "
+                                           "to regenerate the feature")
+            return
+    if not edited:
+        _log.info("Recompute: all %d cells are up to date", len(kept))
+        return
+
+    # Only the Direct engine keeps its cells where a compute can rebuild them
+    baseFeature = cellBaseFeature(customFeature)
+    if baseFeature is None:
+        rejectRecompute(computeStatus, f"{len(edited)} cells changed, cells built with the Parametric engine are not rebuilt "
+                                       "by a recompute. Run the command again, or build with the Direct engine to edit in place")
+        return
+    bodiesByFp = {}
+    for index in range(baseFeature.bodies.count):
+        body = baseFeature.bodies.item(index)
+        attr = body.attributes.itemByName('AbstractCellGen1', 'CellFingerprint')
+        if attr:
+            bodiesByFp[attr.value] = body
+
+    # Build the changed cells first, from the feature's in-memory cache where possible, so a cell that
+    # cannot be built leaves the feature untouched
+    tmpMgr = adsk.fusion.TemporaryBRepManager.get()
+    cellCache = featureCellCache(customFeature)
+    builtCells = []
+    for fp, (profileData, pointIndex), record in edited:
+        if record.sourceLine is not None:
+            continue
+        body = bodiesByFp.get(record.fingerprint)
+        if body is None:
+            rejectRecompute(computeStatus, f"the body of the cell on line {record.lineIndex} is missing, run the command again "
+                                           "to regenerate the feature")
+            return
+        tmpBody = cellCache.get(fp)
+        if tmpBody is None:
+            cells = buildCellBodiesDirect(boundarySketch, [(profileData, pointIndex)], spawnBody, placementMatrices, height, chamferAngle,
+                                          fingerprintByLine={pointIndex: fp})
+            if not cells:
+                rejectRecompute(computeStatus, f"the cell on line {pointIndex} could not be built")
+                return
+            tmpBody = cells[0][0]
+            cellCache.put(fp, tmpMgr.copy(tmpBody))
+        else:
+            tmpBody = tmpMgr.copy(tmpBody)
+        builtCells.append((fp, pointIndex, body, tmpBody))
+
+    # Changed cells replace their bodies in place, so features downstream keep their references
+    baseFeature.startEdit()
+    try:
+        for fp, pointIndex, body, tmpBody in builtCells:
+            cellCache.put(body.attributes.itemByName('AbstractCellGen1', 'CellFingerprint').value, tmpMgr.copy(body))
+            baseFeature.updateBody(body, tmpBody)
+            body.attributes.add('AbstractCellGen1', 'CellFingerprint', fp)
+            body.attributes.add('AbstractCellGen1', 'BodyAngle', str(angles[pointIndex]))
+    finally:
+        baseFeature.finishEdit()
+
+    # Line & profile indices can shift when the sketches are edited
+    for fp, (profileData, pointIndex), record in edited:
+        record.fingerprint = fp
+    for (profileData, pointIndex), record in kept + [(item, record) for _, item, record in edited]:
+        record.lineIndex = pointIndex
+        record.profileIndex = profileData.index
+        record.angle = angles[pointIndex]
+        record.sourceLine = reuseTransforms[pointIndex][0] if pointIndex in reuseTransforms else None
+
+    # The parts follow their cells' new footprints
+    relayoutParts(customFeature, design, cellRegistry, ownedProfiles, reuseTransforms, boundaryTransform)
+    customFeature.attributes.add('AbstractCellGen1', 'CellRegistry', cellRegistry.toJson())
+
+    _log.info("Recomputed %d cells, %d reusing cells moved, %d cells unchanged in %.2f s",
+              len(builtCells), len(edited) - len(builtCells), len(kept), time.perf_counter() - startTime)
+
+# Leaves the feature as it is, and says why on the feature and in the log
+def rejectRecompute(computeStatus :adsk.fusion.FeatureComputeStatus, message):
+
+    _log.error("Recompute rejected: %s", message)
+    if computeStatus:
+        computeStatus.statusMessages.addError('AbstractCellGen1RecomputeRejected', message)
+
+# The Base Feature the Direct engine built the cells in, None for a Parametric feature
+def cellBaseFeature(customFeature :adsk.fusion.CustomFeature):
+
+    for feature in customFeature.features:
+        if feature.objectType != adsk.fusion.BaseFeature.classType():
+            continue
+        for index in range(feature.bodies.count):
+            if feature.bodies.item(index).attributes.itemByName('AbstractCellGen1', 'CellFingerprint'):
+                return feature
+    return None
+
+# The in-memory cell cache of one custom feature
+def featureCellCache(customFeature :adsk.fusion.CustomFeature):
+
+    cellCache = _cellBodyCaches.get(customFeature.entityToken)
+    if cellCache is None:
+        cellCache = fingerprint.LruCache(CELL_CACHE_ENTRIES)
+        _cellBodyCaches.put(customFeature.entityToken, cellCache)
+    return cellCache
+
+# Lays the CAM-Ready parts out again as generateCells did, for the footprints the cells have now,
+# and moves the in-place occurrences of reusing cells in "Copied Bodies" onto their cells
+def relayoutParts(customFeature :adsk.fusion.CustomFeature, design :adsk.fusion.Design, cellRegistry :registry.CellRegistry,
+                  ownedProfiles, reuseTransforms, boundaryTransform):
+
+    destDependency = customFeature.dependencies.itemById('destProfile')
+    if destDependency is None:
+        _log.warning("Parts not laid out again: the feature does not record its destination profile")
+        return
+    profileByLine = {pointIndex: profileData for profileData, pointIndex in ownedProfiles}
+    placedRecords = ([record for record in cellRegistry.records if record.sourceLine is None]
+                     + [record for record in cellRegistry.records if record.sourceLine is not None])
+    footprints = [layout.transformPoints(boundaryTransform, profileByLine[record.lineIndex].outerPolygon()) for record in placedRecords]
+    trackAngles = [math.radians(-record.angle) for record in placedRecords]
+    nestParts = customFeature.attributes.itemByName('AbstractCellGen1', 'NestParts') is not None
+    layoutTransforms = getLayoutTransforms(destDependency.entity, footprints, trackAngles, boundaryTransform[11], nestParts)
+
+    for record, transformData in zip(placedRecords, layoutTransforms):
+        if record.sourceLine is not None:
+            reuseTransform = reuseTransforms[record.lineIndex][1]
+            transformData = layout.multiply(transformData, reuseTransform)
+            setOccurrenceTransform(findEntity(design, record.tokens.get('inPlace')), reuseTransform)
+        setOccurrenceTransform(findEntity(design, record.tokens.get('part')), transformData)
+    if design.snapshots.hasPendingSnapshot:
+        design.snapshots.add()
+
+# Moves the occurrence only when its transform changes, so parts that stay put add nothing to the snapshot
+def setOccurrenceTransform(occurrence :adsk.fusion.Occurrence, transformData):
+
+    if occurrence is None:
+        return
+    current = fusionIO.matrixData(occurrence.transform2)
+    if all(abs(a - b) <= 1e-9 for a, b in zip(current, transformData)):
+        return
+    matrix = adsk.core.Matrix3D.create()
+    matrix.setWithArray(transformData)
+    occurrence.transform2 = matrix
+
+# Draws the classified cell outlines, each cell's direction arrow and a coarse chamfered prism per cell.
+# Outlines & arrows are only rebuilt when the selected sketches change, the prisms when height or angle change
+def updatePreview():
+
+    global _previewGraphicsGroup, _previewMeshGraphics, _previewMesh
+
+    if (_boundarySketchSelectInput.selectionCount == 0 or _directionSketchSelectInput.selectionCount == 0
+            or _spawnBodySelectInput.selectionCount == 0):
+        clearPreview()
+        return
+
+    boundarySketch: adsk.fusion.Sketch = _boundarySketchSelectInput.selection(0).entity
+    directionSketch: adsk.fusion.Sketch = _directionSketchSelectInput.selection(0).entity
+    spawnBody: adsk.fusion.BRepBody = _spawnBodySelectInput.selection(0).entity
+
+    key = (boundarySketch.entityToken, directionSketch.entityToken)
+    if _previewCache.key != key or not _previewGraphicsGroup:
+        clearPreview()
+        directionLines = fusionIO.readDirectionLines(directionSketch)
+        angles = directionLines.angles()
+        profiles = fusionIO.readProfiles(boundarySketch)
+        midpoints2D = directionLines.midpointsIn(fusionIO.sketchToWorldMatrix(boundarySketch))
+        ownedProfiles = geometry.classifyProfiles(profiles, midpoints2D, boundsOf=_boundsCache.get)
+        _previewCache.setCells(key,
+                               [(profileData, math.radians(angles[pointIndex] - 90)) for profileData, pointIndex in ownedProfiles],
+                               [midpoints2D[pointIndex] for _, pointIndex in ownedProfiles])
+
+        design: adsk.fusion.Design = _app.activeProduct
+        _previewGraphicsGroup = design.rootComponent.customGraphicsGroups.add()
+        coords = adsk.fusion.CustomGraphicsCoordinates.create(_previewCache.lineCoords)
+        lineGraphics = _previewGraphicsGroup.addLines(coords, _previewCache.lineIndices, False)
+        lineGraphics.transform = boundarySketch.transform
+
+    mesh = _previewCache.prismMesh(_cellHeightInput.value, _cellChamferAngleInput.value)
+    if mesh is not _previewMesh:
+        if _previewMeshGraphics:
+            _previewMeshGraphics.deleteMe()
+        meshCoords, meshIndices, normals, normalIndices = mesh
+        coords = adsk.fusion.CustomGraphicsCoordinates.create(meshCoords)
+        _previewMeshGraphics = _previewGraphicsGroup.addMesh(coords, meshIndices, normals, normalIndices)
+        _previewMeshGraphics.transform = boundarySketch.transform
+        _previewMesh = mesh
+
+def clearPreview():
+
+    global _previewGraphicsGroup, _previewMeshGraphics, _previewMesh
+    if _previewGraphicsGroup and _previewGraphicsGroup.isValid:
+        _previewGraphicsGroup.deleteMe()
+    _previewGraphicsGroup = None
+    _previewMeshGraphics = None
+    _previewMesh = None
+
+# Binds the bodies a copy / cut paste feature produced to the registry records of the bodies it was given
+def bindFeatureBodies(cellRegistry :registry.CellRegistry, stage, oldTokens, feature):
+
+    newBodies = [feature.bodies.item(i) for i in range(feature.bodies.count)]
+    cellRegistry.bindStage(stage, oldTokens, [body.entityToken for body in newBodies], newBodies)
+
+# World bounds of the destination profile, as (minX, minY, maxX, maxY, z)
+def getDestinationBounds(destProfile :adsk.fusion.Profile):
+
+    destSketch: adsk.fusion.Sketch = destProfile.parentSketch
+    destTransform = fusionIO.matrixData(destSketch.transform)
+    minX, minY, maxX, maxY = bounds.profileBounds(fusionIO.readProfile(destProfile, 0))
+    (x0, y0), (x1, y1) = layout.transformPoints(destTransform, [(minX, minY), (maxX, maxY)])
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1), destTransform[11]
+
+# Outer loop of the destination profile in world XY, and the z of its plane
+def getDestinationPolygon(destProfile :adsk.fusion.Profile):
+
+    destTransform = fusionIO.matrixData(destProfile.parentSketch.transform)
+    destPolygon = fusionIO.readProfile(destProfile, 0).outerPolygon()
+    return layout.transformPoints(destTransform, destPolygon), destTransform[11]
+
+# One CAM-ready placement per footprint, nested inside the destination profile or laid out in rows
+# nestParts defaults to the command's NestParts input
+def getLayoutTransforms(destProfile :adsk.fusion.Profile, footprints, trackAngles, sourceZ, nestParts=None):
+
+    if nestParts is None:
+        nestParts = _nestPartsInput is None or _nestPartsInput.value
+    if nestParts:
+        destPolygon, destZ = getDestinationPolygon(destProfile)
+        layoutTransforms, nestResult = layout.nestTransforms(footprints, trackAngles, sourceZ, destPolygon, destZ)
+        _log.info("%s", nestResult.summary())
+        return layoutTransforms
+    return layout.layoutTransforms(footprints, trackAngles, sourceZ, getDestinationBounds(destProfile))
 
 def getBodyBottomFace(bRepBody):
 
@@ -262,14 +739,484 @@ def getBodyBottomFace(bRepBody):
         
 
 
-        # showMessage(f"{face.geometry.normal.x}, {face.geometry.normal.y}, {face.geometry.normal.z}")
         if vecNegZ.angleTo(normal) == 0:
-            showMessage(f"{normal.x}, {normal.y}, {normal.z}")
+            if _log.isEnabledFor(logger.DEBUG):
+                _log.debug("Bottom face normal %.6f, %.6f, %.6f", normal.x, normal.y, normal.z)
             return face
 
+# Midpoint of the bottom face of the Body's bounding box, as (x, y, z)
+def getSpawnBodyBottomMidpoint(spawnBody :adsk.fusion.BRepBody):
+
+    boundBox = spawnBody.boundingBox
+    minX, minY, minZ = boundBox.minPoint.asArray()
+    maxX, maxY, _ = boundBox.maxPoint.asArray()
+    return ((minX + maxX) / 2, (minY + maxY) / 2, minZ)
+
+# For each direction line, compute the placement of a body at it's center, aligned to the line
+# The sketch's lines are read once into a snapshot, every placement is computed from it up front
+# This has only been tested in the XY plane
+# Returns the sketchSnapshot.LineSnapshot and per-line lists, linked by index:
+# angles, placement matrices (row-major 4x4) & fingerprints
+def readDirectionLines(sketch :adsk.fusion.Sketch, spawnBody :adsk.fusion.BRepBody):
+
+    directionLines = fusionIO.readDirectionLines(sketch)
+    placementMatrices = directionLines.placementMatrices(getSpawnBodyBottomMidpoint(spawnBody))
+    return directionLines, directionLines.angles(), placementMatrices, directionLines.fingerprints()
+
+# Returns one fingerprint per owned profile, covering everything its cell is built from
+def getCellFingerprints(boundarySketch :adsk.fusion.Sketch, ownedProfiles, lineFingerprints, spawnBody :adsk.fusion.BRepBody, height, chamferAngle):
+
+    sketchTransform = fusionIO.matrixData(boundarySketch.transform)
+    spawnBodyFp = fingerprint.valuesFingerprint(*fusionIO.bodyGeometryData(spawnBody))
+    return [fingerprint.cellFingerprint(fingerprint.profileFingerprint(profileData, sketchTransform),
+                                        lineFingerprints[pointIndex], spawnBodyFp, height, chamferAngle)
+            for profileData, pointIndex in ownedProfiles]
+
+# One Copy / Paste Feature and one Move Feature per placement (2 x N timeline features)
+# Each copy is named after its direction line in lineIndices
+def spawnCopiesPerLine(spawnBody :adsk.fusion.BRepBody, placementMatrices, lineIndices):
+
+    spawnBodyComp = spawnBody.parentComponent
+    moveFeatures = spawnBodyComp.features.moveFeatures
+    copiedBodies = []
+    firstFeature = None
+    lastFeature = None
+    for lineIndex, matrix in zip(lineIndices, placementMatrices):
+
+        # Create Copy / Paste Feature for Body
+        newCopyFeature = spawnBodyComp.features.copyPasteBodies.add(spawnBody)
+        baseBodyCopy = newCopyFeature.bodies.item(0)
+        baseBodyCopy.name = f"CopiedBody_{lineIndex}"
+        if not firstFeature:
+            firstFeature = newCopyFeature
+
+        # Create Movement Feature
+        inputEnts = adsk.core.ObjectCollection.create()
+        inputEnts.add(baseBodyCopy)
+        moveInput = moveFeatures.createInput(inputEnts, fusionIO.toMatrix3D(matrix))
+        lastFeature = moveFeatures.add(moveInput)
+        copiedBodies.append(baseBodyCopy)
+
+    return copiedBodies, firstFeature, lastFeature
+
+# All copies are made and placed with TemporaryBRepManager, then added in a single Base Feature
+def spawnCopiesBatched(spawnBody :adsk.fusion.BRepBody, placementMatrices, lineIndices):
+
+    if not placementMatrices:
+        return [], None, None
+
+    spawnBodyComp = spawnBody.parentComponent
+    tmpMgr = adsk.fusion.TemporaryBRepManager.get()
+
+    baseFeature = spawnBodyComp.features.baseFeatures.add()
+    baseFeature.startEdit()
+    try:
+        for index, matrix in enumerate(placementMatrices):
+            tmpBody = tmpMgr.copy(spawnBody)
+            tmpMgr.transform(tmpBody, fusionIO.toMatrix3D(matrix))
+            spawnBodyComp.bRepBodies.add(tmpBody, baseFeature)
+    finally:
+        baseFeature.finishEdit()
+
+    # Bodies in the Base Feature keep the order they were added in
+    copiedBodies = []
+    for index, lineIndex in zip(range(baseFeature.bodies.count), lineIndices):
+        baseBodyCopy = baseFeature.bodies.item(index)
+        baseBodyCopy.name = f"CopiedBody_{lineIndex}"
+        copiedBodies.append(baseBodyCopy)
+
+    return copiedBodies, baseFeature, baseFeature
+
+# Extrude, Chamfer & Intersect one cell with three parametric features
+def buildCellParametric(profile :adsk.fusion.Profile, copiedBodyToIntersect :adsk.fusion.BRepBody, features :adsk.fusion.Features):
+
+    cellComp = copiedBodyToIntersect.parentComponent
+
+    # Create Extrusion Feature with new Body
+    extrudes = cellComp.features.extrudeFeatures
+    distance = adsk.core.ValueInput.createByString(_cellHeightInput.expression)
+    newExtrude: adsk.fusion.ExtrudeFeature = extrudes.addSimple(profile, distance, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    extrudedProfileBody: adsk.fusion.BRepBody = newExtrude.bodies.item(0)
+
+    # identify edges of top (+Z facing) face
+    edgeCollection = adsk.core.ObjectCollection.create()
+    endFace = newExtrude.endFaces.item(0)
+    [edgeCollection.add(edge) for edge in endFace.edges]
+
+    newExtrude.endFaces.item(0).attributes.add('CellArtGen1', 'extrusionEndFace', "1")
+    newExtrude.startFaces.item(0).attributes.add('CellArtGen1', 'extrusionStartFace', "1")
+
+    # Create the ChamferInput object.
+    chamferFeatureInput = cellComp.features.chamferFeatures.createInput2() 
+    chamferAngle = adsk.core.ValueInput.createByString(_cellChamferAngleInput.expression)
+    chamferOffset = adsk.core.ValueInput.createByString(_cellHeightInput.expression)
+    chamferFeatureInput.chamferEdgeSets.addDistanceAndAngleChamferEdgeSet(edgeCollection, chamferOffset, chamferAngle, True, True)
+    cellComp.features.chamferFeatures.add(chamferFeatureInput) 
+
+    # Intersect with Copied Body
+    bodyCollection = adsk.core.ObjectCollection.create()
+    bodyCollection.add(copiedBodyToIntersect)
+    combineFeatureInput = features.combineFeatures.createInput(extrudedProfileBody, bodyCollection)
+    combineFeatureInput.operation = adsk.fusion.FeatureOperations.IntersectFeatureOperation
+    combineFeatureInput.isKeepToolBodies = False
+    newCombineFeature: adsk.fusion.CombineFeature = features.combineFeatures.add(combineFeatureInput)
+
+    return newCombineFeature.bodies.item(0), newCombineFeature
+
+# Builds the cells in memory with TemporaryBRepManager a chunk at a time, committing each chunk to the run's
+# single Base Feature and checkpointing it. Cells the checkpoint already holds are not built again.
+# plansByLine holds the planner.CellPlan of each cell, fingerprintByLine its cell fingerprint, by direction line index.
+# Returns [(body, direction line index)] for every cell of the run, resumed ones included
+def buildCellsDirect(boundarySketch :adsk.fusion.Sketch, ownedProfiles, spawnBody :adsk.fusion.BRepBody, placementMatrices, height, chamferAngle,
+                     checkpoint :scheduler.Checkpoint, chunkScheduler :scheduler.ChunkScheduler, plansByLine=None, fingerprintByLine=None):
+
+    design = adsk.fusion.Design.cast(_app.activeProduct)
+    spawnBodyComp = spawnBody.parentComponent
+    baseFeature: adsk.fusion.BaseFeature = findEntity(design, checkpoint.features.get('first'))
+    if baseFeature is None:
+        baseFeature = spawnBodyComp.features.baseFeatures.add()
+        checkpoint.features['first'] = baseFeature.entityToken
+
+    def buildChunk(chunk):
+        tmpCells = buildCellBodiesDirect(boundarySketch, chunk, spawnBody, placementMatrices, height, chamferAngle, plansByLine, fingerprintByLine)
+        firstIndex = baseFeature.bodies.count
+        baseFeature.startEdit()
+        try:
+            for tmpBody, _ in tmpCells:
+                spawnBodyComp.bRepBodies.add(tmpBody, baseFeature)
+        except Exception:
+            # Bodies of a chunk that fails halfway are not kept, a resumed run builds the whole chunk again
+            deleteBaseFeatureBodies(baseFeature, firstIndex)
+            raise
+        finally:
+            baseFeature.finishEdit()
+
+        # Bodies in the Base Feature keep the order they were added in
+        tokensByLine = {pointIndex: baseFeature.bodies.item(firstIndex + i).entityToken for i, (_, pointIndex) in enumerate(tmpCells)}
+        checkpoint.addCells([pointIndex for _, pointIndex in chunk], tokensByLine)
+        saveCheckpoint(design, checkpoint)
+
+    remaining = checkpoint.remaining(ownedProfiles)
+    try:
+        chunkScheduler.run(remaining, buildChunk, len(ownedProfiles) - len(remaining), len(ownedProfiles))
+    except (scheduler.Cancelled, scheduler.ChunkFailed):
+        # A Base Feature no chunk got into is not left behind
+        if not checkpoint.cells:
+            baseFeature.deleteMe()
+        raise
+    return checkpointCells(design, checkpoint), baseFeature, baseFeature
+
+# Spawns, extrudes, chamfers & intersects the cells a chunk at a time, checkpointing each chunk.
+# A chunk spawns the copies of the spawn body for its own cells just before building them, and every copy
+# is consumed by its cell's Combine, so at most one chunk of copies exists at any time, whatever the pattern size.
+# Batched spawning gives every chunk a Base Feature of its own: reopening one shared Base Feature for each chunk
+# would recompute every earlier chunk's features after it, so the run's recompute time would grow quadratically.
+# Returns ([(body, direction line index)] for every cell of the run, resumed ones included, first feature of the run)
+def buildCellsParametric(design :adsk.fusion.Design, ownedProfiles, spawnBody :adsk.fusion.BRepBody, placementMatrices, spawnMode,
+                         features :adsk.fusion.Features, checkpoint :scheduler.Checkpoint, chunkScheduler :scheduler.ChunkScheduler):
+
+    logCells = _log.isEnabledFor(logger.DEBUG)
+    spawnStats = {'bodies': 0, 'features': 0, 'seconds': 0.0, 'peak': 0}
+
+    def buildChunk(chunk):
+        timelineCount = design.timeline.count
+        hadFirst = 'first' in checkpoint.features
+        try:
+            buildChunkFeatures(chunk)
+        except Exception:
+            # Nothing of a chunk that fails halfway is kept, the checkpoint still ends at the chunk before it
+            rollBackTimeline(design, timelineCount)
+            if not hadFirst:
+                checkpoint.features.pop('first', None)
+            raise
+
+    def buildChunkFeatures(chunk):
+        _profiler.beginStage('spawnCopies')
+        lineIndices = [pointIndex for _, pointIndex in chunk]
+        matrices = [placementMatrices[pointIndex] for pointIndex in lineIndices]
+        timelineCountBefore = design.timeline.count
+        spawnStartTime = time.perf_counter()
+        if spawnMode == SPAWN_MODE_BATCHED:
+            copiedBodies, firstSpawnFeature, _ = spawnCopiesBatched(spawnBody, matrices, lineIndices)
+        else:
+            copiedBodies, firstSpawnFeature, _ = spawnCopiesPerLine(spawnBody, matrices, lineIndices)
+        spawnStats['bodies'] += len(copiedBodies)
+        spawnStats['features'] += design.timeline.count - timelineCountBefore
+        spawnStats['seconds'] += time.perf_counter() - spawnStartTime
+        spawnStats['peak'] = max(spawnStats['peak'], len(copiedBodies))
+        if 'first' not in checkpoint.features:
+            checkpoint.features['first'] = firstSpawnFeature.entityToken
+
+        _profiler.beginStage('buildCellsParametric')
+        tokensByLine = {}
+        for (profileData, pointIndex), copiedBody in zip(chunk, copiedBodies):
+            newBody, _ = buildCellParametric(profileData.source, copiedBody, features)
+            tokensByLine[pointIndex] = newBody.entityToken
+            if logCells:
+                _log.debug("Cell %d, %s", pointIndex, newBody.name)
+        checkpoint.addCells(lineIndices, tokensByLine)
+        saveCheckpoint(design, checkpoint)
+
+    remaining = checkpoint.remaining(ownedProfiles)
+    try:
+        chunkScheduler.run(remaining, buildChunk, len(ownedProfiles) - len(remaining), len(ownedProfiles))
+    finally:
+        if spawnStats['bodies']:
+            _log.info("Spawned %d bodies (%s) just in time: %d timeline features, %.2f s, at most %d alive at once",
+                      spawnStats['bodies'], spawnMode, spawnStats['features'], spawnStats['seconds'], spawnStats['peak'])
+            _profiler.count('spawnedCopies', spawnStats['bodies'])
+            _profiler.count('peakSpawnedCopies', spawnStats['peak'])
+    return checkpointCells(design, checkpoint), findEntity(design, checkpoint.features.get('first'))
+
+# Deletes the bodies a Base Feature got after its first firstIndex ones, the Base Feature must be in edit mode
+def deleteBaseFeatureBodies(baseFeature :adsk.fusion.BaseFeature, firstIndex):
+
+    for index in reversed(range(firstIndex, baseFeature.bodies.count)):
+        baseFeature.bodies.item(index).deleteMe()
+
+# Deletes the features after the first timelineCount timeline entries, newest first
+def rollBackTimeline(design :adsk.fusion.Design, timelineCount):
+
+    timeline = design.timeline
+    for index in reversed(range(timelineCount, timeline.count)):
+        entity = timeline.item(index).entity
+        if entity:
+            entity.deleteMe()
+
+def findEntity(design :adsk.fusion.Design, entityToken):
+
+    if not entityToken:
+        return None
+    found = design.findEntityByToken(entityToken)
+    return found[0] if found else None
+
+# The checkpoint of an interrupted run with the same input fingerprint, if all of its entities still exist.
+# Otherwise any stale checkpoint is dropped and a new one returned
+def resumeCheckpoint(design :adsk.fusion.Design, runFingerprint, total):
+
+    if _checkpointStore:
+        saved, stale = _checkpointStore.load(design.parentDocument.creationId, runFingerprint)
+        if saved and all(findEntity(design, token) for token in saved.tokens()):
+            return saved
+        if saved or stale:
+            _log.warning("Starting over: the checkpoint of an interrupted run no longer matches the design")
+            _checkpointStore.clear(design.parentDocument.creationId)
+    return scheduler.Checkpoint(runFingerprint, total)
+
+# A checkpoint that cannot be written only costs the resume, the run goes on
+def saveCheckpoint(design :adsk.fusion.Design, checkpoint :scheduler.Checkpoint):
+
+    if _checkpointStore:
+        try:
+            _checkpointStore.save(design.parentDocument.creationId, checkpoint)
+        except OSError as e:
+            _log.warning("Checkpoint not saved: %s", e)
+
+# Checkpoints of earlier versions were kept as a design attribute, those are dropped too
+def clearCheckpoint(design :adsk.fusion.Design):
+
+    if _checkpointStore:
+        _checkpointStore.clear(design.parentDocument.creationId)
+    attr = design.attributes.itemByName('AbstractCellGen1', 'Checkpoint')
+    if attr:
+        attr.deleteMe()
+
+# [(body, direction line index)] of every built cell in the checkpoint, in build order
+def checkpointCells(design :adsk.fusion.Design, checkpoint :scheduler.Checkpoint):
+
+    cells = []
+    for pointIndex, token in checkpoint.cells:
+        body = findEntity(design, token)
+        if body:
+            cells.append((body, pointIndex))
+    return cells
+
+# Returns [(temporary body, direction line index)], skipping cells whose intersection is empty
+# A cell's frustum layers come from its plan in plansByLine when there is one.
+# Cells with a fingerprint in fingerprintByLine are read from the disk cache when it has them, and stored there when built
+def buildCellBodiesDirect(boundarySketch :adsk.fusion.Sketch, ownedProfiles, spawnBody :adsk.fusion.BRepBody, placementMatrices, height, chamferAngle,
+                          plansByLine=None, fingerprintByLine=None):
+
+    sketchTransform = boundarySketch.transform
+
+    tmpCells = []
+    for profileData, pointIndex in ownedProfiles:
+        cacheKey = None
+        if _cellDiskCache is not None and fingerprintByLine and pointIndex in fingerprintByLine:
+            cacheKey = cellCacheKey(fingerprintByLine[pointIndex])
+            tmpBody = fusionBuild.loadCachedBody(_cellDiskCache, cacheKey)
+            if tmpBody:
+                tmpCells.append((tmpBody, pointIndex))
+                continue
+        cellPlan = plansByLine.get(pointIndex) if plansByLine else None
+        if cellPlan is not None and cellPlan.error:
+            _log.warning("Profile %d skipped: %s", profileData.index, cellPlan.error)
+            continue
+        try:
+            tmpBody = fusionBuild.buildCellBody(profileData, sketchTransform, spawnBody, fusionIO.toMatrix3D(placementMatrices[pointIndex]),
+                                                height, chamferAngle, cellPlan.layers if cellPlan else None)
+        except ValueError as e:
+            _log.warning("Profile %d skipped: %s", profileData.index, e)
+            continue
+        if tmpBody:
+            if cacheKey:
+                fusionBuild.storeCachedBody(_cellDiskCache, cacheKey, tmpBody)
+            tmpCells.append((tmpBody, pointIndex))
+    return tmpCells
+
+# Disk cache key of a cell. Bodies are written in the modeling kernel's own format, so the Fusion version is part of it
+def cellCacheKey(cellFingerprint):
+
+    return fingerprint.valuesFingerprint(cellFingerprint, _app.version)
+
+# Verification mode for the direct build engine.
+# Builds the same cells in memory and compares body count & volume with the parametric result
+def verifyDirectBuild(boundarySketch :adsk.fusion.Sketch, ownedProfiles, spawnBody :adsk.fusion.BRepBody, placementMatrices, parametricCells):
+
+    tmpCells = buildCellBodiesDirect(boundarySketch, ownedProfiles, spawnBody, placementMatrices,
+                                     _cellHeightInput.value, _cellChamferAngleInput.value)
+    expected = {pointIndex: body.volume for body, pointIndex in parametricCells}
+    actual = {pointIndex: tmpBody.volume for tmpBody, pointIndex in tmpCells}
+    result = frustum.compareCellVolumes(expected, actual)
+    _log.info("Direct build verification: %d direct vs %d parametric bodies, max volume error %.3f%%, mismatched lines %s",
+              result['actualCount'], result['expectedCount'], result['maxRelativeError'] * 100, result['mismatched'])
+    return result
+
+# Builds every cell in memory, moves it where its CAM-ready part would be laid out and writes the cells to files
+# a batch at a time, with a manifest. Nothing is added to the design or its timeline, whatever the build engine.
+# Class representatives are built a chunk at a time, the cells that reuse one are copies of its body.
+# Cells are laid out only once every one of them is built, so a cell whose intersection comes out empty
+# leaves no gap in the layout. A cancelled or failed run still lays out & writes the cells built before it.
+# Returns the export.ExportManifest
+def exportCells(boundarySketch :adsk.fusion.Sketch, buildProfiles, reuseTransforms, spawnBody :adsk.fusion.BRepBody, placementMatrices,
+                plansByLine, fingerprintByLine, angles, boundaryTransform, destProfile :adsk.fusion.Profile):
+
+    exportFormat = _exportFormatInput.selectedItem.name if _exportFormatInput else export.FORMAT_STEP
+    directory = (_exportFolderInput.value.strip() if _exportFolderInput else '') or export.defaultDirectory()
+    cellsPerFile = _exportBatchInput.value if _exportBatchInput else EXPORT_CELLS_PER_FILE
+    height = _cellHeightInput.value
+    chamferAngle = _cellChamferAngleInput.value
+    manifest = export.ExportManifest(directory, exportFormat, {
+        'cellHeight': height,
+        'cellChamferAngle': math.degrees(chamferAngle),
+        'spawnBody': spawnBody.name,
+        'cellsPerFile': cellsPerFile,
+    })
+
+    membersBySource = {}
+    for lineIndex, (sourceLine, reuseTransform) in reuseTransforms.items():
+        membersBySource.setdefault(sourceLine, []).append((lineIndex, reuseTransform))
+
+    tmpMgr = adsk.fusion.TemporaryBRepManager.get()
+    bodyByLine = {}
+    pending = []
+
+    def exportChunk(chunk):
+        builtCells = buildCellBodiesDirect(boundarySketch, chunk, spawnBody, placementMatrices, height, chamferAngle,
+                                           plansByLine, fingerprintByLine)
+        bodyByLine.update((pointIndex, body) for body, pointIndex in builtCells)
+        for _, pointIndex in chunk:
+            if pointIndex not in bodyByLine:
+                reason = plansByLine[pointIndex].error or 'empty intersection with the spawn body'
+                for lineIndex in [pointIndex] + [member for member, _ in membersBySource.get(pointIndex, [])]:
+                    manifest.addSkipped(lineIndex, reason)
+
+    def writeBatch():
+        if not pending:
+            return
+        path = manifest.nextPath()
+        bodies = [body for body, _ in pending]
+        if exportFormat == export.FORMAT_STL:
+            triangleCounts = export.writeBinaryStl(path, [fusionIO.bodyMesh(body) for body in bodies], export.STL_SCALE)
+        else:
+            triangleCounts = None
+            fusionBuild.exportBodies(bodies, path)
+        manifest.addFile(path, [cell for _, cell in pending], triangleCounts)
+        pending.clear()
+
+    def place(body, lineIndex, transform, sourceLine=None):
+        tmpMgr.transform(body, fusionIO.toMatrix3D(transform))
+        cellPlan = plansByLine[lineIndex]
+        pending.append((body, {
+            'lineIndex': lineIndex,
+            'profileIndex': cellPlan.profileIndex,
+            'angle': angles[lineIndex],
+            'sourceLine': sourceLine,
+            'fingerprint': fingerprintByLine.get(lineIndex),
+            'expectedVolume': cellPlan.expectedVolume,
+            'transform': list(transform),
+        }))
+        if cellsPerFile and len(pending) >= cellsPerFile:
+            writeBatch()
+
+    def reportProgress(done):
+        _progressDialog.progressValue = done
+
+    _progressDialog.show('Abstract Cell Export', 'Exporting cell %v of %m', 0, max(len(buildProfiles), 1), 1)
+    chunkScheduler = scheduler.ChunkScheduler(GENERATION_CHUNK_SIZE, yieldToFusion, reportProgress,
+                                              lambda: _progressDialog.wasCancelled)
+    try:
+        chunkScheduler.run(buildProfiles, exportChunk)
+        manifest.complete = True
+    except scheduler.Cancelled as e:
+        _log.warning("Export cancelled after %d of %d cells, the cells built so far are written and listed in the manifest",
+                     e.done, e.total)
+    except scheduler.ChunkFailed as e:
+        _log.error("Export failed after %d of %d cells, the cells built so far are written and listed in the manifest\n%s",
+                   e.done, e.total, formatError(e.error))
+    finally:
+        # Only cells that came out with a body are laid out, each with the members that reuse it
+        placedLines = [lineIndex for _, sourceLine in buildProfiles if sourceLine in bodyByLine
+                       for lineIndex in [sourceLine] + [member for member, _ in membersBySource.get(sourceLine, [])]]
+        layoutTransforms = getLayoutTransforms(destProfile, [plansByLine[lineIndex].footprint for lineIndex in placedLines],
+                                               [plansByLine[lineIndex].trackAngle for lineIndex in placedLines], boundaryTransform[11])
+        layoutByLine = dict(zip(placedLines, layoutTransforms))
+        for _, pointIndex in buildProfiles:
+            body = bodyByLine.pop(pointIndex, None)
+            if body is None:
+                continue
+            for lineIndex, reuseTransform in membersBySource.get(pointIndex, []):
+                place(tmpMgr.copy(body), lineIndex, layout.multiply(layoutByLine[lineIndex], reuseTransform), pointIndex)
+            place(body, pointIndex, layoutByLine[pointIndex])
+        writeBatch()
+        manifestPath = manifest.write()
+    _profiler.count('exportedCells', len(manifest.cells))
+    _profiler.count('exportFiles', len(manifest.files))
+    _log.info("%s", manifest.summary())
+    _log.info("Export manifest written to %s", manifestPath)
+    return manifest
+
+# Runs the generation, profiled when the dialog option or the environment variable asks for it
 def spawnBodyCopies(args):
 
-    showMessage("HIT 1")
+    global _profiler, _progressDialog
+    design = adsk.fusion.Design.cast(_app.activeProduct)
+    profileEnabled = _profileInput.value if _profileInput else profiling.enabledFromEnvironment()
+    _profiler = profiling.create(profileEnabled, 'spawnBodyCopies', lambda: design.timeline.count)
+    _progressDialog = _ui.createProgressDialog()
+    _progressDialog.isCancelButtonShown = True
+    _progressDialog.cancelButtonText = 'Cancel'
+    if _cellDiskCache is not None:
+        _cellDiskCache.resetStats()
+    try:
+        return generateCells(args)
+    finally:
+        _progressDialog.hide()
+        _progressDialog = None
+        if _cellDiskCache is not None and _cellDiskCache.hits + _cellDiskCache.misses:
+            _log.info("%s", _cellDiskCache.summary())
+            _profiler.count('cellCacheHits', _cellDiskCache.hits)
+            _profiler.count('cellCacheMisses', _cellDiskCache.misses)
+        profiler, _profiler = _profiler, profiling.NULL_PROFILER
+        if profiler.enabled:
+            reportPath = profiler.writeReport()
+            _log.info("%s", profiler.summary())
+            _log.info("Profile report written to %s", reportPath)
+        _log.flush()
+
+def generateCells(args):
+
+    _log.debug("Generating cells")
 
     app = adsk.core.Application.get() 
     design = adsk.fusion.Design.cast(app.activeProduct) 
@@ -290,165 +1237,138 @@ def spawnBodyCopies(args):
     firstFeature = None
     lastFeature = None
 
-    # These two collections link to each other by index. 
-    # Points and Bodies are linked 1-1
-    directionLineMidpointsCol = adsk.core.ObjectCollection.create()
-    copiedBodiesCol = adsk.core.ObjectCollection.create()
-    angleIndexes = []
-
-    # For each direction line, spawn a body at it's center & align body to line
-    # This has only been tested in the XY plane
-    sketchCurves = sketch.sketchCurves
-    lines = sketchCurves.sketchLines
-    index = -1
-    for line in lines:
-        if line.isConstruction:
-
-            index += 1
-
-            # Get angle between points
-            skPtStartData = line.startSketchPoint.geometry.getData()
-            skPtEndData = line.endSketchPoint.geometry.getData()
-            deltaX = -skPtStartData[1] + skPtEndData[1]
-            deltaY = -skPtStartData[2] + skPtEndData[2]
-            angle = 90 + math.degrees(math.atan2(deltaY, deltaX))
-
-            # showMessage(f"{skPtStartData}, {skPtEndData}")
-            # showMessage(f"{angle}, {deltaX}, {deltaY}")
-            
-            # Get world midpoint of sketch points
-            skPtStartWorldData = line.startSketchPoint.worldGeometry.getData()
-            skPtEndWorldData = line.endSketchPoint.worldGeometry.getData()
-            midpoint_sketchPoint = adsk.core.Point3D.create(
-                (skPtStartWorldData[1] + skPtEndWorldData[1]) / 2, 
-                (skPtStartWorldData[2] + skPtEndWorldData[2]) / 2, 
-                (skPtStartWorldData[3] + skPtEndWorldData[3]) / 2
-                )
-
-            # Get midpoint of bottom face of Bounding Box for Body
-            boundBox = spawnBody.boundingBox
-            negZVector = adsk.core.Vector3D.create(0, 0, -1)
-
-            zVal = boundBox.minPoint.z
-            yVal = (boundBox.minPoint.y + boundBox.maxPoint.y ) / 2
-            xVal = (boundBox.minPoint.x + boundBox.maxPoint.x ) / 2
-            midpoint_spawnBodyBottom = adsk.core.Point3D.create(xVal, yVal, zVal)
-
-            # Create a Matrix for movement & rotation of body
-            matrix: adsk.core.Matrix3D = adsk.core.Matrix3D.create()
-            rotationVector = vector = adsk.core.Vector3D.create(0, 0, 1)
-            matrix.setToRotation(math.radians(angle), rotationVector, midpoint_spawnBodyBottom)
-            transformMatrix = adsk.core.Matrix3D.create()
-            transformMatrix.translation = midpoint_spawnBodyBottom.vectorTo(midpoint_sketchPoint)
-            matrix.transformBy(transformMatrix)
-
-            # Create Copy / Paste Feature for Body
-            newCopyFeature = spawnBodyComp.features.copyPasteBodies.add(spawnBody)
-            baseBodyCopy = spawnBodyComp.bRepBodies.item(index + 1)
-            baseBodyCopy.name = f"CopiedBody_{index}"
-            if not firstFeature:
-                firstFeature = newCopyFeature
-
-            # # Create Movement Feature
-            moveFeatures = spawnBodyComp.features.moveFeatures
-            inputEnts = adsk.core.ObjectCollection.create()
-            inputEnts.add(baseBodyCopy)
-            moveInput = moveFeatures.createInput(inputEnts, matrix)
-            moveFeature = moveFeatures.add(moveInput)
-            lastFeature = moveFeature
-
-            directionLineMidpointsCol.add(midpoint_sketchPoint)
-            copiedBodiesCol.add(baseBodyCopy)
-            angleIndexes.append(angle)
-
-    # Next, iterate through all Sketch profile in the "Cell Boundaries" Sketch
+    # Everything per direction line is kept as plain data, indexed by line
+    _profiler.beginStage('readDirectionLines')
+    directionLines, angleIndexes, placementMatrices, lineFingerprints = readDirectionLines(sketch, spawnBody)
+    _profiler.count('directionLines', len(directionLines))
+
+    # Next, plan every cell from the "Cell Boundaries" Sketch's profiles and the direction lines
+    # Each profile's loop curves are read once, then everything that needs no B-Rep is worked out from plain data
+    # across worker processes: which profile owns which line, congruence signatures, frustum layers & footprints.
+    # Only profiles that own a direction line ever reach the extrude, chamfer & combine steps below
+    _profiler.beginStage('planCells')
+    boundarySketch: adsk.fusion.Sketch = _boundarySketchSelectInput.selection(0).entity
+    profiles = fusionIO.readProfiles(boundarySketch)
+    midpoints2D = directionLines.midpointsIn(fusionIO.sketchToWorldMatrix(boundarySketch))
+    boundsCache = _boundsCache or bounds.BoundsCache()
+    if _verifyBoundsMode:
+        verifyAnalyticBounds(boundarySketch, profiles, boundsCache)
+    reuseCongruent = _reuseCongruentInput is None or _reuseCongruentInput.value
+    boundaryTransform = fusionIO.matrixData(boundarySketch.transform)
+    cellPlan = planner.planCells(profiles, midpoints2D, angleIndexes, placementMatrices, boundaryTransform,
+                                 _cellHeightInput.value, _cellChamferAngleInput.value, reuseCongruent,
+                                 onFallback=lambda reason: _log.debug("Planning serially, %s", reason),
+                                 boundsCache=boundsCache)
+    if _log.isEnabledFor(logger.DEBUG):
+        _log.debug("%s", cellPlan.summary())
+    profilesByIndex = {profileData.index: profileData for profileData in profiles}
+    ownedProfiles = [(profilesByIndex[cell.profileIndex], cell.lineIndex) for cell in cellPlan.cells]
+    plansByLine = cellPlan.byLine()
+    _profiler.count('profiles', len(profiles))
+    _profiler.count('ownedProfiles', len(ownedProfiles))
+    _profiler.count('planWorkers', cellPlan.workers)
+
+    # Group the cells into congruence classes. Only one cell per class is built, the others reuse its body
+    _profiler.beginStage('congruence')
+    if reuseCongruent:
+        cellClasses = congruence.classifyCells(ownedProfiles, midpoints2D, [math.radians(angle) for angle in angleIndexes],
+                                               signatures=[cell.signature for cell in cellPlan.cells])
+    else:
+        cellClasses = congruence.singletonClasses(ownedProfiles)
+    buildProfiles = [cellClass.representative for cellClass in cellClasses]
+
+    # World transform from the representative onto each reusing cell, by line index
+    reuseTransforms = {lineIndex: (cellClass.representative[1], congruence.worldTransform(boundaryTransform, transform))
+                       for cellClass in cellClasses for _, lineIndex, transform in cellClass.members[1:]}
+    _profiler.count('cellClasses', len(cellClasses))
+    if reuseTransforms:
+        _log.info("%d cells fall into %d congruence classes, %d cells reuse a built one",
+                  len(ownedProfiles), len(cellClasses), len(reuseTransforms))
+
+    # Build one cell per owned profile, as (body, direction line index)
+    # Cells are built a chunk at a time with the UI kept responsive in between. Every finished chunk is
+    # checkpointed in the design, so a cancelled run resumes where it stopped when run again with the same inputs
+    _profiler.beginStage('checkpoint')
+    buildEngine = _buildEngineInput.selectedItem.name if _buildEngineInput else BUILD_ENGINE_PARAMETRIC
+    spawnMode = _spawnModeInput.selectedItem.name if _spawnModeInput else SPAWN_MODE_PER_LINE
+    cellFingerprints = getCellFingerprints(boundarySketch, ownedProfiles, lineFingerprints, spawnBody,
+                                           _cellHeightInput.value, _cellChamferAngleInput.value)
+    fingerprintByLine = {pointIndex: fp for (_, pointIndex), fp in zip(ownedProfiles, cellFingerprints)}
+
+    # Export mode writes the cells to files and leaves the design as it is
+    outputMode = _outputModeInput.selectedItem.name if _outputModeInput else OUTPUT_MODE_DESIGN
+    if outputMode == OUTPUT_MODE_EXPORT:
+        _profiler.beginStage('exportCells')
+        exportCells(boundarySketch, buildProfiles, reuseTransforms, spawnBody, placementMatrices, plansByLine, fingerprintByLine,
+                    angleIndexes, boundaryTransform, _destPlaneInput.selection(0).entity)
+        return
+
+    runFingerprint = fingerprint.valuesFingerprint(buildEngine, spawnMode, _verifyDirectBuildMode, reuseCongruent, *cellFingerprints)
+    checkpoint = resumeCheckpoint(design, runFingerprint, len(buildProfiles))
+    if checkpoint.cells:
+        _log.info("Resuming an interrupted run, %d of %d cells are already built", len(checkpoint.cells), len(buildProfiles))
+
+    def reportProgress(done):
+        _progressDialog.progressValue = done
+
+    _progressDialog.show('Abstract Cell Generation', 'Building cell %v of %m', 0, max(len(buildProfiles), 1), 1)
+    chunkScheduler = scheduler.ChunkScheduler(GENERATION_CHUNK_SIZE, yieldToFusion, reportProgress,
+                                              lambda: _progressDialog.wasCancelled)
+    try:
+        if buildEngine == BUILD_ENGINE_DIRECT and not _verifyDirectBuildMode:
+            _profiler.beginStage('buildCellsDirect')
+            newCells, firstFeature, lastFeature = buildCellsDirect(boundarySketch, buildProfiles, spawnBody, placementMatrices,
+                                                                   _cellHeightInput.value, _cellChamferAngleInput.value,
+                                                                   checkpoint, chunkScheduler, plansByLine, fingerprintByLine)
+        else:
+
+            # Each chunk spawns the copies of the Body its own cells intersect, only cells that are built get one
+            newCells, firstFeature = buildCellsParametric(design, buildProfiles, spawnBody, placementMatrices, spawnMode,
+                                                          features, checkpoint, chunkScheduler)
+
+            if _verifyDirectBuildMode:
+                _profiler.beginStage('verifyDirectBuild')
+                verifyDirectBuild(boundarySketch, buildProfiles, spawnBody, placementMatrices, newCells)
+    except scheduler.Cancelled as e:
+        _log.warning("Generation cancelled after %d of %d cells, run the command again with the same inputs to resume",
+                     e.done, e.total)
+        return
+    except scheduler.ChunkFailed as e:
+        # The finished chunks & the checkpoint are kept: the execute ends normally, so Fusion does not roll them back
+        _log.error("Generation failed after %d of %d cells, the finished cells are kept. Run the command again with the "
+                   "same inputs to resume\n%s", e.done, e.total, formatError(e.error))
+        return
+
+    _progressDialog.message = 'Laying out the CAM-ready parts'
+    yieldToFusion()
+
+    # add new bodies to Collection, for use below
+    _profiler.beginStage('recordCells')
+    _profiler.count('cells', len(newCells))
+    # Each body records the fingerprint of its inputs, so a recompute of the Custom Feature can reuse it
+    profileIndexByLine = {pointIndex: profileData.index for profileData, pointIndex in ownedProfiles}
+
+    # Every cell is recorded in the registry as it is created, later stages bind their bodies to the same record
+    cellRegistry = registry.CellRegistry()
     allNewBodies = adsk.core.ObjectCollection.create()
-    boundarySketch: adsk.fusion.Profile = _boundarySketchSelectInput.selection(0).entity
-    for profile in boundarySketch.profiles:
-
-        # Get Profile's BoundingBox X & Y
-        # If that box does contains a direction Line's Midpoint, do not extrude it
-        # This step acts to prevent too many extrusions from being created for complicated cell patterns
-        profileBoundingBoxContainsDirectionLine = False
-        profileBoundBoxMinPnt, profileBoundBoxMaxPnt = getPreciseBoundingBox3D(profile)
-        for index, point in enumerate(directionLineMidpointsCol):
-            _, pointX, pointY, pointZ = point.getData()
-            if (pointX >= profileBoundBoxMinPnt.x and pointX <= profileBoundBoxMaxPnt.x
-                and pointY >= profileBoundBoxMinPnt.y and pointY <= profileBoundBoxMaxPnt.y):
-
-                profileBoundingBoxContainsDirectionLine = True
-                showMessage(f" point: [{pointX},{pointY}] is inside box with min&max bounds of [{profileBoundBoxMinPnt.x},{profileBoundBoxMinPnt.y}] & [{profileBoundBoxMaxPnt.x},{profileBoundBoxMaxPnt.y}]")
-                break
-
-        if profileBoundingBoxContainsDirectionLine:
-
-            # Create Extrusion Feature with new Body
-            extrudes = spawnBodyComp.features.extrudeFeatures
-            distance = adsk.core.ValueInput.createByString(_cellHeightInput.expression)
-            newExtrude: adsk.fusion.ExtrudeFeature = extrudes.addSimple(profile, distance, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-            extrudedProfileBody: adsk.fusion.BRepBody = newExtrude.bodies.item(0)
-            
-            # Check if the new body contains/touches any direction line midpoints
-            # If so, make an Intersect Feature between the extruded body & copied Body
-            # If not, delete the new body
-            bodyHasAPoint = False
-            pointIndex = -1
-            for index, point in enumerate(directionLineMidpointsCol):
-                pc: adsk.fusion.PointContainment = extrudedProfileBody.pointContainment(point)
-                # showMessage(f"{pc},      {point.getData()},  {extrudedProfileBody.boundingBox.minPoint.getData()}, {extrudedProfileBody.boundingBox.maxPoint.getData()} ")
-                if (pc == adsk.fusion.PointContainment.PointInsidePointContainment 
-                    or pc == adsk.fusion.PointContainment.PointOnPointContainment):    
-                    bodyHasAPoint = True
-                    pointIndex = index
-                    break
-
-            # If there is a direction line midpoint present in a sketch profile's boundary    
-            if bodyHasAPoint:
-
-                # identify edges of top (+Z facing) face
-                edgeCollection = adsk.core.ObjectCollection.create()
-                # vecZ = adsk.core.Vector3D.create(0,0,1)
-                # faces = [f for f in extrudedProfileBody.faces if f.geometry.surfaceType == adsk.core.SurfaceTypes.PlaneSurfaceType]
-                # for face in faces:
-                #     if vecZ.angleTo(face.geometry.normal) == 0:
-                #         [edgeCollection.add(edge) for edge in face.edges]
-                #         break
-                endFace = newExtrude.endFaces.item(0)
-                [edgeCollection.add(edge) for edge in endFace.edges]
-
-                newExtrude.endFaces.item(0).attributes.add('CellArtGen1', 'extrusionEndFace', "1")
-                newExtrude.startFaces.item(0).attributes.add('CellArtGen1', 'extrusionStartFace', "1")
-
-                # Create the ChamferInput object.
-                chamferFeatureInput = spawnBodyComp.features.chamferFeatures.createInput2() 
-                chamferAngle = adsk.core.ValueInput.createByString(_cellChamferAngleInput.expression)
-                chamferOffset = adsk.core.ValueInput.createByString(_cellHeightInput.expression)
-                chamferFeatureInput.chamferEdgeSets.addDistanceAndAngleChamferEdgeSet(edgeCollection, chamferOffset, chamferAngle, True, True)
-                chamferFeature = spawnBodyComp.features.chamferFeatures.add(chamferFeatureInput) 
-                lastFeature = chamferFeature
-
-                # Intersect with Copied Body
-                copiedBodyToIntersect = copiedBodiesCol.item(pointIndex)
-                bodyCollection = adsk.core.ObjectCollection.create()
-                bodyCollection.add(copiedBodyToIntersect)
-                combineFeatureInput = features.combineFeatures.createInput(extrudedProfileBody, bodyCollection)
-                combineFeatureInput.operation = adsk.fusion.FeatureOperations.IntersectFeatureOperation
-                combineFeatureInput.isKeepToolBodies = False
-                newCombineFeature: adsk.fusion.CombineFeature = features.combineFeatures.add(combineFeatureInput)
-                lastFeature = newCombineFeature
-
-                # add new body to Collection, for use after current loop finishes
-                newBody = newCombineFeature.bodies.item(0)
-                angle = angleIndexes[pointIndex]
-                newBody.attributes.add('AbstractCellGen1', 'BodyAngle', str(angle))
-                allNewBodies.add(newBody)
-                showMessage(f"{pointIndex}, {angleIndexes[pointIndex]}, {newCombineFeature.bodies.item(0).name}")
-
-            # If not, delete the extruded body (No direction line associated with the Sketch Profile)
-            elif extrudedProfileBody: 
-                didDelete = extrudedProfileBody.deleteMe()
+    for newBody, pointIndex in newCells:
+        angle = angleIndexes[pointIndex]
+        newBody.attributes.add('AbstractCellGen1', 'BodyAngle', str(angle))
+        newBody.attributes.add('AbstractCellGen1', 'CellFingerprint', fingerprintByLine[pointIndex])
+        cellRegistry.add('cell', newBody.entityToken, pointIndex, profileIndexByLine[pointIndex], angle,
+                         fingerprintByLine[pointIndex], newBody)
+        allNewBodies.add(newBody)
+    cellTokens = [record.tokens['cell'] for record in cellRegistry.records]
+
+    # Reusing cells are recorded too, they get their own occurrence of the built cell's component below
+    builtLines = {pointIndex for _, pointIndex in newCells}
+    for lineIndex, (sourceLine, _) in reuseTransforms.items():
+        if sourceLine in builtLines:
+            cellRegistry.addReuse(lineIndex, profileIndexByLine[lineIndex], angleIndexes[lineIndex], sourceLine,
+                                  fingerprintByLine[lineIndex])
 
     # Move all new Bodies to a new Collection & record the move as a Feature
+    _profiler.beginStage('copyBodies')
     allCompNames = [design.allComponents.item(i).name for i in range(design.allComponents.count)]
     nameIndex = 1
     newCompName = f"Copied Bodies {nameIndex}"
@@ -459,66 +1379,98 @@ def spawnBodyCopies(args):
     newParentComponent.component.name = newCompName
     toNewComponentFeature = newParentComponent.component.features.copyPasteBodies.add(allNewBodies)
     lastFeature = toNewComponentFeature
+    bindFeatureBodies(cellRegistry, 'copied', cellTokens, toNewComponentFeature)
 
     # Create Component to store realigned & repositioned pieces
+    _profiler.beginStage('cutToCamReady')
+    # A later run adds its parts to the "CAM-Ready Bodies" occurrence an earlier run made
     camReadyBodiesCompNeame = "CAM-Ready Bodies"
     camReadyCompOcc: adsk.fusion.Occurrence = None
-    if camReadyBodiesCompNeame not in allCompNames:
+    camReadyComp: adsk.fusion.Component = design.allComponents.itemByName(camReadyBodiesCompNeame)
+    if camReadyComp:
+        camReadyOccurrences = root.occurrencesByComponent(camReadyComp)
+        camReadyCompOcc = camReadyOccurrences.item(0) if camReadyOccurrences.count else None
+    if camReadyCompOcc is None:
         camReadyCompOcc = root.occurrences.addNewComponent(adsk.core.Matrix3D.create()) 
         camReadyCompOcc.component.name = camReadyBodiesCompNeame
-        toNewComponentFeature = camReadyCompOcc.component.features.cutPasteBodies.add(allNewBodies)
-        lastFeature = toNewComponentFeature
-    else:
-        camReadyCompOcc = design.allComponents.itemByName(camReadyBodiesCompNeame)
-    
-    # Rotate Bodies to align all their "Tracks"
-    for body in camReadyCompOcc.bRepBodies:
-        try:
-            # Get Angle attribute from Body
-            allAttrs = design.findAttributes('AbstractCellGen1', 'BodyAngle')
-            angleStr = [x.value for x in allAttrs if x.parent and x.parent.name == body.name][0]
-            angle = -float(angleStr)
-            matrix: adsk.core.Matrix3D = adsk.core.Matrix3D.create()
-            rotationVector = vector = adsk.core.Vector3D.create(0, 0, 1)
-            
-            # Create Rotation matrix and Feature
-            # Rotation point of matrix is irrelevant, so we can use an out-of-date Point3D
-            # It's Irrelevant because the body will be repositioned when the Joint is created 
-            matrix.setToRotation(math.radians(angle), rotationVector, midpoint_spawnBodyBottom)
-            moveFeatures = camReadyCompOcc.component.features.moveFeatures
-            inputEnts = adsk.core.ObjectCollection.create()
-            inputEnts.add(body)
-            moveInput = moveFeatures.createInput(inputEnts, matrix)
-            moveFeature = moveFeatures.add(moveInput)
-            lastFeature = moveFeature
-        except Exception as e:
-            showMessage(f"{e}")
+    toNewComponentFeature = camReadyCompOcc.component.features.cutPasteBodies.add(allNewBodies)
+    lastFeature = toNewComponentFeature
+    bindFeatureBodies(cellRegistry, 'camReady', cellTokens, toNewComponentFeature)
+
+    # Rotate Bodies to align all their "Tracks" & place them on the destination plane
+    # Every rotation and placement is computed in one pass, then applied directly to each part's occurrence
+    _profiler.beginStage('layout')
+    destProfile: adsk.fusion.Profile = _destPlaneInput.selection(0).entity
+    camReadyRecords = [record for record in cellRegistry.records if cellRegistry.entity(record, 'camReady')]
+    reuseRecords = [record for record in cellRegistry.records if record.sourceLine is not None]
+    placedRecords = camReadyRecords + reuseRecords
+    footprints = [plansByLine[record.lineIndex].footprint for record in placedRecords]
+    trackAngles = [plansByLine[record.lineIndex].trackAngle for record in placedRecords]
+    layoutTransforms = getLayoutTransforms(destProfile, footprints, trackAngles, boundaryTransform[11])
 
     # Next, convert all bodies in "CAM-Ready Bodies" into SubComponents
-    # This is needed to allow them to move individually when Joints are applied
-    objCollection = adsk.core.ObjectCollection.create()
-    for body in camReadyCompOcc.bRepBodies:
-        newCompBody: adsk.fusion.Component = body.createComponent()
-        if objCollection.count == 0:
-            objCollection.add(newCompBody)
-
-    # Create Planar Joints for all bodies in "CAM-ready Bodies"
-    # This allows the user to easily position them
-    for childOcc in camReadyCompOcc.childOccurrences:
-        body = childOcc.bRepBodies.item(0)
-        body.isSelectable = False
-        bottomFace = getBodyBottomFace(body)
-        geo0 = adsk.fusion.JointGeometry.createByPlanarFace(bottomFace, None, adsk.fusion.JointKeyPointTypes.CenterKeyPoint)
-        sketchProfile = _destPlaneInput.selection(0).entity
-        geo1 = adsk.fusion.JointGeometry.createByProfile(sketchProfile, None, adsk.fusion.JointKeyPointTypes.CenterKeyPoint)
-        joints: adsk.fusion.Joints = newParentComponent.component.joints
-        jointInput = joints.createInput(geo0, geo1)
-        jointInput.setAsPlanarJointMotion(adsk.fusion.JointDirections.ZAxisJointDirection)
-        jointInput.isFlipped = True
-        joint = joints.add(jointInput)
+    # This is needed to allow them to move individually
+    # Each new occurrence is found from the component its record's body was moved into, never by position,
+    # so parts of earlier runs in "CAM-Ready Bodies" cannot be mistaken for this run's
+    _profiler.beginStage('createComponents')
+    camReadyComp = camReadyCompOcc.component
+    partOccurrences = {}
+    componentByLine = {}
+    for record, transformData in zip(camReadyRecords, layoutTransforms):
+        partBody = cellRegistry.entity(record, 'camReady').createComponent()
+        componentByLine[record.lineIndex] = partBody.parentComponent
+        occurrence = camReadyComp.occurrencesByComponent(partBody.parentComponent).item(0)
+        matrix = adsk.core.Matrix3D.create()
+        matrix.setWithArray(transformData)
+        occurrence.transform2 = matrix
+        partOccurrences[record.lineIndex] = occurrence.createForAssemblyContext(camReadyCompOcc)
+        cellRegistry.bind(record, 'part', partOccurrences[record.lineIndex].entityToken)
+        occBody = partOccurrences[record.lineIndex].bRepBodies.item(0)
+        cellRegistry.bind(record, 'component', occBody.entityToken, occBody)
+
+    # Reusing cells become more occurrences of their built cell's component, no B-Rep is copied.
+    # In "Copied Bodies" they are placed where they belong in the pattern, next to the built cells' copies
+    for record, transformData in zip(reuseRecords, layoutTransforms[len(camReadyRecords):]):
+        sourceLine, reuseTransform = reuseTransforms[record.lineIndex]
+        component = componentByLine[sourceLine]
+        matrix = adsk.core.Matrix3D.create()
+        matrix.setWithArray(layout.multiply(transformData, reuseTransform))
+        occurrence = camReadyComp.occurrences.addExistingComponent(component, matrix)
+        partOccurrences[record.lineIndex] = occurrence.createForAssemblyContext(camReadyCompOcc)
+        cellRegistry.bind(record, 'part', partOccurrences[record.lineIndex].entityToken)
+        occBody = partOccurrences[record.lineIndex].bRepBodies.item(0)
+        cellRegistry.bind(record, 'component', occBody.entityToken, occBody)
+
+        inPlaceMatrix = adsk.core.Matrix3D.create()
+        inPlaceMatrix.setWithArray(reuseTransform)
+        inPlaceOccurrence = newParentComponent.component.occurrences.addExistingComponent(component, inPlaceMatrix)
+        cellRegistry.bind(record, 'inPlace', inPlaceOccurrence.entityToken)
+
+    # Capture the new occurrence positions in a single timeline entry
+    if design.snapshots.hasPendingSnapshot:
+        design.snapshots.add()
+
+    # Optionally create Planar Joints for all bodies in "CAM-ready Bodies"
+    # This allows the user to easily slide them around
+    # As-built joints keep every part where the layout put it, instead of snapping it to the destination's center
+    layoutMode = _layoutModeInput.selectedItem.name if _layoutModeInput else LAYOUT_MODE_TRANSFORM
+    if layoutMode == LAYOUT_MODE_JOINTS:
+        _profiler.beginStage('joints')
+        asBuiltJoints: adsk.fusion.AsBuiltJoints = root.asBuiltJoints
+        for record in placedRecords:
+            body = cellRegistry.entity(record, 'component')
+            if body is None:
+                continue
+            body.isSelectable = False
+            bottomFace = getBodyBottomFace(body)
+            geometry = adsk.fusion.JointGeometry.createByPlanarFace(bottomFace, None, adsk.fusion.JointKeyPointTypes.CenterKeyPoint)
+            jointInput = asBuiltJoints.createInput(partOccurrences[record.lineIndex], camReadyCompOcc, geometry)
+            jointInput.setAsPlanarJointMotion(adsk.fusion.JointDirections.ZAxisJointDirection)
+            asBuiltJoints.add(jointInput)
 
     # Make 2 MoveFeatures that cancel out
     # This is to allow the Joints created above to be rolled up into the singular CustomFeature 
+    _profiler.beginStage('customFeature')
     objCollection = adsk.core.ObjectCollection.create()
     [objCollection.add(body) for body in spawnBodyComp.bRepBodies]
     transform = adsk.core.Matrix3D.create()   
@@ -534,13 +1486,44 @@ def spawnBodyCopies(args):
     # Roll all new features above into a Custom feature
     custFeatInput = rootComp.features.customFeatures.createInput(_customFeatureDef)
     custFeatInput.setStartAndEndFeatures(firstFeature, lastFeature)
-    rootComp.features.customFeatures.add(custFeatInput)
+    custFeatInput.addDependency('boundarySketch', boundarySketch)
+    custFeatInput.addDependency('directionSketch', sketch)
+    custFeatInput.addDependency('spawnBody', spawnBody)
+    custFeatInput.addDependency('destProfile', destProfile)
+    custFeatInput.addCustomParameter('cellHeight', 'Cell Height', adsk.core.ValueInput.createByString(_cellHeightInput.expression),
+                                     design.unitsManager.defaultLengthUnits, True)
+    custFeatInput.addCustomParameter('cellChamferAngle', 'Cell Chamfer Angle', adsk.core.ValueInput.createByString(_cellChamferAngleInput.expression),
+                                     'deg', True)
+    customFeature = rootComp.features.customFeatures.add(custFeatInput)
+
+    # Persist the registry so a later edit can restore it in one pass
+    customFeature.attributes.add('AbstractCellGen1', 'CellRegistry', cellRegistry.toJson())
+    if reuseCongruent:
+        customFeature.attributes.add('AbstractCellGen1', 'ReuseCongruent', '1')
+    if _nestPartsInput is None or _nestPartsInput.value:
+        customFeature.attributes.add('AbstractCellGen1', 'NestParts', '1')
+
+    # The run is complete, nothing is left to resume
+    clearCheckpoint(design)
+
+def writeToPalette(text):
+    textPalette: adsk.core.TextCommandPalette = _ui.palettes.itemById('TextCommands')
+    textPalette.writeText(text)
 
-    return directionLineMidpointsCol, copiedBodiesCol
+# Lets Fusion process its events between chunks of a long run, after writing out log messages that have waited long enough
+def yieldToFusion():
+    _log.tick()
+    adsk.doEvents()
 
+# Traceback of a caught exception, for the log
+def formatError(error):
+
+    return ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+
+# Writes straight away, after anything still buffered in the log
 def showMessage(message, error = False):
-    textPalette: adsk.core.TextCommandPalette = _ui.palettes.itemById('TextCommands')
-    textPalette.writeText(message)
+    _log.flush()
+    writeToPalette(message)
 
     if error:
         _ui.messageBox(message)
\ No newline at end of file
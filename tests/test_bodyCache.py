@@ -0,0 +1,80 @@
+# Headless checks of cellGen.bodyCache: size-bounded LRU eviction, hit & miss statistics, key versions
+# and turning the cache on from the environment.
+#
+#   python -m pytest tests
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import bodyCache
+
+def store(cache, key, size):
+    stagingPath = cache.stagingPath()
+    with open(stagingPath, 'wb') as f:
+        f.write(b'x' * size)
+    return cache.put(key, stagingPath)
+
+def test_lruEviction(tmp_path):
+    cache = bodyCache.DiskCache(str(tmp_path), 25)
+    store(cache, 'a', 10)
+    store(cache, 'b', 10)
+    assert cache.get('a')
+    store(cache, 'c', 10)
+
+    # 'b' was used longest ago
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.totalBytes == 20
+    assert not os.path.exists(cache.path('b'))
+    assert cache.get('b') is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hitRate': 0.5, 'stores': 3, 'evictions': 1, 'entries': 2, 'bytes': 20}
+
+def test_sizeBound(tmp_path):
+    cache = bodyCache.DiskCache(str(tmp_path), 25)
+    store(cache, 'a', 10)
+    assert not store(cache, 'huge', 26)
+    assert list(cache.entries) == ['a']
+    assert sorted(os.listdir(cache.directory)) == ['a.smt']
+
+    # Storing a key again replaces its entry
+    store(cache, 'a', 20)
+    assert cache.totalBytes == 20 and len(cache) == 1
+
+def test_reopen(tmp_path):
+    cache = bodyCache.DiskCache(str(tmp_path), 100)
+    store(cache, 'a', 10)
+    store(cache, 'b', 5)
+    os.utime(cache.path('a'), (1, 1))
+    # A staging file left by a crashed session is not an entry
+    with open(cache.stagingPath(), 'wb') as f:
+        f.write(b'partial')
+
+    reopened = bodyCache.DiskCache(str(tmp_path), 100)
+    assert list(reopened.entries) == ['a', 'b']
+    assert reopened.totalBytes == 15
+    assert reopened.dropped == 0
+
+def test_keyVersions(tmp_path):
+    os.makedirs(os.path.join(str(tmp_path), 'v1'))
+    for path in (os.path.join(str(tmp_path), 'v1', 'old.smt'), os.path.join(str(tmp_path), 'unversioned.smt')):
+        with open(path, 'wb') as f:
+            f.write(b'x')
+    os.makedirs(os.path.join(str(tmp_path), 'notes'))
+
+    cache = bodyCache.DiskCache(str(tmp_path), 100)
+    assert cache.dropped == 2
+    assert sorted(os.listdir(str(tmp_path))) == ['notes', f"v{bodyCache.KEY_VERSION}"]
+    assert len(cache) == 0
+
+def test_fromEnvironment(tmp_path, monkeypatch):
+    monkeypatch.delenv(bodyCache.DIR_ENV, raising=False)
+    monkeypatch.delenv(bodyCache.SIZE_ENV, raising=False)
+    assert bodyCache.fromEnvironment() is None
+
+    monkeypatch.setenv(bodyCache.DIR_ENV, str(tmp_path))
+    cache = bodyCache.fromEnvironment()
+    assert cache.maxBytes == bodyCache.DEFAULT_SIZE_MB * 1e6
+    assert cache.directory == os.path.join(str(tmp_path), f"v{bodyCache.KEY_VERSION}")
+
+    monkeypatch.setenv(bodyCache.SIZE_ENV, '0')
+    assert bodyCache.fromEnvironment() is None
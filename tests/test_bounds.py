@@ -0,0 +1,79 @@
+# Headless checks of cellGen.bounds: analytic arc & spline bounds against dense sampling of the curves,
+# and the per-command BoundsCache.
+#
+#   python -m pytest tests
+
+import math, os, random, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import bounds
+from cellGen.geometry import DEFAULT_TOLERANCE, ProfileData, evaluateSpline
+
+SAMPLES = 4000
+
+def sampledBounds(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+# The analytic box holds every sample and is no larger than the sampling error, plus tolerance
+def assertBounds(box, sampled, slack):
+    assert box[0] <= sampled[0] + 1e-12 and box[1] <= sampled[1] + 1e-12
+    assert box[2] >= sampled[2] - 1e-12 and box[3] >= sampled[3] - 1e-12
+    assert bounds.boundsDeviation(box, sampled) <= slack
+
+def test_arcBounds():
+    rng = random.Random(1)
+    cases = [(0.0, math.pi / 2), (math.pi / 4, math.pi), (-math.pi / 2, math.pi), (3.0, -2.5), (0.0, 2 * math.pi)]
+    cases += [(rng.uniform(-7.0, 7.0), rng.uniform(-2 * math.pi, 2 * math.pi)) for _ in range(50)]
+    for startAngle, sweepAngle in cases:
+        cx, cy, radius = 1.5, -2.0, 3.0
+        samples = [(cx + radius * math.cos(startAngle + sweepAngle * i / SAMPLES),
+                    cy + radius * math.sin(startAngle + sweepAngle * i / SAMPLES)) for i in range(SAMPLES + 1)]
+        # Samples miss an extreme by at most the sagitta of one step
+        step = abs(sweepAngle) / SAMPLES
+        assertBounds(bounds.arcBounds(cx, cy, radius, startAngle, sweepAngle), sampledBounds(samples),
+                     radius * (1 - math.cos(step)) + 1e-12)
+
+def splineSamples(degree, controlPoints, knots, weights):
+    t0, t1 = knots[degree], knots[len(knots) - degree - 1]
+    return [evaluateSpline(degree, controlPoints, knots, weights or [1.0] * len(controlPoints), t0 + (t1 - t0) * i / SAMPLES)
+            for i in range(SAMPLES + 1)]
+
+def test_splineBounds():
+    rng = random.Random(2)
+    for degree in (2, 3, 5):
+        for rational in (False, True):
+            count = degree + 1 + rng.randrange(6)
+            controlPoints = [(rng.uniform(-10.0, 10.0), rng.uniform(-10.0, 10.0)) for _ in range(count)]
+            inner = sorted(rng.uniform(0.0, 1.0) for _ in range(count - degree - 1))
+            knots = [0.0] * (degree + 1) + inner + [1.0] * (degree + 1)
+            weights = [rng.uniform(0.3, 3.0) for _ in range(count)] if rational else None
+            sampled = sampledBounds(splineSamples(degree, controlPoints, knots, weights))
+            box = bounds.splineBounds(degree, controlPoints, knots, weights)
+            assertBounds(box, sampled, DEFAULT_TOLERANCE + 1e-3)
+
+def test_profileBounds():
+    # A hole does not widen the box, only outer loops count
+    profile = ProfileData(0, [(True, [('arc', 0.0, 0.0, 1.0, 0.0, math.pi), ('line', -1.0, 0.0, 1.0, 0.0)]),
+                              (False, [('circle', 0.0, 0.5, 5.0)])])
+    assert bounds.profileBounds(profile) == (-1.0, 0.0, 1.0, 1.0)
+
+def test_boundsCache():
+    cache = bounds.BoundsCache()
+    square = ProfileData(3, [(True, [('line', 0.0, 0.0, 2.0, 0.0), ('line', 2.0, 0.0, 2.0, 1.0),
+                                     ('line', 2.0, 1.0, 0.0, 1.0), ('line', 0.0, 1.0, 0.0, 0.0)])], key='token3')
+    assert cache.lookup(square) is None
+    assert cache.get(square) == (0.0, 0.0, 2.0, 1.0)
+    assert cache.lookup(square) == (0.0, 0.0, 2.0, 1.0)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # A box stored from elsewhere is served for the profile's key, whichever read of it asks
+    reread = ProfileData(0, square.loops, key='token4')
+    cache.store(reread, (9.0, 9.0, 9.0, 9.0))
+    assert cache.get(ProfileData(7, [], key='token4')) == (9.0, 9.0, 9.0, 9.0)
+    assert cache.hits == 2
+
+    cache.clear()
+    assert cache.lookup(square) is None
@@ -0,0 +1,122 @@
+# Headless round trips of cellGen.congruence: cells put in one class really are the same shape, the
+# transforms move the representative onto each member, and stay right once taken to world space.
+#
+#   python -m pytest tests
+
+import math, os, random, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import congruence, layout
+from cellGen.geometry import ProfileData
+
+# Arms of different lengths, so the L is not its own mirror image
+L_SHAPE = [(0.0, 0.0), (3.0, 0.0), (3.0, 1.0), (1.0, 1.0), (1.0, 2.0), (0.0, 2.0)]
+L_MIDPOINT, L_ANGLE = (0.5, 0.5), 0.3
+
+def lines(polygon):
+    return [('line', x0, y0, x1, y1) for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1])]
+
+def rigid(angle, x, y):
+    return layout.multiply(layout.translation(x, y, 0.0), layout.rotationZ(angle))
+
+def mirrorX(points):
+    return [(x, -y) for x, y in points]
+
+# A cell moved by a rigid motion, its loops starting at another vertex and, when reverse is set, running the other way
+def placed(motion, polygon, midpoint, angle, shift=0, reverse=False):
+    moved = layout.transformPoints(motion, polygon)
+    moved = moved[shift:] + moved[:shift]
+    if reverse:
+        moved = moved[::-1]
+    return moved, layout.transformPoints(motion, [midpoint])[0], angle + math.atan2(motion[4], motion[0])
+
+def classify(cells):
+    ownedProfiles = [(ProfileData(i, [(True, lines(polygon))]), i) for i, (polygon, _, _) in enumerate(cells)]
+    return congruence.classifyCells(ownedProfiles, [midpoint for _, midpoint, _ in cells], [angle for _, _, angle in cells])
+
+def sameLoop(a, b):
+    key = lambda points: sorted((round(x, 6) + 0.0, round(y, 6) + 0.0) for x, y in points)
+    return key(a) == key(b)
+
+# Every member is the representative moved by its transform: loop, direction line midpoint and direction
+def assertRoundTrip(cellClass, cells):
+    repPolygon, repMidpoint, repAngle = cells[cellClass.representative[1]]
+    for _, lineIndex, transform in cellClass.members:
+        polygon, midpoint, angle = cells[lineIndex]
+        assert sameLoop(layout.transformPoints(transform, repPolygon), polygon)
+        movedMidpoint = layout.transformPoints(transform, [repMidpoint])[0]
+        assert math.dist(movedMidpoint, midpoint) < 1e-9
+        turned = math.atan2(transform[4], transform[0])
+        assert abs(math.remainder(repAngle + turned - angle, 2 * math.pi)) < 1e-9
+
+def test_congruentCells():
+    rng = random.Random(1)
+    cells = [(L_SHAPE, L_MIDPOINT, L_ANGLE)]
+    for i in range(12):
+        motion = rigid(rng.uniform(-math.pi, math.pi), rng.uniform(-50.0, 50.0), rng.uniform(-50.0, 50.0))
+        cells.append(placed(motion, L_SHAPE, L_MIDPOINT, L_ANGLE, shift=i % len(L_SHAPE), reverse=i % 2 == 1))
+    classes = classify(cells)
+    assert len(classes) == 1 and len(classes[0]) == len(cells)
+    assertRoundTrip(classes[0], cells)
+
+def test_mirroredCells():
+    rng = random.Random(2)
+    mirrored = (mirrorX(L_SHAPE), mirrorX([L_MIDPOINT])[0], -L_ANGLE)
+    cells = [(L_SHAPE, L_MIDPOINT, L_ANGLE), mirrored]
+    for _ in range(4):
+        motion = rigid(rng.uniform(-math.pi, math.pi), rng.uniform(-50.0, 50.0), rng.uniform(-50.0, 50.0))
+        cells.append(placed(motion, L_SHAPE, L_MIDPOINT, L_ANGLE))
+        cells.append(placed(motion, *mirrored, reverse=True))
+
+    # A mirror image cannot be reached by a rigid motion, so the mirrored L's are a class of their own
+    classes = classify(cells)
+    assert [sorted(lineIndex for _, lineIndex, _ in cellClass.members) for cellClass in classes] == [[0, 2, 4, 6, 8], [1, 3, 5, 7, 9]]
+    for cellClass in classes:
+        assertRoundTrip(cellClass, cells)
+
+    # A symmetric cell with its line on the axis of symmetry is its own mirror image
+    rectangle = [(0.0, 0.0), (4.0, 0.0), (4.0, 2.0), (0.0, 2.0)]
+    symmetric = [(rectangle, (1.0, 1.0), 0.0), (mirrorX(rectangle), (1.0, -1.0), 0.0)]
+    classes = classify(symmetric)
+    assert len(classes) == 1
+    assertRoundTrip(classes[0], symmetric)
+
+def test_differentCells():
+    # Same outline, but the line elsewhere in it or turned the other way
+    cells = [(L_SHAPE, L_MIDPOINT, L_ANGLE), (L_SHAPE, (0.5, 1.5), L_ANGLE), (L_SHAPE, L_MIDPOINT, L_ANGLE + 0.1),
+             (L_SHAPE, L_MIDPOINT, L_ANGLE + math.pi)]
+    assert len(classify(cells)) == 4
+
+def test_holes():
+    frame = [(0.0, 0.0), (6.0, 0.0), (6.0, 4.0), (0.0, 4.0)]
+    hole = [(1.0, 1.0), (2.0, 1.0), (2.0, 3.0), (1.0, 3.0)]
+    motion = rigid(1.1, 7.0, -3.0)
+    profiles = [ProfileData(0, [(True, lines(frame)), (False, lines(hole))]),
+                ProfileData(1, [(True, lines(layout.transformPoints(motion, frame))), (False, lines(layout.transformPoints(motion, hole)))]),
+                ProfileData(2, [(True, lines(frame)), (False, lines([(x + 3.0, y) for x, y in hole]))])]
+    midpoints = [(4.0, 2.0), layout.transformPoints(motion, [(4.0, 2.0)])[0], (4.0, 2.0)]
+    classes = congruence.classifyCells([(profile, profile.index) for profile in profiles], midpoints, [0.0, 1.1, 0.0])
+    assert [[lineIndex for _, lineIndex, _ in cellClass.members] for cellClass in classes] == [[0, 1], [2]]
+    assert sameLoop(layout.transformPoints(classes[0].members[1][2], hole), layout.transformPoints(motion, hole))
+
+def apply3D(matrix, point):
+    x, y, z = point
+    return tuple(matrix[r * 4] * x + matrix[r * 4 + 1] * y + matrix[r * 4 + 2] * z + matrix[r * 4 + 3] for r in range(3))
+
+# In world space, the transform moves the representative's world points onto the member's, for a tilted, moved sketch
+def test_worldTransform():
+    tilt = math.radians(35)
+    rotationX = (1.0, 0.0, 0.0, 0.0, 0.0, math.cos(tilt), -math.sin(tilt), 0.0, 0.0, math.sin(tilt), math.cos(tilt), 0.0, 0.0, 0.0, 0.0, 1.0)
+    sketchMatrix = layout.multiply(layout.translation(3.0, -2.0, 5.0), layout.multiply(rotationX, layout.rotationZ(0.4)))
+    rng = random.Random(3)
+    cells = [(L_SHAPE, L_MIDPOINT, L_ANGLE)]
+    cells += [placed(rigid(rng.uniform(-math.pi, math.pi), rng.uniform(-9.0, 9.0), rng.uniform(-9.0, 9.0)), L_SHAPE, L_MIDPOINT, L_ANGLE)
+              for _ in range(5)]
+    (cellClass,) = classify(cells)
+    for _, lineIndex, transform in cellClass.members:
+        world = congruence.worldTransform(sketchMatrix, transform)
+        for repPoint, memberPoint in zip(L_SHAPE, layout.transformPoints(transform, L_SHAPE)):
+            for z in (0.0, 1.5):
+                moved = apply3D(world, apply3D(sketchMatrix, repPoint + (z,)))
+                assert math.dist(moved, apply3D(sketchMatrix, memberPoint + (z,))) < 1e-9
@@ -0,0 +1,55 @@
+# Headless checks of the direct build engine against the parametric one, on the fake adsk layer.
+#
+#   python -m pytest tests
+
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+os.environ['ABSTRACT_CELL_CACHE_MB'] = '0'
+
+import spawnBodyCopiesBench as bench
+
+# At the default 1 cm height and 30 deg chamfer, short edges of about a third of these
+# Voronoi cells shrink to nothing before the top of the chamfer.
+# bodiesInDesign is counted after the bench's recomputes. Direct used to leave one body more than
+# Parametric there: its recompute built the cell the bench adds, which a compute now rejects
+def test_voronoiBodyCount():
+    runs = {engine: bench.runScenario('voronoi', 100, engine, 'Batched', 'Transform', seed=1)
+            for engine in ('Parametric', 'Direct')}
+    for run in runs.values():
+        assert not run['errors'], run['errors']
+        assert run['skippedCells'] == 0
+    assert runs['Direct']['bodiesAfterExecute'] == runs['Parametric']['bodiesAfterExecute']
+    assert runs['Direct']['bodiesInDesign'] == runs['Parametric']['bodiesInDesign']
+
+# {line index: (volume, bounding box)} of every built cell's copy in "Copied Bodies"
+def cellShapes(engine):
+    scenario = bench.Scenario('voronoi', 100, engine, 'Batched', 'Transform', seed=1)
+    scenario.execute()
+    addin = scenario.addin
+    customFeature = scenario.design.rootComponent.features.customFeatures.item(0)
+    cellRegistry = addin.registry.CellRegistry.fromJson(customFeature.attributes.itemByName('AbstractCellGen1', 'CellRegistry').value)
+    shapes = {}
+    for record in cellRegistry.records:
+        body = addin.findEntity(scenario.design, record.tokens.get('copied'))
+        box = body.boundingBox
+        shapes[record.lineIndex] = (body.volume, box.minPoint.asArray() + box.maxPoint.asArray(), record.profileIndex)
+    profiles = {profileData.index: profileData for profileData in addin.fusionIO.readProfiles(scenario.boundarySketch)}
+    height = customFeature.parameters.itemById('cellHeight').value
+    chamferAngle = customFeature.parameters.itemById('cellChamferAngle').value
+    expected = {lineIndex: addin.frustum.frustumVolume(profiles[profileIndex], height, chamferAngle)
+                for lineIndex, (_, _, profileIndex) in shapes.items()}
+    return shapes, expected
+
+# Every cell comes out in the same place with both engines. The direct cells have the exact chamfered volume;
+# the fake leaves a parametric chamfer's volume alone, so those are only checked not to be smaller
+def test_voronoiCellShapes():
+    parametric, _ = cellShapes('Parametric')
+    direct, expected = cellShapes('Direct')
+    assert parametric.keys() == direct.keys() and len(direct) == 100
+    for lineIndex, (volume, box, profileIndex) in direct.items():
+        parametricVolume, parametricBox, parametricProfile = parametric[lineIndex]
+        assert profileIndex == parametricProfile
+        assert all(abs(a - b) <= 1e-9 for a, b in zip(box, parametricBox)), lineIndex
+        assert abs(volume - expected[lineIndex]) <= 1e-9 * expected[lineIndex], lineIndex
+        assert parametricVolume >= volume * (1 - 1e-9)
@@ -0,0 +1,118 @@
+# Headless checks of exporting cells to files: the STL byte layout, the manifest, and an export run on the
+# fake adsk layer in which a cell comes out empty.
+#
+#   python -m pytest tests
+
+import json, os, struct, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+os.environ['ABSTRACT_CELL_CACHE_MB'] = '0'
+
+import spawnBodyCopiesBench as bench
+from cellGen import export
+
+# A unit right triangle in the XY plane and a second one standing in XZ, in cm
+MESHES = [([0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0], [0, 1, 2]),
+          ([0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0], [0, 1, 2])]
+
+# [(normal, (a, b, c), attribute)] of a binary STL file
+def readBinaryStl(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    count, = struct.unpack_from('<I', data, 80)
+    assert len(data) == 84 + 50 * count
+    triangles = []
+    for t in range(count):
+        values = struct.unpack_from('<12fH', data, 84 + 50 * t)
+        triangles.append((values[0:3], (values[3:6], values[6:9], values[9:12]), values[12]))
+    return data[:80], triangles
+
+def test_binaryStl(tmp_path):
+    path = str(tmp_path / 'cells.stl')
+    assert export.writeBinaryStl(path, MESHES, export.STL_SCALE) == [1, 1]
+    header, triangles = readBinaryStl(path)
+    assert header == b'AbstractCellGen'.ljust(80, b' ')
+    assert len(triangles) == 2
+
+    normal, (a, b, c), attribute = triangles[0]
+    assert normal == (0.0, 0.0, 1.0) and attribute == 0
+    # cm are written as mm
+    assert (a, b, c) == ((0.0, 0.0, 0.0), (10.0, 0.0, 0.0), (0.0, 10.0, 0.0))
+    assert triangles[1][0] == (0.0, 1.0, 0.0)
+
+def test_manifest(tmp_path):
+    manifest = export.ExportManifest(str(tmp_path), export.FORMAT_STL, {'cellHeight': 1.0}, stem='cells')
+    path = manifest.nextPath()
+    assert os.path.basename(path) == 'cells-0001.stl'
+    triangleCounts = export.writeBinaryStl(path, MESHES + MESHES[:1], export.STL_SCALE)
+    manifest.addFile(path, [{'lineIndex': 4}, {'lineIndex': 2}, {'lineIndex': 7}], [2, 0, 1])
+    manifest.addSkipped(3, 'empty intersection with the spawn body')
+    assert os.path.basename(manifest.nextPath()) == 'cells-0002.stl'
+
+    with open(manifest.write()) as f:
+        written = json.load(f)
+    assert written == json.loads(json.dumps(manifest.toDict()))
+    assert (written['format'], written['units'], written['complete']) == ('STL', 'mm', False)
+    assert written['settings'] == {'cellHeight': 1.0}
+    assert written['files'] == [{'file': 'cells-0001.stl', 'cells': 3, 'bytes': 84 + 50 * 3}]
+    assert [(cell['lineIndex'], cell['bodyIndex'], cell['firstTriangle'], cell['triangleCount']) for cell in written['cells']] \
+        == [(4, 0, 0, 2), (2, 1, 2, 0), (7, 2, 2, 1)]
+    assert written['skipped'] == [{'lineIndex': 3, 'reason': 'empty intersection with the spawn body'}]
+    assert 'incomplete' in manifest.summary()
+
+    step = export.ExportManifest(str(tmp_path), export.FORMAT_STEP, stem='cells')
+    assert step.toDict()['units'] == 'cm' and step.nextPath().endswith('cells-0001.step')
+
+# Manifest of an STL export of square cells, with the cells of emptyProfiles coming out empty, and the
+# translations of the layout the cells were given
+def exportSquares(emptyProfiles=()):
+    scenario = bench.Scenario('square', 9, 'Direct', 'Batched', 'Transform', seed=1, reuse=False,
+                              outputMode='Export Files', exportFormat='STL')
+    fusionBuild = scenario.addin.fusionBuild
+    buildCellBody = fusionBuild.buildCellBody
+    def buildOrEmpty(profileData, *args):
+        return None if profileData.index in emptyProfiles else buildCellBody(profileData, *args)
+    fusionBuild.buildCellBody = buildOrEmpty
+    addin = scenario.addin
+    getLayoutTransforms = addin.getLayoutTransforms
+    layouts = []
+    def recordLayout(*args, **kwargs):
+        layouts.append(getLayoutTransforms(*args, **kwargs))
+        return layouts[-1]
+    addin.getLayoutTransforms = recordLayout
+    try:
+        scenario.execute()
+    finally:
+        fusionBuild.buildCellBody = buildCellBody
+        addin.getLayoutTransforms = getLayoutTransforms
+    names = [name for name in os.listdir(scenario.exportDir) if name.endswith('-manifest.json')]
+    with open(os.path.join(scenario.exportDir, names[0])) as f:
+        manifest = json.load(f)
+    assert len(layouts) == 1
+    return manifest, translations(layouts[0]), scenario.exportDir
+
+def translations(transforms):
+    return sorted((round(transform[3], 6), round(transform[7], 6)) for transform in transforms)
+
+# An empty cell is listed as skipped and the cells after it move up, the layout has no gap where it would have been
+def test_emptyCellLeavesNoGap():
+    full, fullLayout, _ = exportSquares()
+    assert full['complete'] and not full['skipped'] and len(full['cells']) == 9
+    emptyCell = full['cells'][4]
+
+    partial, layout, exportDir = exportSquares({emptyCell['profileIndex']})
+    assert partial['complete']
+    assert partial['skipped'] == [{'lineIndex': emptyCell['lineIndex'], 'reason': 'empty intersection with the spawn body'}]
+    assert [cell['lineIndex'] for cell in partial['cells']] == [cell['lineIndex'] for cell in full['cells'] if cell is not emptyCell]
+
+    # The layout is made for the cells that came out, each of its slots holds one
+    assert translations(cell['transform'] for cell in full['cells']) == fullLayout
+    assert len(layout) == 8 and translations(cell['transform'] for cell in partial['cells']) == layout
+
+    # Every cell's triangles are in the file where the manifest says
+    _, triangles = readBinaryStl(os.path.join(exportDir, partial['files'][0]['file']))
+    firstTriangle = 0
+    for cell in partial['cells']:
+        assert cell['triangleCount'] > 0 and cell['firstTriangle'] == firstTriangle
+        firstTriangle += cell['triangleCount']
+    assert len(partial['files']) == 1 and len(triangles) == firstTriangle
@@ -0,0 +1,74 @@
+# Headless checks of cellGen.fingerprint: what counts as an edit, and how an incremental update is planned.
+#
+#   python -m pytest tests
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import fingerprint
+from cellGen.geometry import ProfileData
+
+def square(index, minX, minY, side=1.0):
+    return ProfileData(index, [(True, [('line', minX, minY, minX + side, minY), ('line', minX + side, minY, minX + side, minY + side),
+                                       ('line', minX + side, minY + side, minX, minY + side), ('line', minX, minY + side, minX, minY)])])
+
+def cell(profile, line=((0.5, 0.2, 0.0), (0.5, 0.8, 0.0)), spawn='spawn', height=1.0, chamferAngle=0.5):
+    return fingerprint.cellFingerprint(fingerprint.profileFingerprint(profile), fingerprint.lineFingerprint(*line),
+                                       spawn, height, chamferAngle)
+
+def test_fingerprints():
+    base = cell(square(0, 0.0, 0.0))
+    # Round-trip noise and the profile's index are not edits
+    assert cell(square(7, 1e-9, 0.0)) == base
+    assert fingerprint.valuesFingerprint(1.0, 2) == fingerprint.valuesFingerprint(1.0 + 1e-10, 2)
+
+    # Every input of a cell is
+    edits = [cell(square(0, 0.01, 0.0)), cell(square(0, 0.0, 0.0, 1.01)),
+             cell(square(0, 0.0, 0.0), line=((0.5, 0.2, 0.0), (0.6, 0.8, 0.0))),
+             cell(square(0, 0.0, 0.0), spawn='other'), cell(square(0, 0.0, 0.0), height=1.5),
+             cell(square(0, 0.0, 0.0), chamferAngle=0.6)]
+    assert len(set(edits + [base])) == len(edits) + 1
+
+    # So is moving the sketch the profile is in
+    moved = (1.0, 0.0, 0.0, 2.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+    assert fingerprint.profileFingerprint(square(0, 0.0, 0.0), moved) != fingerprint.profileFingerprint(square(0, 0.0, 0.0))
+
+def test_planIncrementalUpdate():
+    existing = {'a': 'bodyA', 'b': 'bodyB', 'c': 'bodyC'}
+    kept, toBuild, stale = fingerprint.planIncrementalUpdate(existing, [('a', 0), ('x', 1), ('c', 2)])
+    assert kept == [(0, 'bodyA'), (2, 'bodyC')]
+    assert toBuild == [('x', 1)]
+    assert stale == ['bodyB']
+    assert existing == {'a': 'bodyA', 'b': 'bodyB', 'c': 'bodyC'}
+
+    assert fingerprint.planIncrementalUpdate(existing, [('a', 0), ('b', 1), ('c', 2)])[1:] == ([], [])
+
+# Edited cells take over the stale entry of their line, or else of their profile, in the order the keys are given
+def test_matchEdits():
+    # Items are (profile index, line index), entries (name, profile index, line index)
+    stale = [('onLine', 5, 1), ('onProfile', 3, 9), ('unused', 8, 8)]
+    toBuild = [('fp1', (4, 1)), ('fp2', (3, 2)), ('fp3', (6, 6))]
+    matched, unmatched, unused = fingerprint.matchEdits(toBuild, stale,
+                                                        [(lambda item: item[1], lambda entry: entry[2]),
+                                                         (lambda item: item[0], lambda entry: entry[1])])
+    assert matched == [('fp1', (4, 1), ('onLine', 5, 1)), ('fp2', (3, 2), ('onProfile', 3, 9))]
+    assert unmatched == [('fp3', (6, 6))]
+    assert unused == [('unused', 8, 8)]
+
+    # An entry is taken once, by the first cell that wants it
+    matched, unmatched, _ = fingerprint.matchEdits([('fp1', 1), ('fp2', 1)], [1], [(lambda item: item, lambda entry: entry)])
+    assert matched == [('fp1', 1, 1)] and unmatched == [('fp2', 1)]
+
+def test_lruCache():
+    cache = fingerprint.LruCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    # 'b' was used longest ago
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert (cache.hits, cache.misses, len(cache)) == (3, 1, 2)
+    cache.clear()
+    assert len(cache) == 0 and cache.get('a') is None
@@ -0,0 +1,78 @@
+# Headless checks of the generate command on the fake adsk layer, run more than once on the same design.
+#
+#   python -m pytest tests
+
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+os.environ['ABSTRACT_CELL_CACHE_MB'] = '0'
+
+import spawnBodyCopiesBench as bench
+
+IDENTITY = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+def cellRegistry(scenario, customFeature):
+    return scenario.addin.registry.CellRegistry.fromJson(customFeature.attributes.itemByName('AbstractCellGen1', 'CellRegistry').value)
+
+# A second run adds its parts to the "CAM-Ready Bodies" an earlier run made, and lays every one of them out
+def test_generateTwice():
+    for engine in ('Parametric', 'Direct'):
+        scenario = bench.Scenario('square', 9, engine, 'Batched', 'Transform', seed=1)
+        scenario.execute()
+        scenario.command = scenario.createCommand()
+        scenario.execute()
+        assert not [line for line in scenario.paletteLines() if 'Failed' in line or 'Traceback' in line]
+
+        design = scenario.design
+        camReady = design.allComponents.itemByName('CAM-Ready Bodies')
+        assert design.rootComponent.occurrencesByComponent(camReady).count == 1
+        customFeatures = design.rootComponent.features.customFeatures
+        assert customFeatures.count == 2
+        parts = [scenario.addin.findEntity(design, record.tokens.get('part'))
+                 for index in range(customFeatures.count) for record in cellRegistry(scenario, customFeatures.item(index)).records]
+        assert len(parts) == 18 and all(parts)
+        assert camReady.occurrences.count == 18
+        assert all(list(part.transform2.asArray()) != IDENTITY for part in parts)
+
+# Every part holds the cell of the record it is bound to, whatever parts "CAM-Ready Bodies" already has
+def test_partsMatchRecords():
+    scenario = bench.Scenario('hex', 12, 'Direct', 'Batched', 'Transform', seed=1, directionAngles=[0.0])
+    for _ in range(2):
+        scenario.command = scenario.createCommand()
+        scenario.execute()
+    customFeatures = scenario.design.rootComponent.features.customFeatures
+    for index in range(customFeatures.count):
+        records = cellRegistry(scenario, customFeatures.item(index)).records
+        fingerprintByLine = {record.lineIndex: record.fingerprint for record in records}
+        assert any(record.sourceLine is not None for record in records)
+        for record in records:
+            part = scenario.addin.findEntity(scenario.design, record.tokens['part'])
+            built = fingerprintByLine[record.sourceLine if record.sourceLine is not None else record.lineIndex]
+            assert part.bRepBodies.item(0).attributes.itemByName('AbstractCellGen1', 'CellFingerprint').value == built
+
+# A failed chunk leaves its run's checkpoint in the store, outside the design, and running again resumes from it
+def test_resumeAfterFailedChunk(tmp_path, monkeypatch):
+    monkeypatch.setenv('ABSTRACT_CELL_CHECKPOINT_DIR', str(tmp_path))
+    scenario = bench.Scenario('square', 120, 'Direct', 'Batched', 'Transform', seed=1, reuse=False)
+    fusionBuild = scenario.addin.fusionBuild
+    buildCellBody = fusionBuild.buildCellBody
+    calls = []
+    def failingBuild(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 70:
+            raise RuntimeError('boom')
+        return buildCellBody(*args, **kwargs)
+    monkeypatch.setattr(fusionBuild, 'buildCellBody', failingBuild)
+    scenario.execute()
+    assert scenario.design.attributes.itemByName('AbstractCellGen1', 'Checkpoint') is None
+    saved = os.listdir(str(tmp_path))
+    assert len(saved) == 1
+    with open(os.path.join(str(tmp_path), saved[0])) as f:
+        assert len(scenario.addin.scheduler.Checkpoint.fromJson(f.read()).cells) == scenario.addin.GENERATION_CHUNK_SIZE
+
+    monkeypatch.setattr(fusionBuild, 'buildCellBody', buildCellBody)
+    scenario.command = scenario.createCommand()
+    scenario.execute()
+    assert any('Resuming' in line for line in scenario.paletteLines())
+    assert scenario.design.rootComponent.features.customFeatures.count == 1
+    assert os.listdir(str(tmp_path)) == []
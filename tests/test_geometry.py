@@ -0,0 +1,100 @@
+# Headless checks of cellGen.geometry.classifyProfiles on curved, holed and touching profiles.
+#
+#   python -m pytest tests
+
+import math, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import geometry, patterns, planner
+from cellGen.geometry import ProfileData
+
+IDENTITY = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+def rectangle(minX, minY, maxX, maxY):
+    return [('line', minX, minY, maxX, minY), ('line', maxX, minY, maxX, maxY),
+            ('line', maxX, maxY, minX, maxY), ('line', minX, maxY, minX, minY)]
+
+def square(index, minX, minY, side=1.0):
+    return ProfileData(index, [(True, rectangle(minX, minY, minX + side, minY + side))])
+
+# [(profile index, line index)] of classifyProfiles
+def owners(profiles, midpoints):
+    return [(profile.index, lineIndex) for profile, lineIndex in geometry.classifyProfiles(profiles, midpoints)]
+
+def test_arc():
+    # Half disc over the chord from (0, 0) to (2, 0), its curves given out of order
+    halfDisc = ProfileData(0, [(True, [('arc', 1.0, 0.0, 1.0, 0.0, math.pi), ('line', 0.0, 0.0, 2.0, 0.0)])])
+    assert owners([halfDisc], [(1.9, 0.9), (1.0, 0.9)]) == [(0, 1)]
+    assert owners([ProfileData(0, [(True, [('circle', 0.0, 0.0, 1.0)])])], [(0.75, 0.75), (0.6, 0.6)]) == [(0, 1)]
+
+def test_spline():
+    # The quadratic peaks at y = 1, halfway to its middle control point
+    arch = ProfileData(0, [(True, [('spline', 2, [(0.0, 0.0), (1.0, 2.0), (2.0, 0.0)], [0, 0, 0, 1, 1, 1], None),
+                                   ('line', 2.0, 0.0, 0.0, 0.0)])])
+    assert owners([arch], [(1.0, 1.1)]) == []
+    assert owners([arch], [(1.0, 1.1), (1.0, 0.9)]) == [(0, 1)]
+
+    rational = ProfileData(0, [(True, [('spline', 2, [(0.0, 0.0), (1.0, 2.0), (2.0, 0.0)], [0, 0, 0, 1, 1, 1], [1.0, 3.0, 1.0]),
+                                       ('line', 2.0, 0.0, 0.0, 0.0)])])
+    assert owners([rational], [(1.0, 1.4)]) == [(0, 0)]
+
+def test_hole():
+    frame = ProfileData(0, [(True, rectangle(0.0, 0.0, 4.0, 4.0)), (False, rectangle(1.0, 1.0, 3.0, 3.0))])
+    assert owners([frame], [(2.0, 2.0)]) == []
+    assert owners([frame], [(2.0, 2.0), (0.5, 0.5)]) == [(0, 1)]
+
+    # The profile filling the hole owns the midpoint inside it
+    island = square(1, 1.0, 1.0, 2.0)
+    assert owners([frame, island], [(2.0, 2.0), (0.5, 0.5)]) == [(0, 1), (1, 0)]
+
+# A midpoint on an edge shared by two profiles has one owner, whatever else the profiles hold
+def test_onEdge():
+    left, right = square(0, 0.0, 0.0), square(1, 1.0, 0.0)
+    assert owners([left, right], [(1.0, 0.5)]) == [(0, 0)]
+    assert owners([right, left], [(1.0, 0.5)]) == [(1, 0)]
+    assert owners([left, right], [(1.0, 0.5), (1.5, 0.5)]) == [(0, 0), (1, 1)]
+    assert owners([left, right], [(1.0, 0.5), (0.5, 0.5)]) == [(0, 1), (1, 0)]
+
+    # Four squares around a shared corner, two midpoints on it and one inside the last square
+    grid = [square(0, 0.0, 0.0), square(1, 1.0, 0.0), square(2, 0.0, 1.0), square(3, 1.0, 1.0)]
+    owned = owners(grid, [(1.0, 1.0), (1.0, 1.0), (1.5, 1.5)])
+    assert owned == [(0, 0), (1, 1), (3, 2)]
+    assert len({lineIndex for _, lineIndex in owned}) == len(owned)
+
+# The planner settles edge claims across chunks the way classifyProfiles does in one go
+def test_onEdgeAcrossPlannerChunks(monkeypatch):
+    monkeypatch.setattr(planner, 'CHUNK_SIZE', 1)
+    profiles = [square(index, float(index % 4), float(index // 4)) for index in range(16)]
+    midpoints = [(float(i), float(j) + 0.5) for j in range(4) for i in range(1, 4)] + [(0.5, 3.5)]
+    angles = [0.0] * len(midpoints)
+    plan = planner.planCells(profiles, midpoints, angles, [IDENTITY] * len(midpoints), IDENTITY, 0.2,
+                             math.radians(30), workers=1)
+    assert [(cell.profileIndex, cell.lineIndex) for cell in plan.cells] == owners(profiles, midpoints)
+    lineIndices = [cell.lineIndex for cell in plan.cells]
+    assert len(set(lineIndices)) == len(lineIndices) == len(midpoints)
+
+def planTuples(plan):
+    return [(cell.lineIndex, cell.profileIndex, cell.footprint, cell.trackAngle, cell.signature, cell.layers,
+             cell.expectedVolume, cell.error) for cell in plan.cells]
+
+# A plan made across the worker pool is the serial plan, edge claims and collapsed cells included
+def test_parallelPlanIsSerialPlan(monkeypatch):
+    monkeypatch.setattr(planner, 'MIN_PARALLEL_PROFILES', 0)
+    monkeypatch.setattr(planner, 'CHUNK_SIZE', 7)
+    pattern = patterns.generate('voronoi', 60, 1.0, 1)
+    # Some midpoints on the shared edges of the first cells
+    midpoints = pattern.midpoints()
+    for lineIndex, polygon in enumerate(pattern.polygons[:5]):
+        (x0, y0), (x1, y1) = polygon[0], polygon[1]
+        midpoints[lineIndex] = ((x0 + x1) / 2, (y0 + y1) / 2)
+    angles = [math.degrees(math.atan2(y1 - y0, x1 - x0)) for (x0, y0), (x1, y1) in pattern.lines]
+    args = (pattern.profiles(), midpoints, angles, [IDENTITY] * len(midpoints), IDENTITY, 1.0, math.radians(30))
+
+    serial = planner.planCells(*args, workers=1)
+    fallbacks = []
+    parallel = planner.planCells(*args, workers=2, onFallback=fallbacks.append)
+    assert fallbacks == []
+    assert (serial.mode, parallel.mode, parallel.workers) == ('serial', 'parallel', 2)
+    assert planTuples(parallel) == planTuples(serial)
+    assert any(cell.error for cell in serial.cells) and len(serial.cells) > 50
@@ -0,0 +1,110 @@
+# Headless checks of cellGen.logger: level filtering, when buffered messages reach the sinks, and the
+# rotating log file.
+#
+#   python -m pytest tests
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from cellGen import logger
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def bufferedLogger(level=logger.INFO, **kwargs):
+    clock = Clock()
+    batches = []
+    log = logger.Logger(level, clock=clock, **kwargs)
+    log.addSink(batches.append)
+    return log, clock, batches
+
+def test_parseLevel(monkeypatch):
+    assert logger.parseLevel('debug') == logger.DEBUG
+    assert logger.parseLevel(' Warning ') == logger.WARNING
+    assert logger.parseLevel('15') == 15
+    assert logger.parseLevel('', logger.ERROR) == logger.ERROR
+    with pytest.raises(ValueError):
+        logger.parseLevel('verbose')
+
+    monkeypatch.setenv(logger.LEVEL_ENV, 'verbose')
+    assert logger.levelFromEnvironment() == logger.INFO
+    monkeypatch.setenv(logger.LEVEL_ENV, 'ERROR')
+    assert logger.levelFromEnvironment() == logger.ERROR
+
+def test_levels():
+    log, _, batches = bufferedLogger(logger.WARNING)
+    # Arguments of a message below the level are never formatted
+    log.debug("%d", object())
+    log.info("info %s", 'dropped')
+    log.warning("warning %d", 1)
+    assert log.isEnabledFor(logger.ERROR) and not log.isEnabledFor(logger.INFO)
+    log.flush()
+    assert batches == ['[WARNING] warning 1']
+
+    log.level = logger.DEBUG
+    log.debug("debug %s", 'kept')
+    log.info("info %s", 'kept')
+    log.flush()
+    assert batches[1:] == ['[DEBUG] debug kept\ninfo kept']
+
+def test_buffering():
+    log, clock, batches = bufferedLogger(batchSize=3, flushInterval=1.0)
+    log.info("a")
+    log.info("b")
+    assert batches == []
+    log.info("c")
+    assert batches == ['a\nb\nc']
+
+    # Errors go out straight away, with what was waiting before them
+    log.info("d")
+    log.error("e %s", 'failed')
+    assert batches[1:] == ['d\ne failed']
+
+    # So does the first message once the interval has passed since the last flush
+    log.info("f")
+    clock.now = 1.0
+    log.info("g")
+    assert batches[2:] == ['f\ng']
+    assert log.recent(3) == ['e failed', 'f', 'g']
+
+# A step that logs nothing more still gets its waiting messages out on the next tick, and at shutdown
+def test_tickAndClose():
+    log, clock, batches = bufferedLogger(batchSize=100, flushInterval=1.0)
+    log.info("waiting")
+    log.tick()
+    assert batches == []
+    clock.now = 1.5
+    log.tick()
+    assert batches == ['waiting']
+    clock.now = 5.0
+    log.tick()
+    assert batches == ['waiting']
+
+    log.info("last")
+    log.close()
+    assert batches == ['waiting', 'last'] and log.sinks == []
+
+def test_formatRecord():
+    assert logger.formatRecord((logger.INFO, "%d cells", (3,))) == '3 cells'
+    assert logger.formatRecord((logger.ERROR, "100%", ())) == '100%'
+    # A message that does not match its arguments is still shown
+    assert logger.formatRecord((logger.WARNING, "%d cells", ('x',))) == "[WARNING] %d cells ('x',)"
+
+def test_rotatingFileSink(tmp_path):
+    path = str(tmp_path / 'logs' / 'cellGen.log')
+    sink = logger.RotatingFileSink(path, maxBytes=100, backupCount=2)
+    for index in range(4):
+        sink(f"batch {index} " + 'x' * 60)
+    assert sorted(os.listdir(os.path.dirname(path))) == ['cellGen.log', 'cellGen.log.1', 'cellGen.log.2']
+    with open(path) as f:
+        assert 'batch 3' in f.read()
+    with open(path + '.2') as f:
+        assert 'batch 1' in f.read()
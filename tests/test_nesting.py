@@ -0,0 +1,81 @@
+# Headless checks of cellGen.nesting on stock that is not a rectangle.
+#
+#   python -m pytest tests
+
+import math, os, random, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import nesting
+from cellGen.geometry import polygonBounds
+
+PART_COUNT = 50
+
+def circle(radius, sides=64):
+    return [(radius * math.cos(2 * math.pi * k / sides), radius * math.sin(2 * math.pi * k / sides)) for k in range(sides)]
+
+def randomParts(count, seed=1):
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(count):
+        width, height = rng.uniform(1.5, 3.0), rng.uniform(1.5, 3.0)
+        parts.append([(0.0, 0.0), (width, 0.0), (width, height), (0.0, height)])
+    return parts
+
+# The placed parts' bounding rectangles, after checking each lies inside the stock and none overlap
+def placedRects(parts, result, stock):
+    container = nesting.Container(stock)
+    rects = []
+    for part, offset in zip(parts, result.offsets):
+        if offset is None:
+            continue
+        minX, minY, maxX, maxY = polygonBounds(part)
+        rect = (minX + offset[0], minY + offset[1], maxX + offset[0], maxY + offset[1])
+        assert container.containsRect(*rect), rect
+        rects.append(rect)
+    for i, a in enumerate(rects):
+        for b in rects[:i]:
+            assert a[2] <= b[0] + 1e-9 or b[2] <= a[0] + 1e-9 or a[3] <= b[1] + 1e-9 or b[3] <= a[1] + 1e-9, (a, b)
+    return rects
+
+def checkAllPlaced(stock):
+    parts = randomParts(PART_COUNT)
+    result = nesting.nest(parts, stock)
+    assert result.placed == PART_COUNT, result.summary()
+    assert not result.unplaced
+    assert len(placedRects(parts, result, stock)) == PART_COUNT
+
+def test_circle():
+    checkAllPlaced(circle(20.0))
+
+def test_triangle():
+    checkAllPlaced([(0.0, 0.0), (40.0, 0.0), (20.0, 35.0)])
+
+def test_diamond():
+    checkAllPlaced([(0.0, -20.0), (20.0, 0.0), (0.0, 20.0), (-20.0, 0.0)])
+
+def test_lShape():
+    checkAllPlaced([(0.0, 0.0), (40.0, 0.0), (40.0, 15.0), (15.0, 15.0), (15.0, 40.0), (0.0, 40.0)])
+
+# More parts than fit: the stock fills up without overlaps and the rest is reported unplaced
+def test_overfullCircle():
+    stock = circle(20.0)
+    parts = randomParts(1000)
+    result = nesting.nest(parts, stock)
+    rects = placedRects(parts, result, stock)
+    assert 0 < result.placed == len(rects) < len(parts)
+    assert len(result.unplaced) == len(parts) - result.placed
+    assert result.utilization > 0.5
+
+# Only bounding rectangles are packed: the result reports the stock both the footprints and their rectangles cover
+def test_utilization():
+    stock = circle(20.0)
+    triangles = [[(0.0, 0.0), (width, 0.0), (0.0, height)] for (_, _), (width, _), (_, height), _ in randomParts(PART_COUNT)]
+    result = nesting.nest(triangles, stock)
+    rects = placedRects(triangles, result, stock)
+    assert result.placed == len(rects) == PART_COUNT
+    rectsArea = sum((maxX - minX) * (maxY - minY) for minX, minY, maxX, maxY in rects)
+    assert math.isclose(result.rectsArea, rectsArea)
+    assert math.isclose(result.partsArea, rectsArea / 2)
+    assert math.isclose(result.rectUtilization, 2 * result.utilization)
+    assert 'bounding rectangles' in result.summary()
@@ -0,0 +1,81 @@
+# Headless checks of cellGen.preview: triangulation, and prism meshes rebuilt from the cells' cached offset
+# schedules after height & chamfer edits, against the exact frustums.
+#
+#   python -m pytest tests
+
+import math, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen import frustum, patterns, preview
+from cellGen.geometry import ProfileData, polygonArea
+
+def triangleArea(poly, triangle):
+    return polygonArea([poly[i] for i in triangle])
+
+def test_triangulate():
+    convex = [(0.0, 0.0), (2.0, 0.0), (3.0, 1.0), (1.0, 2.0), (-0.5, 1.0)]
+    notch = [(0.0, 0.0), (4.0, 0.0), (4.0, 3.0), (2.0, 1.0), (0.0, 3.0)]
+    for poly in (convex, notch, convex[::-1], notch[::-1]):
+        triangles = preview.triangulate(poly)
+        assert len(triangles) == len(poly) - 2
+        # Counter-clockwise triangles that cover the polygon exactly
+        assert all(triangleArea(poly, triangle) > 0 for triangle in triangles)
+        assert math.isclose(sum(triangleArea(poly, triangle) for triangle in triangles), abs(polygonArea(poly)))
+
+# Volume enclosed by a triangle soup, by the divergence theorem
+def meshVolume(mesh):
+    coords = mesh[0]
+    volume = 0.0
+    for t in range(0, len(coords), 9):
+        ax, ay, az, bx, by, bz, cx, cy, cz = coords[t:t + 9]
+        volume += (ax * (by * cz - bz * cy) - ay * (bx * cz - bz * cx) + az * (bx * cy - by * cx)) / 6
+    return volume
+
+def voronoiCells(count=40):
+    pattern = patterns.generate('voronoi', count, 1.0, 3)
+    return [(profileData, 0.0) for profileData in pattern.profiles()], pattern.midpoints()
+
+# Cut at any distance, a loop's schedule gives the layers of offsetting it that far directly
+def test_offsetSchedule():
+    for profileData, _ in voronoiCells()[0]:
+        poly = frustum.orientLoops(profileData.polygons())[0][1]
+        steps = frustum.offsetSchedule(poly)
+        for distance in (0.05, 0.2, 0.4):
+            try:
+                expected = frustum.offsetLayers(poly, distance)
+            except ValueError:
+                expected = None
+            try:
+                layers = frustum.scheduleLayers(steps, distance)
+            except ValueError:
+                layers = None
+            assert layers == expected
+
+# Every edit gives the mesh a fresh cache would, and every prism drawn has the exact frustum's volume
+def test_prismMeshAfterEdits():
+    cells, midpoints = voronoiCells()
+    cache = preview.PreviewCache()
+    cache.setCells('key', cells, midpoints)
+    for height, chamferAngle in ((1.0, math.radians(10)), (0.5, math.radians(30)), (0.2, math.radians(30)), (1.0, math.radians(10))):
+        mesh = cache.prismMesh(height, chamferAngle)
+        fresh = preview.PreviewCache()
+        fresh.setCells('key', cells, midpoints)
+        assert fresh.prismMesh(height, chamferAngle) == mesh
+        assert cache.prismMesh(height, chamferAngle) is mesh
+
+        volume = 0.0
+        for profileData, _ in cells:
+            try:
+                volume += frustum.frustumVolume(profileData, height, chamferAngle, preview.PREVIEW_TOLERANCE)
+            except ValueError:
+                pass
+        assert volume > 0 and math.isclose(meshVolume(mesh), volume, rel_tol=1e-9)
+        assert len(mesh[0]) == len(mesh[2]) == 3 * len(mesh[1])
+
+def test_collapsedCellsLeftOut():
+    square = ProfileData(0, [(True, [('polyline', [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)])])])
+    cache = preview.PreviewCache()
+    cache.setCells('key', [(square, 0.0)], [(0.5, 0.5)])
+    assert cache.prismMesh(1.0, math.radians(60))[0] == []
+    assert math.isclose(meshVolume(cache.prismMesh(1.0, math.radians(20))), frustum.frustumVolume(square, 1.0, math.radians(20)))
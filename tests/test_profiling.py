@@ -0,0 +1,100 @@
+# Headless checks of cellGen.profiling: stages that follow each other and are entered again, what each
+# stage is charged with, and the report of a profiled generate on the fake adsk layer.
+#
+#   python -m pytest tests
+
+import json, math, os, sys, types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+os.environ['ABSTRACT_CELL_CACHE_MB'] = '0'
+
+import spawnBodyCopiesBench as bench
+from cellGen import profiling
+
+# A stand-in API module: calls into it count once, however deep they go inside it
+fakeApi = types.ModuleType('adsk.profilingTest')
+exec("def helper():\n    return 1\n\ndef call():\n    return helper() + helper()\n", fakeApi.__dict__)
+
+def stageNumbers(report, key):
+    return {stage['name']: stage[key] for stage in report['stages']}
+
+# Beginning a stage ends the one running, so stages never overlap; a stage entered again adds up
+def test_stagesFollowEachOther():
+    timeline = [0]
+    profiler = profiling.Profiler('test', lambda: timeline[0], countApiCalls=False, traceMemory=False)
+    profiler.endStage()
+    for chunk in range(3):
+        profiler.beginStage('spawn')
+        timeline[0] += 1
+        profiler.beginStage('build')
+        timeline[0] += 4
+    profiler.beginStage('record')
+    profiler.count('cells', 12)
+    profiler.count('cells', 3)
+    report = profiler.finish(engine='Parametric')
+
+    assert [stage['name'] for stage in report['stages']] == ['spawn', 'build', 'record']
+    assert stageNumbers(report, 'entries') == {'spawn': 3, 'build': 3, 'record': 1}
+    assert stageNumbers(report, 'timelineFeatures') == {'spawn': 3, 'build': 12, 'record': 0}
+    assert report['timelineFeatures'] == timeline[0]
+    assert sum(stageNumbers(report, 'seconds').values()) <= report['totalSeconds']
+    assert report['counters'] == {'cells': 15} and report['engine'] == 'Parametric'
+
+    # A finished profiler keeps its report
+    profiler.beginStage('late')
+    assert profiler.finish() is report
+
+def test_apiCalls():
+    previous = sys.getprofile()
+    profiler = profiling.Profiler('test', traceMemory=False)
+    fakeApi.call()
+    profiler.beginStage('calls')
+    for _ in range(3):
+        fakeApi.call()
+    profiler.endStage()
+    fakeApi.call()
+    report = profiler.finish()
+    assert stageNumbers(report, 'apiCalls') == {'calls': 3}
+    assert sys.getprofile() is previous
+
+def test_peakMemory():
+    profiler = profiling.Profiler('test', countApiCalls=False)
+    profiler.beginStage('small')
+    small = [0] * 10
+    profiler.beginStage('large')
+    large = [0] * 1000000
+    report = profiler.finish()
+    del small, large
+    peaks = stageNumbers(report, 'peakMemoryBytes')
+    assert peaks['large'] >= 8000000 > peaks['small']
+    assert report['peakMemoryBytes'] == peaks['large']
+
+def test_reportAndSummary(tmp_path):
+    profiler = profiling.Profiler('test', countApiCalls=False, traceMemory=False)
+    profiler.beginStage('only')
+    profiler.count('cells')
+    with open(profiler.writeReport(str(tmp_path))) as f:
+        assert json.load(f) == json.loads(json.dumps(profiler.report))
+    lines = profiler.summary().split('\n')
+    assert lines[0].startswith('Profile test:') and lines[1].split()[0] == 'only' and lines[2] == '  cells: 1'
+
+def test_nullProfiler():
+    assert profiling.create(False, 'test') is profiling.NULL_PROFILER
+    profiling.NULL_PROFILER.beginStage('any')
+    profiling.NULL_PROFILER.endStage()
+    assert profiling.NULL_PROFILER.finish() is None
+
+# A Parametric generate enters its spawn & build stages once per chunk, one spawn Base Feature each time
+def test_generateProfile():
+    run = bench.runScenario('square', 120, 'Parametric', 'Batched', 'Transform', seed=1, profile=True, reuse=False)
+    assert not run['errors'], run['errors']
+    report = run['profile']
+    chunks = math.ceil(120 / bench.loadAddin().GENERATION_CHUNK_SIZE)
+    entries = stageNumbers(report, 'entries')
+    assert entries['spawnCopies'] == entries['buildCellsParametric'] == chunks
+    assert all(entries[name] == 1 for name in entries if name not in ('spawnCopies', 'buildCellsParametric'))
+    assert stageNumbers(report, 'timelineFeatures')['spawnCopies'] == chunks
+    assert report['timelineFeatures'] == sum(stageNumbers(report, 'timelineFeatures').values())
+    # Grouping cells into classes is pure Python
+    assert stageNumbers(report, 'apiCalls')['congruence'] == 0
+    assert report['counters']['cells'] == 120
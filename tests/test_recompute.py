@@ -0,0 +1,103 @@
+# Headless checks of the custom feature's recompute on the fake adsk layer: edits the Direct engine's cells
+# and their parts follow, and edits a compute cannot apply, which leave the design as it is.
+#
+#   python -m pytest tests
+
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+os.environ['ABSTRACT_CELL_CACHE_MB'] = '0'
+
+import spawnBodyCopiesBench as bench
+import adsk.core, adsk.fusion
+
+def generate(engine='Direct', reuse=False):
+    scenario = bench.Scenario('square', 9, engine, 'Batched', 'Transform', seed=1, reuse=reuse)
+    scenario.execute()
+    customFeature = scenario.design.rootComponent.features.customFeatures.item(0)
+    return scenario, customFeature
+
+# Fires the compute as Fusion does after an edit, returns the errors put on the feature
+def recompute(customFeature):
+    eventArgs = adsk.fusion.CustomFeatureEventArgs(customFeature)
+    customFeature.definition.customFeatureCompute._fire(eventArgs)
+    return [message.message for message in eventArgs.computeStatus.statusMessages]
+
+def cellRegistry(scenario, customFeature):
+    return scenario.addin.registry.CellRegistry.fromJson(customFeature.attributes.itemByName('AbstractCellGen1', 'CellRegistry').value)
+
+# {line index: entity of the stage}, for every cell of the feature
+def stageEntities(scenario, customFeature, stage):
+    return {record.lineIndex: scenario.addin.findEntity(scenario.design, record.tokens.get(stage))
+            for record in cellRegistry(scenario, customFeature).records}
+
+def designState(scenario, customFeature):
+    design = scenario.design
+    return (design.timeline.count, sum(c.bRepBodies.count for c in design.allComponents),
+            customFeature.attributes.itemByName('AbstractCellGen1', 'CellRegistry').value)
+
+def test_unchanged():
+    scenario, customFeature = generate()
+    before = designState(scenario, customFeature)
+    assert recompute(customFeature) == []
+    assert designState(scenario, customFeature) == before
+
+# A new height reaches the cells' copies and the CAM-Ready parts made from them
+def test_height():
+    scenario, customFeature = generate()
+    before = {lineIndex: body.volume for lineIndex, body in stageEntities(scenario, customFeature, 'component').items()}
+    copiedBefore = {lineIndex: body.volume for lineIndex, body in stageEntities(scenario, customFeature, 'copied').items()}
+    height = customFeature.parameters.itemById('cellHeight')
+    height.expression = f"{height.value * 1.5} cm"
+    assert recompute(customFeature) == []
+    after = {lineIndex: body.volume for lineIndex, body in stageEntities(scenario, customFeature, 'component').items()}
+    copiedAfter = {lineIndex: body.volume for lineIndex, body in stageEntities(scenario, customFeature, 'copied').items()}
+    assert before.keys() == after.keys() and len(after) == 9
+    assert all(after[lineIndex] > before[lineIndex] for lineIndex in before)
+    assert copiedAfter == after and copiedBefore == before
+    assert not any('Failed' in line for line in scenario.paletteLines())
+
+def turnFirstLine(scenario):
+    line = scenario.directionSketch.sketchCurves.sketchLines.item(0)
+    line.endSketchPoint.move(adsk.core.Vector3D.create(0.5, 0.0, 0.0))
+
+# {line index: transform of the part}
+def partTransforms(scenario, customFeature):
+    return {lineIndex: [round(value, 9) for value in occurrence.transform2.asArray()]
+            for lineIndex, occurrence in stageEntities(scenario, customFeature, 'part').items()}
+
+# Turning a direction line rebuilds its cell and lays the parts out as generating from the edited sketch does
+def test_turnedLine():
+    scenario, customFeature = generate()
+    before = partTransforms(scenario, customFeature)
+    turnFirstLine(scenario)
+    assert recompute(customFeature) == []
+
+    records = {record.lineIndex: record for record in cellRegistry(scenario, customFeature).records}
+    angles = scenario.addin.readDirectionLines(scenario.directionSketch, scenario.spawnBody)[1]
+    assert records[0].angle == angles[0]
+    after = partTransforms(scenario, customFeature)
+    assert after[0] != before[0]
+
+    fresh = bench.Scenario('square', 9, 'Direct', 'Batched', 'Transform', seed=1, reuse=False)
+    turnFirstLine(fresh)
+    fresh.execute()
+    assert after == partTransforms(fresh, fresh.design.rootComponent.features.customFeatures.item(0))
+
+def test_addedCellRejected():
+    scenario, customFeature = generate()
+    before = designState(scenario, customFeature)
+    bench.addCell(scenario.boundarySketch, scenario.directionSketch, scenario.pattern)
+    errors = recompute(customFeature)
+    assert len(errors) == 1 and 'adds 1' in errors[0]
+    assert designState(scenario, customFeature) == before
+
+def test_parametricEditRejected():
+    scenario, customFeature = generate('Parametric')
+    assert recompute(customFeature) == []
+    before = designState(scenario, customFeature)
+    height = customFeature.parameters.itemById('cellHeight')
+    height.expression = f"{height.value * 1.5} cm"
+    errors = recompute(customFeature)
+    assert len(errors) == 1 and 'Parametric' in errors[0]
+    assert designState(scenario, customFeature) == before
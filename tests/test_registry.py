@@ -0,0 +1,77 @@
+# Headless checks of cellGen.registry: binding the tokens of a cell's stages, the JSON the custom feature
+# keeps it in, and that the persisted tokens of a generate on the fake adsk layer still find their entities.
+#
+#   python -m pytest tests
+
+import json, os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+os.environ['ABSTRACT_CELL_CACHE_MB'] = '0'
+
+import spawnBodyCopiesBench as bench
+
+import pytest
+
+from cellGen import registry
+
+def sampleRegistry():
+    cellRegistry = registry.CellRegistry()
+    first = cellRegistry.add('cell', 'cell0', 0, 4, 12.5, 'fp0', entity='body0')
+    second = cellRegistry.add('cell', 'cell1', 1, 2, -90.0, 'fp1')
+    cellRegistry.addReuse(2, 7, 12.5, 0, 'fp2')
+    cellRegistry.bindStage('copied', ['cell0', 'cell1', 'unknown'], ['copy0', 'copy1', 'copy9'], ['entity0', 'entity1', 'entity9'])
+    cellRegistry.bind(first, 'part', 'part0')
+    return cellRegistry, first, second
+
+def test_bind():
+    cellRegistry, first, second = sampleRegistry()
+    assert first.tokens == {'cell': 'cell0', 'copied': 'copy0', 'part': 'part0'}
+    assert cellRegistry.get('copy1') is second and cellRegistry.get('copy9') is None
+    assert cellRegistry.entity(first, 'copied') == 'entity0' and cellRegistry.entity(first, 'part') is None
+    assert sorted(cellRegistry.byFingerprint()) == ['fp0', 'fp1', 'fp2']
+    with pytest.raises(ValueError):
+        cellRegistry.bindStage('component', ['copy0', 'copy1'], ['component0'])
+
+    cellRegistry.remove(second)
+    assert len(cellRegistry) == 2
+    assert cellRegistry.get('cell1') is None and cellRegistry.get('copy1') is None
+
+# Everything but the live entities survives the JSON round trip, records keep their order
+def test_jsonRoundTrip():
+    cellRegistry, _, _ = sampleRegistry()
+    restored = registry.CellRegistry.fromJson(cellRegistry.toJson())
+    assert [record.toDict() for record in restored.records] == [record.toDict() for record in cellRegistry.records]
+    assert restored.records[2].sourceLine == 0 and restored.records[2].tokens == {}
+    assert restored.get('part0') is restored.records[0]
+    assert restored.entities == {}
+
+    # Records written before fingerprints & reuse existed still load
+    old = registry.CellRegistry.fromJson(json.dumps([{'lineIndex': 3, 'profileIndex': 1, 'angle': 0.0, 'tokens': {'cell': 'a'}}]))
+    assert (old.records[0].fingerprint, old.records[0].sourceLine) == (None, None)
+    assert old.get('a') is old.records[0]
+
+# The registry a generate keeps on its custom feature names every cell once, and its tokens find the entities
+def test_persistedInDesign():
+    scenario = bench.Scenario('square', 16, 'Direct', 'Batched', 'Transform', seed=1, directionAngles=[0, 90])
+    scenario.execute()
+    customFeature = scenario.design.rootComponent.features.customFeatures.item(0)
+    cellRegistry = registry.CellRegistry.fromJson(customFeature.attributes.itemByName('AbstractCellGen1', 'CellRegistry').value)
+
+    assert sorted(record.lineIndex for record in cellRegistry.records) == list(range(16))
+    assert len({record.profileIndex for record in cellRegistry.records}) == 16
+    reused = [record for record in cellRegistry.records if record.sourceLine is not None]
+    assert reused
+    sources = {record.lineIndex for record in cellRegistry.records if record.sourceLine is None}
+    assert all(record.sourceLine in sources for record in reused)
+
+    byLine = {record.lineIndex: record for record in cellRegistry.records}
+    for record in cellRegistry.records:
+        stages = ('copied', 'camReady', 'part', 'component') if record.sourceLine is None else ('part', 'inPlace', 'component')
+        for stage in stages:
+            token = record.tokens.get(stage)
+            assert token and scenario.addin.findEntity(scenario.design, token) is not None, (record.lineIndex, stage)
+        # A reusing cell is an occurrence of its source's component, whose body token it shares
+        if record.sourceLine is not None:
+            assert record.tokens['component'] == byLine[record.sourceLine].tokens['component']
+        else:
+            assert cellRegistry.get(record.tokens['part']) is record
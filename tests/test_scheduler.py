@@ -0,0 +1,79 @@
+# Headless checks of cellGen.scheduler: chunked runs that are cancelled or fail, and checkpoints that
+# survive the run in their store.
+#
+#   python -m pytest tests
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from cellGen import scheduler
+
+def test_chunks():
+    chunks, progress, yields = [], [], []
+    chunkScheduler = scheduler.ChunkScheduler(2, lambda: yields.append(1), progress.append)
+    assert chunkScheduler.run(list(range(5)), chunks.append, done=3, total=8) == 8
+    assert chunks == [[0, 1], [2, 3], [4]]
+    assert progress == [5, 7, 8]
+    assert len(yields) == chunkScheduler.chunks == 3
+
+def test_cancel():
+    chunks = []
+    chunkScheduler = scheduler.ChunkScheduler(2, isCancelled=lambda: len(chunks) == 2)
+    with pytest.raises(scheduler.Cancelled) as raised:
+        chunkScheduler.run(list(range(7)), chunks.append)
+    assert (raised.value.done, raised.value.total) == (4, 7)
+    assert chunks == [[0, 1], [2, 3]]
+
+def test_failure():
+    chunks = []
+    def processChunk(chunk):
+        if 4 in chunk:
+            raise RuntimeError('boom')
+        chunks.append(chunk)
+    with pytest.raises(scheduler.ChunkFailed) as raised:
+        scheduler.ChunkScheduler(2).run(list(range(7)), processChunk)
+    assert (raised.value.done, raised.value.total) == (4, 7)
+    assert isinstance(raised.value.error, RuntimeError)
+    assert chunks == [[0, 1], [2, 3]]
+
+def test_checkpointRoundTrip():
+    checkpoint = scheduler.Checkpoint('run', 4, {'first': 'tokenF'})
+    checkpoint.addCells([2, 0], {2: 'token2'})
+    restored = scheduler.Checkpoint.fromJson(checkpoint.toJson())
+    assert (restored.runFingerprint, restored.total, restored.version) == ('run', 4, scheduler.Checkpoint.VERSION)
+    assert restored.features == {'first': 'tokenF'}
+    assert restored.cells == [(2, 'token2'), (0, None)]
+    assert restored.tokens() == ['tokenF', 'token2']
+    assert restored.remaining([('a', 0), ('b', 1), ('c', 2), ('d', 3)]) == [('b', 1), ('d', 3)]
+
+def test_store(tmp_path):
+    store = scheduler.CheckpointStore(str(tmp_path))
+    checkpoint = scheduler.Checkpoint('run', 4)
+    checkpoint.addCells([0], {0: 'token0'})
+    store.save('document', checkpoint)
+    store.save('other document', scheduler.Checkpoint('run', 2))
+
+    loaded, stale = store.load('document', 'run')
+    assert loaded.cells == [(0, 'token0')] and not stale
+    assert store.load('new document', 'run') == (None, False)
+
+    # A run with other inputs drops the document's checkpoint, other documents keep theirs
+    assert store.load('document', 'edited run') == (None, True)
+    assert store.load('document', 'run') == (None, False)
+    assert store.load('other document', 'run')[0] is not None
+
+    store.clear('other document')
+    assert os.listdir(str(tmp_path)) == []
+
+def test_storeVersionMismatch(tmp_path):
+    store = scheduler.CheckpointStore(str(tmp_path))
+    store.save('document', scheduler.Checkpoint('run', 4, version=scheduler.Checkpoint.VERSION - 1))
+    assert store.load('document', 'run') == (None, True)
+    assert os.listdir(str(tmp_path)) == []
+
+    with open(store.path('document', 'run'), 'w') as f:
+        f.write('{"version": 2, "runFin')
+    assert store.load('document', 'run') == (None, True)
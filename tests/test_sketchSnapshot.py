@@ -0,0 +1,84 @@
+# Headless checks of cellGen.sketchSnapshot against the sketch lines it is read from, on the fake adsk layer:
+# every column, and every value computed from the columns, matches what the API gives for the same line.
+#
+#   python -m pytest tests
+
+import math, os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+os.environ['ABSTRACT_CELL_CACHE_MB'] = '0'
+
+import spawnBodyCopiesBench as bench
+import adsk.core, adsk.fusion
+
+from cellGen import fusionIO
+
+# A sketch turned about Z and lifted off the XY plane, with construction lines and one that is not
+def directionSketch():
+    design = adsk.fusion.Design()
+    sketch = design.rootComponent.sketches.add(design.rootComponent.xYConstructionPlane)
+    matrix = adsk.core.Matrix3D.create()
+    matrix.setToRotation(math.radians(30), adsk.core.Vector3D.create(0.0, 0.0, 1.0), adsk.core.Point3D.create(0.0, 0.0, 0.0))
+    matrix.translation = adsk.core.Vector3D.create(2.0, -1.0, 0.5)
+    sketch._setTransform(matrix)
+    lines = sketch.sketchCurves.sketchLines
+    for (x0, y0), (x1, y1), construction in (((0.0, 0.0), (1.0, 0.0), True), ((3.0, 1.0), (3.0, 3.0), False),
+                                             ((1.0, 2.0), (0.5, 1.5), True), ((-2.0, 4.0), (-1.0, 6.0), True)):
+        line = lines.addByTwoPoints(adsk.core.Point3D.create(x0, y0, 0.0), adsk.core.Point3D.create(x1, y1, 0.0))
+        line.isConstruction = construction
+    return design, sketch
+
+def close(a, b):
+    return all(abs(x - y) <= 1e-9 for x, y in zip(a, b))
+
+def test_columns():
+    _, sketch = directionSketch()
+    snapshot = fusionIO.readDirectionLines(sketch)
+    lines = sketch.sketchCurves.sketchLines
+    assert snapshot.lineCount == lines.count == 4
+    assert list(snapshot.sourceIndex) == [0, 2, 3] and len(snapshot) == 3
+    assert close(snapshot.sketchToWorld, sketch.transform.asArray())
+
+    starts, ends = snapshot.worldEndpoints()
+    for row, sourceIndex in enumerate(snapshot.sourceIndex):
+        line = lines.item(sourceIndex)
+        start, end = line.geometry.startPoint.asArray(), line.geometry.endPoint.asArray()
+        assert (snapshot.startX[row], snapshot.startY[row], snapshot.startZ[row]) == start
+        assert (snapshot.endX[row], snapshot.endY[row], snapshot.endZ[row]) == end
+        assert close(starts[row], line.worldGeometry.startPoint.asArray())
+        assert close(ends[row], line.worldGeometry.endPoint.asArray())
+        assert math.isclose(snapshot.angles()[row], 90 + math.degrees(math.atan2(end[1] - start[1], end[0] - start[0])))
+
+# Midpoints in another sketch's space are where that sketch's own API puts the world midpoints
+def test_midpointsIn():
+    design, sketch = directionSketch()
+    snapshot = fusionIO.readDirectionLines(sketch)
+    boundarySketch = design.rootComponent.sketches.add(design.rootComponent.xYConstructionPlane)
+    matrix = adsk.core.Matrix3D.create()
+    matrix.setToRotation(math.radians(-75), adsk.core.Vector3D.create(0.0, 0.0, 1.0), adsk.core.Point3D.create(1.0, 1.0, 0.0))
+    boundarySketch._setTransform(matrix)
+
+    midpoints = snapshot.midpointsIn(fusionIO.sketchToWorldMatrix(boundarySketch))
+    for (x, y), world in zip(midpoints, snapshot.worldMidpoints()):
+        expected = boundarySketch.modelToSketchSpace(adsk.core.Point3D.create(*world))
+        assert close((x, y), (expected.x, expected.y))
+
+# A placement turns the body by its line's angle and moves the given point onto the line's midpoint
+def test_placementMatrices():
+    _, sketch = directionSketch()
+    snapshot = fusionIO.readDirectionLines(sketch)
+    fromPoint = (-30.0, -30.0, 0.25)
+    for matrix, angle, midpoint in zip(snapshot.placementMatrices(fromPoint), snapshot.angles(), snapshot.worldMidpoints()):
+        moved = adsk.core.Point3D.create(*fromPoint)
+        moved.transformBy(fusionIO.toMatrix3D(matrix))
+        assert close(moved.asArray(), midpoint)
+        assert close((matrix[0], matrix[4]), (math.cos(math.radians(angle)), math.sin(math.radians(angle))))
+
+# Only the fingerprint of the line that moved changes
+def test_fingerprints():
+    _, sketch = directionSketch()
+    before = fusionIO.readDirectionLines(sketch).fingerprints()
+    assert len(set(before)) == 3
+    sketch.sketchCurves.sketchLines.item(2).endSketchPoint.move(adsk.core.Vector3D.create(0.25, 0.0, 0.0))
+    after = fusionIO.readDirectionLines(sketch).fingerprints()
+    assert [a == b for a, b in zip(before, after)] == [True, False, True]
@@ -0,0 +1,57 @@
+# Headless checks of cellGen.spatialIndex.UniformGrid queries against a brute-force scan.
+#
+#   python -m pytest tests
+
+import os, random, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cellGen.spatialIndex import UniformGrid
+
+def bruteForcePoints(points, minX, minY, maxX, maxY):
+    return [index for index, (x, y) in enumerate(points) if minX <= x <= maxX and minY <= y <= maxY]
+
+def randomBox(rng, span):
+    x0, x1 = sorted(rng.uniform(-span * 0.2, span * 1.2) for _ in range(2))
+    y0, y1 = sorted(rng.uniform(-span * 0.2, span * 1.2) for _ in range(2))
+    return x0, y0, x1, y1
+
+def test_pointQueries():
+    rng = random.Random(1)
+    # Clustered points, a row of them on one line and exact duplicates
+    points = [(rng.gauss(20.0, 3.0), rng.gauss(20.0, 3.0)) for _ in range(300)]
+    points += [(rng.uniform(0.0, 100.0), rng.uniform(0.0, 100.0)) for _ in range(300)]
+    points += [(float(i), 50.0) for i in range(50)] + [(5.0, 5.0)] * 3
+    grid = UniformGrid.fromPoints(points)
+    for _ in range(300):
+        box = randomBox(rng, 100.0)
+        assert grid.query(*box) == bruteForcePoints(points, *box)
+
+    # Boxes touching points on their sides, and degenerate boxes on a single point
+    assert grid.query(5.0, 5.0, 5.0, 5.0) == bruteForcePoints(points, 5.0, 5.0, 5.0, 5.0)
+    assert grid.query(10.0, 50.0, 12.0, 50.0) == bruteForcePoints(points, 10.0, 50.0, 12.0, 50.0)
+    # A box far larger than the grid takes the scan-every-cell path
+    assert grid.query(-1e6, -1e6, 1e6, 1e6) == list(range(len(points)))
+
+def test_boxQueries():
+    rng = random.Random(2)
+    grid = UniformGrid(3.0)
+    boxes = {}
+    for index in range(200):
+        x, y = rng.uniform(0.0, 50.0), rng.uniform(0.0, 50.0)
+        boxes[index] = (x, y, x + rng.uniform(0.0, 10.0), y + rng.uniform(0.0, 10.0))
+        grid.insertBox(index, *boxes[index])
+    for index in range(0, 200, 3):
+        grid.remove(index)
+        del boxes[index]
+    for _ in range(300):
+        minX, minY, maxX, maxY = randomBox(rng, 60.0)
+        expected = sorted(index for index, (bx0, by0, bx1, by1) in boxes.items()
+                          if bx0 <= maxX and bx1 >= minX and by0 <= maxY and by1 >= minY)
+        assert grid.query(minX, minY, maxX, maxY) == expected
+
+def test_fewPoints():
+    assert UniformGrid.fromPoints([]).query(-1.0, -1.0, 1.0, 1.0) == []
+    grid = UniformGrid.fromPoints([(2.0, 3.0)])
+    assert grid.query(2.0, 3.0, 2.0, 3.0) == [0]
+    assert grid.query(2.1, 3.0, 4.0, 4.0) == []